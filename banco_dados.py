@@ -0,0 +1,1070 @@
+"""Acesso ao banco SQLite: pool de conexões, índices e gravação em lote.
+
+Módulo sem dependência do Streamlit, como o processamento_pdf. Cada processo
+mantém um pool por arquivo de banco, com conexões de leitura reaproveitadas
+e uma única conexão de escrita; todas recebem as PRAGMAs de desempenho ao
+serem abertas.
+
+Os lançamentos
+de um arquivo são validados antes de qualquer escrita e gravados com
+executemany em uma única transação, junto com o registro em
+arquivos_processados: ou o arquivo inteiro é salvo, ou nada é. Os problemas
+encontrados viram uma lista de mensagens (o relatório de erros) que a
+interface exibe de uma vez. O esquema do banco também é criado aqui
+(criar_esquema), para servir à interface e ao importador em lote.
+
+A leitura para o dashboard é incremental: CacheLancamentos guarda as
+tabelas em memória e, a cada atualização, busca só as linhas com id acima
+da última marca d'água, relendo tudo apenas quando houve UPDATE ou DELETE.
+Os painéis de totais usam agregar_lancamentos, que faz os GROUP BY no
+próprio SQLite sobre resumos mensais materializados (RESUMOS_MENSAIS),
+mantidos por triggers e reconstruíveis sob demanda.
+"""
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from duplicatas import criar_fila_revisao
+from processamento_pdf import normalizar_estabelecimento, regras_padrao_categoria
+
+# PRAGMAs aplicadas a toda conexão aberta pelo pool
+PRAGMAS_CONEXAO = (
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA cache_size=-32768",  # 32 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=268435456",  # até 256 MB do arquivo mapeados em memória
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA synchronous=NORMAL"
+)
+
+# Conexões de leitura mantidas abertas, sem uso, por pool
+MAX_CONEXOES_LEITURA_OCIOSAS = 4
+
+# Espera máxima pela conexão de escrita (em segundos), como o busy_timeout
+TIMEOUT_ESCRITA = 30
+
+# Índices secundários gerenciados (nome -> tabela e colunas). Índices com
+# prefixo idx_ que saírem desta lista são removidos por criar_indices
+INDICES = {
+    'idx_transacoes_data': 'transacoes (data)',
+    'idx_transacoes_data_categoria': 'transacoes (data, categoria)',
+    'idx_transacoes_categoria_data': 'transacoes (categoria, data)',
+    'idx_transacoes_cartao_data': 'transacoes (cartao, data)',
+    'idx_receitas_data': 'receitas (data)',
+    'idx_receitas_tipo_data': 'receitas (tipo_lancamento, data)',
+    'idx_receitas_codigo': 'receitas (codigo)',
+    'idx_transacoes_ano_mes': 'transacoes (ano_mes)',
+    'idx_receitas_ano_mes': 'receitas (ano_mes)',
+    'idx_arquivos_hash': 'arquivos_processados (hash_arquivo)'
+}
+
+# Índices únicos: o hash de conteúdo impede o mesmo lançamento de entrar duas
+# vezes, mesmo vindo de arquivos diferentes (faturas com períodos sobrepostos)
+INDICES_UNICOS = {
+    'idx_transacoes_hash_conteudo': 'transacoes (hash_conteudo)',
+    'idx_receitas_hash_conteudo': 'receitas (hash_conteudo)'
+}
+
+# Consultas frequentes da interface (nome -> SQL e parâmetros de exemplo),
+# usadas para conferir o plano de execução em Configurações
+CONSULTAS_FREQUENTES = {
+    'Arquivo já processado (hash)': (
+        "SELECT nome_arquivo FROM arquivos_processados WHERE hash_arquivo = ?", ('',)
+    ),
+    'Transações por data': ("SELECT * FROM transacoes ORDER BY data DESC", ()),
+    'Receitas por data': ("SELECT * FROM receitas ORDER BY data DESC", ()),
+    'Gastos por categoria no mês': (
+        "SELECT categoria, SUM(valor) FROM transacoes WHERE data BETWEEN ? AND ? GROUP BY categoria",
+        ('2025-01-01', '2025-01-31')
+    ),
+    'Transações de uma categoria no mês': (
+        "SELECT * FROM transacoes WHERE data BETWEEN ? AND ? AND categoria = ?",
+        ('2025-01-01', '2025-01-31', 'Alimentação')
+    ),
+    'Gastos por mês e categoria (resumo)': (
+        "SELECT ano_mes, categoria, SUM(total) FROM resumo_mensal_transacoes GROUP BY ano_mes, categoria",
+        ()
+    ),
+    'Rubricas de receitas no ano (resumo)': (
+        "SELECT codigo, categoria, tipo_lancamento, SUM(total) FROM resumo_mensal_receitas "
+        "WHERE ano_mes BETWEEN ? AND ? GROUP BY codigo, categoria, tipo_lancamento",
+        (202501, 202512)
+    ),
+    'Transações por cartão': (
+        "SELECT * FROM transacoes WHERE cartao = ? ORDER BY data DESC", ('Santander',)
+    ),
+    'Página de transações de uma categoria': (
+        "SELECT * FROM transacoes WHERE categoria = ? ORDER BY data DESC, id DESC LIMIT ? OFFSET ?",
+        ('Alimentação', 100, 0)
+    ),
+    'Receitas de um mês (ano_mes)': (
+        "SELECT * FROM receitas WHERE ano_mes BETWEEN ? AND ? ORDER BY data DESC", (202501, 202501)
+    ),
+    'Créditos/débitos no mês': (
+        "SELECT * FROM receitas WHERE tipo_lancamento = ? AND data BETWEEN ? AND ?",
+        ('credito', '2025-01-01', '2025-01-31')
+    ),
+    'Lançamentos por código': ("SELECT * FROM receitas WHERE codigo = ?", ('2002',))
+}
+
+class ConexaoPool(sqlite3.Connection):
+    """Conexão emprestada por um PoolConexoes; close() a devolve ao pool"""
+    
+    pool = None
+    escrita = False
+    emprestada = False
+    
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.devolver(self)
+    
+    def fechar(self):
+        """Fecha a conexão de fato"""
+        super().close()
+
+class PoolConexoes:
+    """Pool de conexões de um arquivo de banco, compartilhado pelas threads do processo
+    
+    As conexões de leitura são abertas com query_only e reaproveitadas; a
+    conexão de escrita é única e fica reservada para quem a pediu até ser
+    devolvida (o SQLite só aceita um escritor por vez).
+    """
+    
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.ociosas = []
+        self.trava = threading.Lock()
+        self.trava_escrita = threading.Lock()
+        self.conexao_escrita = None
+    
+    def abrir(self, escrita):
+        conn = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False, factory=ConexaoPool)
+        for pragma in PRAGMAS_CONEXAO:
+            conn.execute(pragma)
+        if escrita:
+            conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            conn.execute("PRAGMA query_only=ON")
+        conn.pool = self
+        conn.escrita = escrita
+        return conn
+    
+    def leitura(self):
+        """Empresta uma conexão de leitura"""
+        with self.trava:
+            conn = self.ociosas.pop() if self.ociosas else None
+        if conn is None:
+            conn = self.abrir(escrita=False)
+        conn.emprestada = True
+        return conn
+    
+    def escrita(self):
+        """Empresta a conexão de escrita, esperando se outra thread estiver com ela"""
+        if not self.trava_escrita.acquire(timeout=TIMEOUT_ESCRITA):
+            raise sqlite3.OperationalError("conexão de escrita ocupada")
+        try:
+            if self.conexao_escrita is None:
+                self.conexao_escrita = self.abrir(escrita=True)
+        except Exception:
+            self.trava_escrita.release()
+            raise
+        self.conexao_escrita.emprestada = True
+        return self.conexao_escrita
+    
+    def devolver(self, conn):
+        """Recebe de volta uma conexão emprestada (chamado por conn.close())"""
+        if not conn.emprestada:
+            return
+        conn.emprestada = False
+        
+        # Desfazer transação deixada aberta e restaurar o modo padrão do sqlite3
+        reaproveitar = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.isolation_level = ''
+        except sqlite3.Error:
+            reaproveitar = False
+            conn.fechar()
+        
+        if conn.escrita:
+            if not reaproveitar:
+                self.conexao_escrita = None
+            self.trava_escrita.release()
+            return
+        
+        if reaproveitar:
+            with self.trava:
+                if len(self.ociosas) < MAX_CONEXOES_LEITURA_OCIOSAS:
+                    self.ociosas.append(conn)
+                    return
+            conn.fechar()
+
+POOLS = {}
+TRAVA_POOLS = threading.Lock()
+
+def obter_pool(caminho):
+    """Pool de conexões do processo para o arquivo de banco informado"""
+    with TRAVA_POOLS:
+        if caminho not in POOLS:
+            POOLS[caminho] = PoolConexoes(caminho)
+        return POOLS[caminho]
+
+COLUNAS_TRANSACAO = (
+    'data', 'estabelecimento', 'categoria', 'valor', 'cartao', 'arquivo_origem', 'ano_mes', 'hash_conteudo'
+)
+COLUNAS_RECEITA = (
+    'data', 'descricao', 'categoria', 'valor', 'fonte', 'codigo', 'tipo_lancamento', 'arquivo_origem',
+    'ano_mes', 'hash_conteudo'
+)
+
+def normalizar_data(valor):
+    """Data no formato ISO (AAAA-MM-DD) usado nas colunas DATE do banco"""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, str) and valor.strip():
+        return date.fromisoformat(valor.strip()[:10]).isoformat()
+    raise ValueError("data ausente ou inválida")
+
+def hash_conteudo(*campos):
+    """Hash do conteúdo normalizado de um lançamento
+    
+    Textos em maiúsculas e com espaços simples, valores em centavos, para que
+    a mesma compra lida de faturas diferentes gere o mesmo hash.
+    """
+    partes = []
+    for campo in campos:
+        if isinstance(campo, float):
+            partes.append(str(round(campo * 100)))
+        else:
+            partes.append(normalizar_estabelecimento('' if campo is None else campo))
+    return hashlib.blake2b('|'.join(partes).encode('utf-8'), digest_size=16).hexdigest()
+
+def hash_transacao(data, estabelecimento, valor, cartao):
+    """Hash de conteúdo de uma transação: data, estabelecimento, centavos e cartão"""
+    return hash_conteudo(data, estabelecimento, float(valor), cartao)
+
+def hash_receita(data, descricao, valor, codigo, tipo_lancamento):
+    """Hash de conteúdo de uma receita/desconto: data, descrição, centavos, código e tipo"""
+    return hash_conteudo(data, descricao, float(valor), codigo, tipo_lancamento)
+
+def ano_mes_da_data(data_iso):
+    """Chave inteira do mês (AAAAMM) de uma data ISO: '2025-03-10' -> 202503"""
+    return int(data_iso[:4]) * 100 + int(data_iso[5:7])
+
+def normalizar_valor(valor):
+    """Valor positivo e finito"""
+    valor = float(valor)
+    if not math.isfinite(valor) or valor <= 0:
+        raise ValueError(f"valor inválido: {valor}")
+    return valor
+
+def texto_obrigatorio(item, campo):
+    """Texto de um campo obrigatório (NOT NULL no banco)"""
+    valor = item.get(campo)
+    if valor is None or not str(valor).strip():
+        raise ValueError(f"campo '{campo}' vazio")
+    return str(valor)
+
+def linha_transacao(transacao):
+    """Tupla pronta para o INSERT em transacoes (ValueError se inválida)"""
+    data = normalizar_data(transacao.get('data'))
+    estabelecimento = texto_obrigatorio(transacao, 'estabelecimento')
+    valor = normalizar_valor(transacao.get('valor'))
+    cartao = texto_obrigatorio(transacao, 'cartao')
+    return (
+        data,
+        estabelecimento,
+        texto_obrigatorio(transacao, 'categoria'),
+        valor,
+        cartao,
+        texto_obrigatorio(transacao, 'arquivo_origem'),
+        ano_mes_da_data(data),
+        hash_transacao(data, estabelecimento, valor, cartao)
+    )
+
+def linha_receita(receita):
+    """Tupla pronta para o INSERT em receitas (ValueError se inválida)"""
+    data = normalizar_data(receita.get('data'))
+    descricao = texto_obrigatorio(receita, 'descricao')
+    valor = normalizar_valor(receita.get('valor'))
+    codigo = receita.get('codigo', '')
+    tipo_lancamento = receita.get('tipo_lancamento', 'credito')
+    return (
+        data,
+        descricao,
+        texto_obrigatorio(receita, 'categoria'),
+        valor,
+        texto_obrigatorio(receita, 'fonte'),
+        codigo,
+        tipo_lancamento,
+        texto_obrigatorio(receita, 'arquivo_origem'),
+        ano_mes_da_data(data),
+        hash_receita(data, descricao, valor, codigo, tipo_lancamento)
+    )
+
+def preparar_linhas(itens, montar_linha, rotulo, erros):
+    """Valida os itens, acumulando em ``erros`` os que não podem ser gravados"""
+    linhas = []
+    for posicao, item in enumerate(itens, start=1):
+        try:
+            linhas.append(montar_linha(item))
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            descricao = item.get('estabelecimento') or item.get('descricao') or '?'
+            erros.append(f"{rotulo} {posicao} ({descricao}): {e}")
+    return linhas
+
+def salvar_lancamentos_arquivo(conn, nome_arquivo, hash_arquivo, tipo_arquivo, transacoes=(), receitas=()):
+    """Grava os lançamentos de um arquivo e o registra como processado, atomicamente
+    
+    ``transacoes`` vão para a tabela transacoes (despesas de fatura ou
+    descontos de contracheque) e ``receitas`` para a tabela receitas.
+    Retorna um relatório {'transacoes', 'receitas', 'duplicados', 'erros',
+    'registrado'} com as quantidades gravadas, os lançamentos ignorados por
+    já existirem no banco (mesmo hash de conteúdo), as mensagens de erro e se
+    o arquivo entrou em arquivos_processados. Itens inválidos são deixados de
+    fora; uma falha do banco desfaz o arquivo inteiro.
+    """
+    erros = []
+    linhas_transacoes = preparar_linhas(transacoes, linha_transacao, "Transação", erros)
+    linhas_receitas = preparar_linhas(receitas, linha_receita, "Receita", erros)
+    relatorio = {'transacoes': 0, 'receitas': 0, 'duplicados': 0, 'erros': erros, 'registrado': False}
+    
+    if not linhas_transacoes and not linhas_receitas:
+        erros.append("Nenhum lançamento válido para salvar")
+        return relatorio
+    
+    try:
+        with conn:
+            # Lançamentos já gravados (mesmo hash de conteúdo) são ignorados pelo índice único;
+            # rowcount do executemany conta só as linhas realmente inseridas
+            gravadas_transacoes = conn.executemany(f'''
+                INSERT INTO transacoes ({', '.join(COLUNAS_TRANSACAO)})
+                VALUES ({', '.join('?' * len(COLUNAS_TRANSACAO))})
+                ON CONFLICT (hash_conteudo) DO NOTHING
+            ''', linhas_transacoes).rowcount if linhas_transacoes else 0
+            gravadas_receitas = conn.executemany(f'''
+                INSERT INTO receitas ({', '.join(COLUNAS_RECEITA)})
+                VALUES ({', '.join('?' * len(COLUNAS_RECEITA))})
+                ON CONFLICT (hash_conteudo) DO NOTHING
+            ''', linhas_receitas).rowcount if linhas_receitas else 0
+            
+            # Registrar arquivo processado na mesma transação
+            conn.execute('''
+                INSERT OR REPLACE INTO arquivos_processados
+                (nome_arquivo, hash_arquivo, tipo_arquivo, total_transacoes)
+                VALUES (?, ?, ?, ?)
+            ''', (nome_arquivo, hash_arquivo, tipo_arquivo, gravadas_transacoes + gravadas_receitas))
+    except Exception as e:
+        erros.append(f"Erro ao salvar {nome_arquivo}; nenhum lançamento do arquivo foi gravado: {e}")
+        return relatorio
+    
+    relatorio['registrado'] = True
+    relatorio['transacoes'] = gravadas_transacoes
+    relatorio['receitas'] = gravadas_receitas
+    relatorio['duplicados'] = (
+        len(linhas_transacoes) + len(linhas_receitas) - gravadas_transacoes - gravadas_receitas
+    )
+    return relatorio
+
+def criar_indices(conn):
+    """Cria os índices gerenciados que faltam e remove os que saíram de INDICES/INDICES_UNICOS
+    
+    Pode ser chamada a cada inicialização: só altera o que estiver diferente.
+    """
+    existentes = {
+        nome for (nome,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'"
+        )
+    }
+    for nome in existentes - INDICES.keys() - INDICES_UNICOS.keys():
+        conn.execute(f"DROP INDEX IF EXISTS {nome}")
+    for nome, definicao in INDICES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+    for nome, definicao in INDICES_UNICOS.items():
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {nome} ON {definicao}")
+
+def preencher_hash_conteudo(conn):
+    """Migração: calcula o hash de conteúdo das linhas gravadas antes da coluna existir
+    
+    Roda depois de criar_indices: com o índice único já ativo, o UPDATE OR
+    IGNORE deixa sem hash (NULL) as cópias que já estavam duplicadas no banco,
+    em vez de falhar.
+    """
+    consultas = {
+        'transacoes': ('estabelecimento, valor, cartao', hash_transacao),
+        'receitas': ('descricao, valor, codigo, tipo_lancamento', hash_receita)
+    }
+    for tabela, (colunas, calcular_hash) in consultas.items():
+        linhas = [
+            (calcular_hash(str(data)[:10], *campos), id_linha)
+            for id_linha, data, *campos in conn.execute(
+                f"SELECT id, data, {colunas} FROM {tabela} WHERE hash_conteudo IS NULL"
+            ).fetchall()
+        ]
+        conn.executemany(f"UPDATE OR IGNORE {tabela} SET hash_conteudo = ? WHERE id = ?", linhas)
+
+def analisar_consultas(conn):
+    """Atualiza as estatísticas do planejador (ANALYZE) e retorna o plano das consultas frequentes
+    
+    Cada item traz o nome da consulta, o SQL, as linhas do EXPLAIN QUERY PLAN
+    (indentadas conforme a árvore do plano) e se alguma tabela é lida
+    inteira, sem índice.
+    """
+    conn.execute("ANALYZE")
+    conn.commit()
+    
+    planos = []
+    for nome, (sql, parametros) in CONSULTAS_FREQUENTES.items():
+        profundidade = {0: -1}
+        linhas = []
+        for id_no, id_pai, _, detalhe in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros):
+            profundidade[id_no] = profundidade.get(id_pai, -1) + 1
+            linhas.append("  " * profundidade[id_no] + detalhe)
+        
+        planos.append({
+            'consulta': nome,
+            'sql': sql,
+            'plano': linhas,
+            'varredura_completa': any(
+                linha.strip().startswith('SCAN') and 'USING' not in linha for linha in linhas
+            )
+        })
+    return planos
+
+# Tabelas de lançamentos lidas por delta (controle_alteracoes tem uma linha para cada)
+TABELAS_LANCAMENTOS = ('transacoes', 'receitas')
+
+def ler_marcas(conn):
+    """Marca d'água de cada tabela no banco
+    
+    Para os lançamentos, (maior id, versão de alterações); para
+    arquivos_processados, que é pequena e sofre INSERT OR REPLACE,
+    (maior id, total de linhas).
+    """
+    marcas = {}
+    for tabela in TABELAS_LANCAMENTOS:
+        marcas[tabela] = tuple(conn.execute(f'''
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM {tabela}),
+                   (SELECT versao FROM controle_alteracoes WHERE tabela = ?)
+        ''', (tabela,)).fetchone())
+    marcas['arquivos_processados'] = tuple(conn.execute(
+        "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM arquivos_processados"
+    ).fetchone())
+    return marcas
+
+def ler_lancamentos(conn, tabela, depois_de_id, ate_id):
+    """Linhas da tabela com id no intervalo (depois_de_id, ate_id], mais recentes primeiro"""
+    df = pd.read_sql_query(
+        f"SELECT * FROM {tabela} WHERE id > ? AND id <= ? ORDER BY data DESC",
+        conn,
+        params=(depois_de_id, ate_id)
+    )
+    if not df.empty:
+        df['data'] = pd.to_datetime(df['data']).dt.date
+    return df
+
+def chaves_ordem(df):
+    """Chave crescente equivalente a ORDER BY data DESC (datas vazias por último)"""
+    dias = pd.to_datetime(df['data'], errors='coerce').to_numpy().astype('datetime64[D]')
+    return np.where(np.isnat(dias), np.iinfo(np.int64).max, -dias.astype(np.int64))
+
+def intercalar_ordenado(frame, chaves, novos, chaves_novos):
+    """Insere as linhas novas nas suas posições de ``frame``, já ordenado por ``chaves``
+    
+    Só o delta é ordenado (O(d log d)); cada linha nova entra depois das
+    existentes com a mesma data, como na ordenação estável. A montagem do
+    resultado ainda copia o frame inteiro (concat + take, O(n) por delta),
+    mas sem reordená-lo. Retorna o DataFrame e as chaves resultantes.
+    """
+    ordem_novos = np.argsort(chaves_novos, kind='stable')
+    chaves_novos = chaves_novos[ordem_novos]
+    destino_novos = np.searchsorted(chaves, chaves_novos, side='right') + np.arange(len(chaves_novos))
+    
+    total = len(chaves) + len(chaves_novos)
+    existentes = np.ones(total, dtype=bool)
+    existentes[destino_novos] = False
+    origem = np.empty(total, dtype=np.int64)
+    origem[existentes] = np.arange(len(chaves))
+    origem[destino_novos] = len(chaves) + ordem_novos
+    chaves_juntas = np.empty(total, dtype=np.int64)
+    chaves_juntas[existentes] = chaves
+    chaves_juntas[destino_novos] = chaves_novos
+    
+    juntos = pd.concat([frame, novos], ignore_index=True).take(origem).reset_index(drop=True)
+    return juntos, chaves_juntas
+
+class CacheLancamentos:
+    """Cópia em memória das tabelas, atualizada a partir das marcas d'água
+    
+    Se só o maior id de uma tabela de lançamentos cresceu, lê apenas as
+    linhas novas e as intercala no DataFrame guardado, que segue ordenado
+    por data sem ser reordenado (mas é copiado a cada delta, ver
+    intercalar_ordenado); se a versão de alterações mudou (UPDATE ou
+    DELETE), relê a tabela inteira. Os limites de id vêm da marca lida no
+    início, então linhas inseridas durante a leitura ficam para a próxima
+    atualização em vez de se repetirem.
+    """
+    
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.invalidar()
+    
+    def invalidar(self):
+        """Descarta tudo: a próxima atualização relê as tabelas inteiras"""
+        self.frames = {}
+        self.chaves = {}
+        self.marcas = {}
+    
+    def atualizar(self, conn, tabelas=TABELAS_LANCAMENTOS):
+        """Sincroniza com o banco e retorna os DataFrames de ``tabelas`` e o de arquivos_processados
+        
+        Só as tabelas de lançamentos pedidas são lidas e guardadas (o
+        dashboard pede apenas receitas; as transações são consultadas no
+        banco). Os DataFrames são os do cache, sem cópia: quem os recebe não
+        deve alterá-los.
+        """
+        with self.trava:
+            marcas = ler_marcas(conn)
+            for tabela in tabelas:
+                maior_id, versao = marcas[tabela]
+                anterior = self.marcas.get(tabela)
+                if anterior is None or anterior[1] != versao or maior_id < anterior[0]:
+                    self.frames[tabela] = ler_lancamentos(conn, tabela, 0, maior_id)
+                    self.chaves[tabela] = chaves_ordem(self.frames[tabela])
+                elif maior_id > anterior[0]:
+                    novos = ler_lancamentos(conn, tabela, anterior[0], maior_id)
+                    if self.frames[tabela].empty:
+                        self.frames[tabela] = novos
+                        self.chaves[tabela] = chaves_ordem(novos)
+                    elif not novos.empty:
+                        self.frames[tabela], self.chaves[tabela] = intercalar_ordenado(
+                            self.frames[tabela], self.chaves[tabela], novos, chaves_ordem(novos)
+                        )
+                # Marca registrada tabela a tabela: se uma leitura seguinte falhar,
+                # o delta já juntado não é buscado de novo
+                self.marcas[tabela] = marcas[tabela]
+            
+            if self.marcas.get('arquivos_processados') != marcas['arquivos_processados']:
+                self.frames['arquivos_processados'] = pd.read_sql_query(
+                    "SELECT * FROM arquivos_processados ORDER BY data_processamento DESC",
+                    conn
+                )
+                self.marcas['arquivos_processados'] = marcas['arquivos_processados']
+            
+            return tuple(self.frames[tabela] for tabela in tuple(tabelas) + ('arquivos_processados',))
+
+def agregar_lancamentos(conn):
+    """Totais e agrupamentos do Dashboard e do Resultado Financeiro, calculados no SQLite
+    
+    Lê os resumos mensais (algumas centenas de linhas) em vez dos lançamentos,
+    então só os resultados agregados chegam ao pandas, qualquer que seja o
+    número de lançamentos no banco.
+    """
+    total, quantidade = conn.execute(
+        "SELECT COALESCE(SUM(total), 0), COALESCE(SUM(quantidade), 0) FROM resumo_mensal_transacoes"
+    ).fetchone()
+    receitas_por_tipo = dict(conn.execute('''
+        SELECT tipo_lancamento, SUM(total) FROM resumo_mensal_receitas
+        WHERE tipo_lancamento IN ('credito', 'debito')
+        GROUP BY tipo_lancamento
+    '''))
+    
+    return {
+        'total_gastos': total,
+        'quantidade_transacoes': quantidade,
+        'valor_medio': total / quantidade if quantidade else 0,
+        'total_creditos': receitas_por_tipo.get('credito', 0),
+        'total_debitos': receitas_por_tipo.get('debito', 0),
+        'gastos_categoria': pd.read_sql_query(
+            "SELECT categoria, SUM(total) AS valor FROM resumo_mensal_transacoes GROUP BY categoria ORDER BY categoria",
+            conn
+        ),
+        'gastos_cartao': pd.read_sql_query(
+            "SELECT cartao, SUM(total) AS valor FROM resumo_mensal_transacoes GROUP BY cartao ORDER BY cartao",
+            conn
+        ),
+        'gastos_mes_categoria': pd.read_sql_query('''
+            SELECT printf('%04d-%02d', ano_mes / 100, ano_mes % 100) AS mes, categoria, SUM(total) AS valor
+            FROM resumo_mensal_transacoes
+            GROUP BY ano_mes, categoria
+            ORDER BY ano_mes, categoria
+        ''', conn)
+    }
+
+# Resumos mensais materializados: tabela de resumo -> (tabela de origem, colunas
+# de agrupamento além de ano_mes). Mantidos por triggers a cada INSERT, UPDATE
+# e DELETE na origem; NULL nas colunas de agrupamento vira ''
+RESUMOS_MENSAIS = {
+    'resumo_mensal_transacoes': ('transacoes', ('categoria', 'cartao')),
+    'resumo_mensal_receitas': ('receitas', ('codigo', 'tipo_lancamento', 'categoria'))
+}
+
+def expressao_ano_mes(linha):
+    """SQL do mês de uma linha como inteiro AAAAMM (0 se a data for inválida)"""
+    return f"COALESCE(CAST(strftime('%Y%m', {linha}.data) AS INTEGER), 0)"
+
+def preencher_ano_mes(conn):
+    """Migração: calcula ano_mes das linhas gravadas antes da coluna existir"""
+    for tabela in TABELAS_LANCAMENTOS:
+        conn.execute(f"UPDATE {tabela} SET ano_mes = {expressao_ano_mes(tabela)} WHERE ano_mes IS NULL")
+
+def consultar_lancamentos_mes(conn, tabela, ano_mes_inicio, ano_mes_fim):
+    """Lançamentos entre dois meses AAAAMM (inclusive), filtrados pelo índice de ano_mes"""
+    df = pd.read_sql_query(
+        f"SELECT * FROM {tabela} WHERE ano_mes BETWEEN ? AND ? ORDER BY data DESC",
+        conn,
+        params=(ano_mes_inicio, ano_mes_fim)
+    )
+    if not df.empty:
+        df['data'] = pd.to_datetime(df['data']).dt.date
+    return df
+
+def formatar_ano_mes(ano_mes):
+    """202503 -> '2025-03'"""
+    return f"{ano_mes // 100:04d}-{ano_mes % 100:02d}"
+
+def sql_somar_resumo(resumo, chaves, linha):
+    """Soma a linha (NEW) ao resumo do seu mês, criando o grupo se preciso"""
+    colunas = ', '.join(chaves)
+    valores = ', '.join(f"COALESCE({linha}.{chave}, '')" for chave in chaves)
+    return f'''
+        INSERT INTO {resumo} (ano_mes, {colunas}, total, quantidade)
+        VALUES ({expressao_ano_mes(linha)}, {valores}, {linha}.valor, 1)
+        ON CONFLICT (ano_mes, {colunas}) DO UPDATE SET
+            total = total + excluded.total,
+            quantidade = quantidade + 1;
+    '''
+
+def sql_subtrair_resumo(resumo, chaves, linha):
+    """Retira a linha (OLD) do resumo do seu mês, apagando o grupo que ficar vazio"""
+    filtro = ' AND '.join(
+        [f"ano_mes = {expressao_ano_mes(linha)}"]
+        + [f"{chave} = COALESCE({linha}.{chave}, '')" for chave in chaves]
+    )
+    return f'''
+        UPDATE {resumo} SET total = total - {linha}.valor, quantidade = quantidade - 1
+        WHERE {filtro};
+        DELETE FROM {resumo} WHERE {filtro} AND quantidade <= 0;
+    '''
+
+def criar_resumos_mensais(conn):
+    """Cria as tabelas de resumo mensal e seus triggers; preenche as recém-criadas"""
+    existentes = {
+        nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    for resumo, (origem, chaves) in RESUMOS_MENSAIS.items():
+        definicao_chaves = ', '.join(f"{chave} TEXT NOT NULL" for chave in chaves)
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {resumo} (
+                ano_mes INTEGER NOT NULL,
+                {definicao_chaves},
+                total REAL NOT NULL,
+                quantidade INTEGER NOT NULL,
+                PRIMARY KEY (ano_mes, {', '.join(chaves)})
+            )
+        ''')
+        corpos = {
+            'insert': sql_somar_resumo(resumo, chaves, 'NEW'),
+            'delete': sql_subtrair_resumo(resumo, chaves, 'OLD'),
+            'update': sql_subtrair_resumo(resumo, chaves, 'OLD') + sql_somar_resumo(resumo, chaves, 'NEW')
+        }
+        for evento, corpo in corpos.items():
+            gatilho = evento.upper()
+            if evento == 'update':
+                gatilho += f" OF data, valor, {', '.join(chaves)}"
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {origem}_{evento}_resumo
+                AFTER {gatilho} ON {origem}
+                BEGIN
+                    {corpo}
+                END
+            ''')
+        if resumo not in existentes:
+            reconstruir_resumo(conn, resumo)
+
+def reconstruir_resumo(conn, resumo):
+    """Recalcula um resumo mensal inteiro a partir da tabela de origem"""
+    origem, chaves = RESUMOS_MENSAIS[resumo]
+    colunas = ', '.join(chaves)
+    valores = ', '.join(f"COALESCE({chave}, '')" for chave in chaves)
+    conn.execute(f"DELETE FROM {resumo}")
+    conn.execute(f'''
+        INSERT INTO {resumo} (ano_mes, {colunas}, total, quantidade)
+        SELECT {expressao_ano_mes(origem)}, {valores}, SUM(valor), COUNT(*)
+        FROM {origem}
+        GROUP BY 1, {', '.join(str(posicao) for posicao in range(2, len(chaves) + 2))}
+    ''')
+
+def reconstruir_resumos_mensais(conn):
+    """Recalcula todos os resumos mensais em uma transação; retorna as linhas de cada um"""
+    with conn:
+        for resumo in RESUMOS_MENSAIS:
+            reconstruir_resumo(conn, resumo)
+    return {
+        resumo: conn.execute(f"SELECT COUNT(*) FROM {resumo}").fetchone()[0]
+        for resumo in RESUMOS_MENSAIS
+    }
+
+def listar_meses_receitas(conn):
+    """Meses (AAAAMM) com receitas ou descontos, do mais recente ao mais antigo"""
+    return [
+        ano_mes for (ano_mes,) in conn.execute(
+            "SELECT DISTINCT ano_mes FROM resumo_mensal_receitas WHERE ano_mes > 0 ORDER BY ano_mes DESC"
+        )
+    ]
+
+def totais_receitas_por_rubrica(conn, ano_mes_inicio, ano_mes_fim):
+    """Total por código, categoria e tipo de lançamento entre dois meses (inclusive), lido do resumo"""
+    return pd.read_sql_query('''
+        SELECT codigo, categoria, tipo_lancamento, SUM(total) AS valor
+        FROM resumo_mensal_receitas
+        WHERE ano_mes BETWEEN ? AND ?
+        GROUP BY codigo, categoria, tipo_lancamento
+        ORDER BY valor DESC
+    ''', conn, params=(ano_mes_inicio, ano_mes_fim))
+
+# Índices de texto completo (FTS5, conteúdo externo): tabela de busca ->
+# (tabela de origem, coluna indexada). Sem acentos nem maiúsculas na comparação
+BUSCAS_TEXTO = {
+    'busca_transacoes': ('transacoes', 'estabelecimento'),
+    'busca_receitas': ('receitas', 'descricao')
+}
+
+def criar_buscas_texto(conn):
+    """Cria os índices FTS5 e os triggers que os mantêm em dia; preenche os recém-criados
+    
+    Retorna False se o SQLite não tiver FTS5; a busca então usa LIKE.
+    """
+    existentes = {
+        nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    for busca, (origem, coluna) in BUSCAS_TEXTO.items():
+        try:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {busca} USING fts5(
+                    {coluna}, content='{origem}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            return False
+        inserir = f"INSERT INTO {busca} (rowid, {coluna}) VALUES (NEW.id, NEW.{coluna});"
+        remover = f"INSERT INTO {busca} ({busca}, rowid, {coluna}) VALUES ('delete', OLD.id, OLD.{coluna});"
+        for evento, corpo in (('INSERT', inserir), ('DELETE', remover), (f'UPDATE OF {coluna}', remover + inserir)):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {origem}_{evento.split()[0].lower()}_busca
+                AFTER {evento} ON {origem}
+                BEGIN
+                    {corpo}
+                END
+            ''')
+        if busca not in existentes:
+            conn.execute(f"INSERT INTO {busca} ({busca}) VALUES ('rebuild')")
+    return True
+
+def expressao_busca(conn, busca, texto):
+    """Expressão MATCH do FTS5 para o texto digitado (None se não houver palavras)
+    
+    Cada palavra vira um prefixo entre aspas ("pala"*), o que também anula a
+    sintaxe do FTS5 no texto do usuário. Exige todas as palavras; se nenhuma
+    linha tiver todas, aceita qualquer uma delas.
+    """
+    termos = [f'"{termo}"*' for termo in re.findall(r'\w+', texto)]
+    if not termos:
+        return None
+    todas = ' '.join(termos)
+    if len(termos) == 1 or conn.execute(
+        f"SELECT 1 FROM {busca} WHERE {busca} MATCH ? LIMIT 1", (todas,)
+    ).fetchone():
+        return todas
+    return ' OR '.join(termos)
+
+def condicao_busca(conn, tabela, texto):
+    """Origem (FROM), condição, parâmetro e ordenação que restringem a tabela à busca de texto
+    
+    Com FTS5, percorre o índice de busca e ordena por relevância (bm25); o
+    CROSS JOIN fixa o índice como laço externo, senão o SQLite pode preferir
+    um índice da tabela e rodar o MATCH uma vez por linha. Sem FTS5, usa
+    LIKE na coluna e mantém a ordem por data. None se não houver palavras
+    no texto.
+    """
+    busca = next(nome for nome, (origem, _) in BUSCAS_TEXTO.items() if origem == tabela)
+    coluna = BUSCAS_TEXTO[busca][1]
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (busca,)).fetchone():
+        expressao = expressao_busca(conn, busca, texto)
+        if expressao is None:
+            return None
+        origem = f"{busca} CROSS JOIN {tabela} ON {tabela}.id = {busca}.rowid"
+        return origem, f"{busca} MATCH ?", expressao, f"{busca}.rank, "
+    if not texto.strip():
+        return None
+    return tabela, f"{tabela}.{coluna} LIKE ?", f"%{texto.strip()}%", ""
+
+def buscar_lancamentos(conn, tabela, texto, limite=500):
+    """ids dos lançamentos que casam com a busca, do mais relevante ao menos"""
+    busca = condicao_busca(conn, tabela, texto)
+    if busca is None:
+        return []
+    origem, condicao, parametro, ordem = busca
+    return [
+        id_lancamento for (id_lancamento,) in conn.execute(f'''
+            SELECT {tabela}.id FROM {origem}
+            WHERE {condicao}
+            ORDER BY {ordem}{tabela}.data DESC
+            LIMIT ?
+        ''', (parametro, limite))
+    ]
+
+def filtro_lancamentos(igualdades, valor_minimo=0, busca=None):
+    """Cláusula WHERE e parâmetros para filtros coluna = valor (None ignora), valor mínimo e busca
+    
+    ``busca`` é o retorno de condicao_busca; a origem e a ordenação dele
+    ficam por conta de quem monta a consulta.
+    """
+    condicoes = []
+    parametros = []
+    if busca is not None:
+        condicoes.append(busca[1])
+        parametros.append(busca[2])
+    for coluna, valor in igualdades.items():
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?")
+            parametros.append(valor)
+    if valor_minimo:
+        condicoes.append("valor >= ?")
+        parametros.append(valor_minimo)
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+def opcoes_filtro_transacoes(conn):
+    """Categorias e cartões existentes, lidos do resumo mensal"""
+    return tuple(
+        [valor for (valor,) in conn.execute(
+            f"SELECT DISTINCT {coluna} FROM resumo_mensal_transacoes ORDER BY {coluna}"
+        )]
+        for coluna in ('categoria', 'cartao')
+    )
+
+def totais_transacoes(conn, categoria=None, cartao=None, valor_minimo=0, texto_busca=None):
+    """(quantidade, total) das transações filtradas
+    
+    Sem valor mínimo nem busca, soma o resumo mensal em vez de percorrer a tabela.
+    """
+    busca = condicao_busca(conn, 'transacoes', texto_busca) if texto_busca else None
+    if valor_minimo or busca is not None:
+        filtro, parametros = filtro_lancamentos({'categoria': categoria, 'cartao': cartao}, valor_minimo, busca)
+        origem = busca[0] if busca is not None else "transacoes"
+        sql = f"SELECT COUNT(*), COALESCE(SUM(valor), 0) FROM {origem}{filtro}"
+    else:
+        filtro, parametros = filtro_lancamentos({'categoria': categoria, 'cartao': cartao})
+        sql = f"SELECT COALESCE(SUM(quantidade), 0), COALESCE(SUM(total), 0) FROM resumo_mensal_transacoes{filtro}"
+    return tuple(conn.execute(sql, parametros).fetchone())
+
+def pagina_transacoes(conn, pagina, tamanho_pagina, categoria=None, cartao=None, valor_minimo=0, texto_busca=None):
+    """Uma página (a partir de 1) das transações filtradas, mais recentes primeiro
+    
+    Com busca de texto, as mais relevantes vêm primeiro. A ordem inclui o id
+    para que as páginas não se sobreponham quando várias transações têm a
+    mesma data.
+    """
+    busca = condicao_busca(conn, 'transacoes', texto_busca) if texto_busca else None
+    filtro, parametros = filtro_lancamentos({'categoria': categoria, 'cartao': cartao}, valor_minimo, busca)
+    origem, ordem = (busca[0], busca[3]) if busca is not None else ("transacoes", "")
+    df = pd.read_sql_query(
+        f'''
+            SELECT transacoes.data, transacoes.estabelecimento, categoria, valor, cartao
+            FROM {origem}{filtro}
+            ORDER BY {ordem}transacoes.data DESC, transacoes.id DESC
+            LIMIT ? OFFSET ?
+        ''',
+        conn,
+        params=parametros + [tamanho_pagina, (pagina - 1) * tamanho_pagina]
+    )
+    if not df.empty:
+        df['data'] = pd.to_datetime(df['data']).dt.date
+    return df
+
+def ler_regras_categoria(conn, versao=None):
+    """Regras e overrides de categorização no formato de ``configurar_regras``
+    
+    Sem ``versao``, usa a registrada em controle_regras.
+    """
+    if versao is None:
+        versao = conn.execute("SELECT versao FROM controle_regras WHERE id = 1").fetchone()[0]
+    regras = conn.execute(
+        "SELECT tipo, palavra_chave, categoria, prioridade FROM regras_categoria ORDER BY prioridade, id"
+    ).fetchall()
+    overrides = conn.execute("SELECT estabelecimento, categoria FROM overrides_categoria").fetchall()
+    
+    return {
+        'versao': versao,
+        'regras': [tuple(regra) for regra in regras],
+        'overrides': dict(overrides)
+    }
+
+def criar_esquema(conn):
+    """Cria ou atualiza tabelas, triggers, índices, resumos e buscas do banco
+    
+    Idempotente: roda a cada início da interface e do importador em lote, e
+    assim bancos já existentes recebem o que foi adicionado depois. Quem
+    chama faz o commit.
+    """
+    cursor = conn.cursor()
+    
+    # Tabela de transações (despesas)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data DATE NOT NULL,
+            estabelecimento TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            valor REAL NOT NULL,
+            cartao TEXT NOT NULL,
+            arquivo_origem TEXT NOT NULL,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ano_mes INTEGER,
+            hash_conteudo TEXT
+        )
+    ''')
+    
+    # Tabela de receitas (agora com código para controle)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS receitas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data DATE NOT NULL,
+            descricao TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            valor REAL NOT NULL,
+            fonte TEXT NOT NULL,
+            codigo TEXT,
+            tipo_lancamento TEXT DEFAULT 'credito',
+            arquivo_origem TEXT NOT NULL,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ano_mes INTEGER,
+            hash_conteudo TEXT
+        )
+    ''')
+    
+    # Tabela de arquivos processados
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS arquivos_processados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_arquivo TEXT UNIQUE NOT NULL,
+            hash_arquivo TEXT NOT NULL,
+            tipo_arquivo TEXT NOT NULL,
+            data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total_transacoes INTEGER DEFAULT 0
+        )
+    ''')
+    
+    # Regras de categorização editáveis (palavra-chave -> categoria, menor prioridade vence)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS regras_categoria (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            palavra_chave TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            prioridade INTEGER NOT NULL DEFAULT 100
+        )
+    ''')
+    
+    # Categoria fixa para um estabelecimento exato (nome normalizado)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS overrides_categoria (
+            estabelecimento TEXT PRIMARY KEY,
+            categoria TEXT NOT NULL
+        )
+    ''')
+    
+    # Versão das regras, incrementada por triggers a cada alteração
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS controle_regras (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    ''')
+    for tabela in ('regras_categoria', 'overrides_categoria'):
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tabela}_{evento.lower()}_versao
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE controle_regras SET versao = versao + 1;
+                END
+            ''')
+    
+    # Na primeira vez, popular as regras com as palavras-chave embutidas
+    if cursor.execute("SELECT 1 FROM controle_regras").fetchone() is None:
+        cursor.execute("INSERT INTO controle_regras (id, versao) VALUES (1, 0)")
+        cursor.executemany(
+            "INSERT INTO regras_categoria (tipo, palavra_chave, categoria, prioridade) VALUES (?, ?, ?, ?)",
+            regras_padrao_categoria()
+        )
+    
+    # Versão de alterações dos lançamentos: inserções só aumentam o maior id,
+    # já UPDATE e DELETE incrementam a versão e forçam a releitura da tabela
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS controle_alteracoes (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        )
+    ''')
+    for tabela in TABELAS_LANCAMENTOS:
+        cursor.execute(
+            "INSERT OR IGNORE INTO controle_alteracoes (tabela, versao) VALUES (?, 0)",
+            (tabela,)
+        )
+        for evento in ('UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tabela}_{evento.lower()}_alteracoes
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE controle_alteracoes SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            ''')
+    
+    # Adicionar colunas se não existirem (para compatibilidade)
+    try:
+        cursor.execute("ALTER TABLE receitas ADD COLUMN codigo TEXT")
+    except:
+        pass
+    try:
+        cursor.execute("ALTER TABLE receitas ADD COLUMN tipo_lancamento TEXT DEFAULT 'credito'")
+    except:
+        pass
+    for tabela in TABELAS_LANCAMENTOS:
+        try:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN ano_mes INTEGER")
+        except:
+            pass
+        try:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN hash_conteudo TEXT")
+        except:
+            pass
+    
+    # Mês (AAAAMM) das linhas gravadas antes da coluna ano_mes
+    preencher_ano_mes(conn)
+    
+    # Índices secundários (criados só se ainda não existirem)
+    criar_indices(conn)
+    
+    # Hash de conteúdo das linhas antigas, já com o índice único ativo
+    preencher_hash_conteudo(conn)
+    
+    # Resumos mensais mantidos por triggers (preenchidos ao serem criados)
+    criar_resumos_mensais(conn)
+    
+    # Busca de texto (FTS5) em estabelecimentos e descrições; sem FTS5, a busca usa LIKE
+    criar_buscas_texto(conn)
+    
+    # Fila de revisão de transações quase duplicadas (entre arquivos diferentes)
+    criar_fila_revisao(conn)
@@ -0,0 +1,144 @@
+"""Vazão e cobertura dos parsers de fatura e contracheque sobre o corpus sintético.
+
+Uso:
+    python benchmark_parsers.py --transacoes 2000 --meses 24 --repeticoes 3
+    python benchmark_parsers.py --pdf
+
+Para cada layout do corpus_sintetico mede linhas/s e páginas/s da
+interpretação do texto (o trabalho de processar_pdf_fatura e
+processar_pdf_contracheque depois da extração) e compara o resultado com o
+gabarito: cobertura (lançamentos do gabarito encontrados), precisão
+(lançamentos extraídos que estão no gabarito) e o cartão detectado. Com
+--pdf, mede também processar_pdf_fatura e processar_pdf_contracheque sobre
+os PDFs gerados, com o cache de texto vazio a cada repetição (requer o
+reportlab); o cache fica em uma pasta temporária, sem tocar no da aplicação.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from corpus_sintetico import LAYOUTS_FATURA, LINHAS_POR_PAGINA, gerar_contracheque, gerar_fatura, gerar_pdf
+from processamento_pdf import (
+    detectar_cartao, interpretar_paginas_contracheque, iterar_transacoes_fatura, limpar_cache_texto,
+    normalizar_estabelecimento, processar_pdf_contracheque, processar_pdf_fatura
+)
+
+def centavos(valor):
+    return int(round(valor * 100))
+
+def chave_fatura(transacao):
+    """Data, valor em centavos e nome normalizado (o parser corta o nome em 50 caracteres)"""
+    return (str(transacao['data']), centavos(transacao['valor']), normalizar_estabelecimento(transacao['estabelecimento'])[:50])
+
+def chave_contracheque(receita):
+    return (receita['codigo'], str(receita['data']), centavos(receita['valor']), receita['tipo_lancamento'])
+
+def comparar(extraidos, gabarito, chave):
+    """(cobertura, precisão) dos extraídos em relação ao gabarito"""
+    esperadas = {chave(item) for item in gabarito}
+    encontradas = [chave(item) for item in extraidos]
+    acertos = esperadas.intersection(encontradas)
+    cobertura = len(acertos) / len(esperadas) if esperadas else 1.0
+    precisao = sum(1 for item in encontradas if item in esperadas) / len(encontradas) if encontradas else 0.0
+    return cobertura, precisao
+
+def medir(funcao, repeticoes, preparar=None):
+    """Menor tempo entre as repetições e o resultado da última"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+def linha_relatorio(alvo, documento, paginas, segundos, cobertura, precisao, observacao=""):
+    linhas = sum(pagina.count('\n') + 1 for pagina in paginas)
+    return {
+        'alvo': alvo, 'documento': documento, 'paginas': len(paginas), 'linhas': linhas,
+        'segundos': segundos, 'linhas_s': linhas / segundos if segundos else float('inf'),
+        'paginas_s': len(paginas) / segundos if segundos else float('inf'),
+        'cobertura': cobertura, 'precisao': precisao, 'observacao': observacao
+    }
+
+def avaliar_faturas(layouts, transacoes, linhas_por_pagina, repeticoes, semente, pdf):
+    relatorio = []
+    for layout in layouts:
+        paginas, gabarito = gerar_fatura(layout, transacoes, linhas_por_pagina, semente)
+        nome_arquivo = f"fatura_{layout}.pdf"
+        cartao_esperado = LAYOUTS_FATURA[layout]['cartao']
+        cartao = detectar_cartao(nome_arquivo, paginas[0])
+        observacao = "cartão ok" if cartao == cartao_esperado else f"cartão {cartao} (esperado {cartao_esperado})"
+        
+        segundos, extraidas = medir(lambda: list(iterar_transacoes_fatura(paginas, nome_arquivo, [])), repeticoes)
+        relatorio.append(linha_relatorio('texto fatura', layout, paginas, segundos, *comparar(extraidas, gabarito, chave_fatura), observacao))
+        
+        if pdf:
+            file_bytes = gerar_pdf(paginas)
+            segundos, extraidas = medir(lambda: processar_pdf_fatura(file_bytes, nome_arquivo), repeticoes, limpar_cache_texto)
+            relatorio.append(linha_relatorio('processar_pdf_fatura', layout, paginas, segundos, *comparar(extraidas, gabarito, chave_fatura)))
+    return relatorio
+
+def avaliar_contracheque(meses, itens, linhas_por_pagina, repeticoes, semente, pdf):
+    relatorio = []
+    paginas, gabarito = gerar_contracheque(meses, itens, linhas_por_pagina, semente)
+    nome_arquivo = "contracheque_caixa.pdf"
+    
+    segundos, (receitas, _) = medir(lambda: interpretar_paginas_contracheque(paginas, nome_arquivo, []), repeticoes)
+    relatorio.append(linha_relatorio('texto contracheque', 'caixa', paginas, segundos, *comparar(receitas, gabarito, chave_contracheque)))
+    
+    if pdf:
+        file_bytes = gerar_pdf(paginas)
+        segundos, (receitas, _) = medir(lambda: processar_pdf_contracheque(file_bytes, nome_arquivo), repeticoes, limpar_cache_texto)
+        relatorio.append(linha_relatorio('processar_pdf_contracheque', 'caixa', paginas, segundos, *comparar(receitas, gabarito, chave_contracheque)))
+    return relatorio
+
+def imprimir_relatorio(relatorio):
+    cabecalho = f"{'alvo':<27} {'documento':<10} {'págs':>5} {'linhas':>7} {'tempo (s)':>9} {'linhas/s':>10} {'págs/s':>8} {'cobertura':>9} {'precisão':>8}  observação"
+    print(cabecalho)
+    print('-' * len(cabecalho))
+    for item in relatorio:
+        print(
+            f"{item['alvo']:<27} {item['documento']:<10} {item['paginas']:>5} {item['linhas']:>7} "
+            f"{item['segundos']:>9.4f} {item['linhas_s']:>10,.0f} {item['paginas_s']:>8,.1f} "
+            f"{item['cobertura']:>9.1%} {item['precisao']:>8.1%}  {item['observacao']}"
+        )
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mede vazão e cobertura dos parsers de fatura e contracheque.")
+    parser.add_argument('--transacoes', type=int, default=2000, help="transações por fatura (padrão: 2000)")
+    parser.add_argument('--meses', type=int, default=24, help="meses no contracheque (padrão: 24)")
+    parser.add_argument('--itens', type=int, default=12, help="rubricas por mês no contracheque (padrão: 12)")
+    parser.add_argument('--linhas-por-pagina', type=int, default=LINHAS_POR_PAGINA, help=f"lançamentos por página (padrão: {LINHAS_POR_PAGINA})")
+    parser.add_argument('--layouts', nargs='+', choices=list(LAYOUTS_FATURA), default=list(LAYOUTS_FATURA), help="layouts de fatura")
+    parser.add_argument('--repeticoes', type=int, default=3, help="repetições por medida; vale a mais rápida (padrão: 3)")
+    parser.add_argument('--pdf', action='store_true', help="medir também a partir dos PDFs (requer reportlab)")
+    parser.add_argument('--semente', type=int, default=42, help="semente do gerador (padrão: 42)")
+    args = parser.parse_args(argumentos)
+    
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        # O cache de texto dos PDFs (caminho relativo) fica na pasta temporária
+        os.chdir(pasta_temporaria)
+        try:
+            relatorio = avaliar_faturas(
+                args.layouts, args.transacoes, args.linhas_por_pagina, args.repeticoes, args.semente, args.pdf
+            )
+            relatorio += avaliar_contracheque(
+                args.meses, args.itens, args.linhas_por_pagina, args.repeticoes, args.semente, args.pdf
+            )
+        except (RuntimeError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        finally:
+            os.chdir(diretorio_original)
+    
+    imprimir_relatorio(relatorio)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Gerador de faturas e contracheques sintéticos, com o gabarito dos lançamentos.
+
+Produz o texto (e, opcionalmente, o PDF) de cada layout que os padrões do
+processamento_pdf procuram: Azul, Santander, Samsung, Caixa Elo e Caixa
+Visa, os formatos genéricos separados por | e por tabulação, e contracheques
+com os códigos de CODIGOS_CREDITO e rubricas de desconto. Cada documento vem
+com a lista dos lançamentos que ele contém, usada pelo benchmark_parsers para
+medir a cobertura da extração.
+
+Uso:
+    python corpus_sintetico.py PASTA --transacoes 500 --meses 12 --pdf
+
+Grava, para cada layout, o texto (páginas separadas por \\f), o gabarito em
+JSON e, com --pdf, o PDF. A geração é determinística para uma mesma --semente.
+"""
+import argparse
+import io
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from processamento_pdf import CODIGOS_CREDITO
+
+# Partes dos nomes de estabelecimento, combinadas ao acaso (só caracteres aceitos pelos padrões de fatura)
+NOMES_ESTABELECIMENTO = [
+    'SUPERMERCADO EXTRA', 'PADARIA REAL', 'ATACADAO', 'CARREFOUR', 'HORTIFRUTI',
+    'RESTAURANTE SABOR', 'IFOOD *RESTAURANTE', 'MCDONALDS', 'PIZZA HUT', 'CAFE DO PONTO',
+    'UBER *TRIP', '99 *POP', 'POSTO SHELL', 'POSTO IPIRANGA', 'ESTACIONAMENTO CENTRAL',
+    'NETFLIX.COM', 'SPOTIFY', 'CINEMARK', 'AMAZON MKTPLACE', 'MERCADO LIVRE',
+    'DROGASIL', 'DROGARIA PACHECO', 'LABORATORIO DASA', 'LOJAS RENNER', 'C&A MODAS',
+    'CASAS BAHIA', 'MAGAZINE LUIZA', 'LEROY MERLIN', 'CLARO FIXO', 'VIVO MOVEL',
+    'PAG*JOSEDASILVA', 'PG *LOJA VIRTUAL', 'EBN *STEAM', 'HOTEL IBIS', 'LIVRARIA CULTURA'
+]
+COMPLEMENTOS_ESTABELECIMENTO = ['', '', '', ' CENTRO', ' SAO PAULO', ' RJ', ' BH', ' LTDA', ' 0423', ' 12']
+
+# Layouts de fatura: cabeçalho, cartão esperado de detectar_cartao e formato de cada linha
+LAYOUTS_FATURA = {
+    'azul': {
+        'cabecalho': ['FATURA DO CARTAO AZUL ITAUCARD', 'DATA ESTABELECIMENTO VALOR EM R$ VALOR EM US$'],
+        'cartao': 'Azul',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m} {lancamento['estabelecimento']} {valor} 0,00"
+    },
+    'santander': {
+        'cabecalho': ['SANTANDER SX MASTER', 'DATA COMPRA DATA LANCAMENTO DESCRICAO VALOR'],
+        'cartao': 'Santander',
+        'linha': lambda lancamento, valor: (
+            f"{lancamento['data']:%d/%m/%Y} {lancamento['data'] + timedelta(days=lancamento['dias_lancamento']):%d/%m/%Y} "
+            f"{lancamento['estabelecimento']} {valor}"
+        )
+    },
+    'samsung': {
+        'cabecalho': ['SAMSUNG ITAUCARD', 'LANCAMENTOS NACIONAIS'],
+        'cartao': 'Samsung',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m} {lancamento['estabelecimento']} {valor}"
+    },
+    'caixa_elo': {
+        'cabecalho': ['CAIXA ECONOMICA FEDERAL', 'CARTAO DE CREDITO ELO MAIS'],
+        'cartao': 'Caixa Elo',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m/%Y} {lancamento['estabelecimento']} R$ {valor}"
+    },
+    'caixa_visa': {
+        'cabecalho': ['CAIXA ECONOMICA FEDERAL', 'CARTAO DE CREDITO VISA GOLD'],
+        'cartao': 'Caixa Visa',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m/%Y}  {lancamento['estabelecimento']}  {valor}"
+    },
+    'barras': {
+        'cabecalho': ['EXTRATO DO CARTAO', 'DATA | DESCRICAO | VALOR'],
+        'cartao': 'Cartão',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m/%Y} | {lancamento['estabelecimento']} | R$ {valor}"
+    },
+    'tabulacao': {
+        'cabecalho': ['EXTRATO DO CARTAO', 'DATA\tDESCRICAO\tVALOR'],
+        'cartao': 'Cartão',
+        'linha': lambda lancamento, valor: f"{lancamento['data']:%d/%m/%y}\t{lancamento['estabelecimento']}\t{valor}"
+    }
+}
+
+# Rubricas de contracheque: os créditos são os de CODIGOS_CREDITO, os demais códigos são descontos
+DESCRICOES_CREDITO = {
+    '2002': 'SALARIO PADRAO', '2007': 'ADICIONAL TEMPO SERVICO', '2043': 'INCORPORACAO FUNCAO',
+    '2045': 'FERIAS', '2049': 'DECISAO JUDICIAL', '2116': 'REMUNERACAO COMPLEMENTAR',
+    '2186': 'ADICIONAL FERIAS', '21100': 'SALARIO RETROATIVO'
+}
+RUBRICAS_DEBITO = {
+    '4313': 'INSS', '31143': 'IMPOSTO DE RENDA', '4460': 'FUNCEF CONTRIBUICAO', '4501': 'SINDICATO',
+    '4720': 'PLANO DE SAUDE', '4801': 'EMPRESTIMO CONSIGNADO', '4905': 'GYMPASS CONVENIO', '4950': 'ASSOCIACAO'
+}
+
+# Lançamentos por página nos documentos gerados
+LINHAS_POR_PAGINA = 40
+
+def formatar_valor(valor):
+    """1234.5 -> '1.234,50'"""
+    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def sortear_valor(rng, mediana=80.0, maximo=9999.99):
+    """Valor com distribuição log-normal (muitos pequenos, alguns acima de mil)"""
+    return round(min(maximo, max(1.0, rng.lognormvariate(0, 1.1) * mediana)), 2)
+
+def paginar(cabecalho, linhas, linhas_por_pagina, rodape=None):
+    """Divide as linhas em páginas, repetindo o cabeçalho e numerando cada uma"""
+    blocos = [linhas[i:i + linhas_por_pagina] for i in range(0, len(linhas), linhas_por_pagina)] or [[]]
+    paginas = []
+    for numero, bloco in enumerate(blocos, start=1):
+        texto = cabecalho + bloco + [f"Pagina {numero} de {len(blocos)}"]
+        if rodape and numero == len(blocos):
+            texto += rodape
+        paginas.append("\n".join(texto))
+    return paginas
+
+def gerar_fatura(layout, total_transacoes, linhas_por_pagina=LINHAS_POR_PAGINA, semente=None):
+    """Texto das páginas de uma fatura e o gabarito das transações
+    
+    As datas cobrem os 360 dias anteriores ao vencimento (hoje), impresso no
+    cabeçalho: é por ele que o parser completa o ano das datas DD/MM, inclusive
+    na virada do ano. Retorna (paginas, gabarito), com o gabarito como lista de
+    {'data', 'estabelecimento', 'valor'}.
+    """
+    formato = LAYOUTS_FATURA[layout]
+    rng = random.Random(semente)
+    hoje = date.today()
+    dias_periodo = 360
+    inicio = hoje - timedelta(days=dias_periodo)
+    
+    gabarito = []
+    linhas = []
+    vistos = set()
+    while len(gabarito) < total_transacoes:
+        lancamento = {
+            'data': inicio + timedelta(days=rng.randrange(dias_periodo)),
+            'estabelecimento': rng.choice(NOMES_ESTABELECIMENTO) + rng.choice(COMPLEMENTOS_ESTABELECIMENTO),
+            'valor': sortear_valor(rng),
+            'dias_lancamento': rng.choice((0, 0, 0, 1, 2))
+        }
+        # Lançamentos idênticos são removidos pelo parser; o gabarito também não os repete
+        chave = (lancamento['data'], lancamento['estabelecimento'], lancamento['valor'])
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        linhas.append(formato['linha'](lancamento, formatar_valor(lancamento['valor'])))
+        gabarito.append({chave_campo: lancamento[chave_campo] for chave_campo in ('data', 'estabelecimento', 'valor')})
+    
+    ordem = sorted(range(len(linhas)), key=lambda i: gabarito[i]['data'])
+    total = sum(item['valor'] for item in gabarito)
+    cabecalho = formato['cabecalho'] + [f"VENCIMENTO {hoje:%d/%m/%Y}"]
+    rodape = [f"TOTAL DA FATURA R$ {formatar_valor(total)}"]
+    paginas = paginar(cabecalho, [linhas[i] for i in ordem], linhas_por_pagina, rodape)
+    return paginas, [gabarito[i] for i in ordem]
+
+def meses_anteriores(quantidade):
+    """(ano, mês) dos ``quantidade`` meses anteriores ao atual, do mais antigo ao mais recente"""
+    hoje = date.today()
+    indice_atual = hoje.year * 12 + hoje.month - 1
+    meses = [divmod(indice_atual - deslocamento, 12) for deslocamento in range(quantidade, 0, -1)]
+    meses = [(ano, mes + 1) for ano, mes in meses]
+    if meses and meses[0][0] < 2020:
+        raise ValueError("O parser só aceita contracheques a partir de 2020; use menos meses")
+    return meses
+
+def gerar_contracheque(meses=1, itens_por_mes=12, linhas_por_pagina=LINHAS_POR_PAGINA, semente=None):
+    """Texto de um contracheque (um demonstrativo por mês) e o gabarito das rubricas
+    
+    Salário, INSS e imposto de renda aparecem todo mês; as demais rubricas
+    são sorteadas, repetindo códigos (com a descrição diferenciada) quando
+    ``itens_por_mes`` passa do número de rubricas conhecidas. Retorna
+    (paginas, gabarito), com o gabarito como lista de {'codigo',
+    'descricao', 'data', 'valor', 'tipo_lancamento'}.
+    """
+    rng = random.Random(semente)
+    creditos = [codigo for codigo in CODIGOS_CREDITO if codigo != '2002']
+    debitos = [codigo for codigo in RUBRICAS_DEBITO if codigo not in ('4313', '31143')]
+    
+    paginas = []
+    gabarito = []
+    for ano, mes in meses_anteriores(meses):
+        codigos = ['2002', '4313', '31143'] + rng.sample(creditos + debitos, len(creditos + debitos))
+        ocorrencias = {}
+        linhas = []
+        for posicao in range(itens_por_mes):
+            codigo = codigos[posicao % len(codigos)]
+            repeticao = ocorrencias.get(codigo, 0)
+            ocorrencias[codigo] = repeticao + 1
+            tipo_lancamento = 'credito' if codigo in CODIGOS_CREDITO else 'debito'
+            descricao = DESCRICOES_CREDITO.get(codigo) or RUBRICAS_DEBITO[codigo]
+            if repeticao:
+                descricao += f" ({chr(ord('A') + repeticao - 1)})"
+            valor = sortear_valor(rng, mediana=9000.0 if codigo == '2002' else 600.0, maximo=60000.0)
+            
+            referencia = f"{mes:02d}/{ano}"
+            variante = rng.randrange(3)
+            if variante == 0:
+                linhas.append(f"{codigo} {descricao} {referencia} R$ {formatar_valor(valor)}")
+            elif variante == 1:
+                linhas.append(f"{codigo} {descricao} {referencia} {formatar_valor(valor)}")
+            else:
+                linhas.append(f"{codigo} {descricao} {referencia} {rng.randrange(1, 999):03d} R$ {formatar_valor(valor)}")
+            gabarito.append({
+                'codigo': codigo, 'descricao': descricao, 'data': date(ano, mes, 1),
+                'valor': valor, 'tipo_lancamento': tipo_lancamento
+            })
+        
+        cabecalho = ['CAIXA ECONOMICA FEDERAL', 'DEMONSTRATIVO DE PAGAMENTO', f"REFERENCIA {mes:02d}/{ano}"]
+        paginas.extend(paginar(cabecalho, linhas, linhas_por_pagina))
+    return paginas, gabarito
+
+def gerar_pdf(paginas):
+    """PDF com uma página por página de texto (requer o reportlab)"""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+    except ImportError as e:
+        raise RuntimeError("Para gerar PDFs instale o reportlab (pip install reportlab)") from e
+    
+    saida = io.BytesIO()
+    documento = canvas.Canvas(saida, pagesize=A4)
+    _, altura = A4
+    for pagina in paginas:
+        texto = documento.beginText(30, altura - 40)
+        texto.setFont('Helvetica', 9)
+        for linha in pagina.split('\n'):
+            texto.textLine(linha.replace('\t', '    '))
+        documento.drawText(texto)
+        documento.showPage()
+    documento.save()
+    return saida.getvalue()
+
+def gravar_documento(pasta, nome, paginas, gabarito, pdf=False):
+    """Grava o texto, o gabarito (JSON) e, se pedido, o PDF de um documento"""
+    (pasta / f"{nome}.txt").write_text("\f".join(paginas), encoding='utf-8')
+    (pasta / f"{nome}.json").write_text(json.dumps(gabarito, default=str, ensure_ascii=False, indent=1), encoding='utf-8')
+    if pdf:
+        (pasta / f"{nome}.pdf").write_bytes(gerar_pdf(paginas))
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera faturas e contracheques sintéticos com gabarito.")
+    parser.add_argument('pasta', type=Path, help="pasta de saída")
+    parser.add_argument('--transacoes', type=int, default=500, help="transações por fatura (padrão: 500)")
+    parser.add_argument('--meses', type=int, default=12, help="meses no contracheque (padrão: 12)")
+    parser.add_argument('--itens', type=int, default=12, help="rubricas por mês no contracheque (padrão: 12)")
+    parser.add_argument('--linhas-por-pagina', type=int, default=LINHAS_POR_PAGINA, help=f"lançamentos por página (padrão: {LINHAS_POR_PAGINA})")
+    parser.add_argument('--layouts', nargs='+', choices=list(LAYOUTS_FATURA), default=list(LAYOUTS_FATURA), help="layouts de fatura")
+    parser.add_argument('--pdf', action='store_true', help="gerar também os PDFs (requer reportlab)")
+    parser.add_argument('--semente', type=int, default=42, help="semente do gerador (padrão: 42)")
+    args = parser.parse_args(argumentos)
+    
+    args.pasta.mkdir(parents=True, exist_ok=True)
+    try:
+        for layout in args.layouts:
+            paginas, gabarito = gerar_fatura(layout, args.transacoes, args.linhas_por_pagina, args.semente)
+            gravar_documento(args.pasta, f"fatura_{layout}", paginas, gabarito, args.pdf)
+            print(f"📄 fatura_{layout}: {len(paginas)} página(s), {len(gabarito)} transações")
+        
+        paginas, gabarito = gerar_contracheque(args.meses, args.itens, args.linhas_por_pagina, args.semente)
+        gravar_documento(args.pasta, "contracheque_caixa", paginas, gabarito, args.pdf)
+        print(f"📄 contracheque_caixa: {len(paginas)} página(s), {len(gabarito)} rubricas")
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
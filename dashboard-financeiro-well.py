@@ -2,16 +2,32 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import sqlite3
-import PyPDF2
-import io
-import re
-import hashlib
-from datetime import datetime, date
-import calendar
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import time
 import os
 
+from processamento_pdf import (
+    CODIGOS_CREDITO, CACHE_TEXTO_PATH, CATEGORIA_PADRAO, calcular_hash_arquivo, processar_arquivo,
+    estatisticas_cache_texto, limpar_cache_texto, regras_padrao_categoria,
+    configurar_regras, normalizar_estabelecimento, categorizar_estabelecimento,
+    categorizar_descricao_receita
+)
+from banco_dados import (
+    INDICES, CacheLancamentos, obter_pool, criar_esquema, ler_regras_categoria,
+    salvar_lancamentos_arquivo, analisar_consultas, ler_marcas, agregar_lancamentos, RESUMOS_MENSAIS,
+    reconstruir_resumos_mensais, listar_meses_receitas, totais_receitas_por_rubrica,
+    formatar_ano_mes, consultar_lancamentos_mes, opcoes_filtro_transacoes, totais_transacoes,
+    pagina_transacoes, buscar_lancamentos
+)
+from duplicatas import (
+    LIMIAR_SIMILARIDADE, JANELA_DIAS, detectar_quase_duplicatas, registrar_pares,
+    fila_revisao, aplicar_decisoes
+)
+
 # Configuração da página
 st.set_page_config(
     page_title="Dashboard Financeiro Automatizado",
@@ -23,976 +39,456 @@ st.set_page_config(
 # Caminho do banco de dados
 DB_PATH = 'financeiro.db'
 
-# Códigos específicos para créditos (conforme regra de negócio)
-CODIGOS_CREDITO = ['2002', '2007', '2043', '2045', '2049', '2116', '2186', '21100']
+# Opções de linhas por página no histórico de transações
+TAMANHOS_PAGINA = [50, 100, 250, 500]
+
+# Segundos entre as verificações de lançamentos novos (gravados pelo vigiar_pasta, por exemplo)
+INTERVALO_ATUALIZACAO_SEGUNDOS = 5
 
 # Inicialização do banco de dados
 def init_database():
-    """Inicializa o banco de dados SQLite com tratamento de erro"""
+    """Inicializa o banco de dados SQLite com tratamento de erro (retorna True se deu certo)"""
+    conn = None
+    try:
+        # As PRAGMAs de desempenho (WAL, cache, mmap) são aplicadas pelo pool
+        conn = obter_pool(DB_PATH).escrita()
+        criar_esquema(conn)
+        conn.commit()
+        return True
+    except Exception as e:
+        st.error(f"Erro ao inicializar banco de dados: {e}")
+        return False
+    finally:
+        if conn is not None:
+            conn.close()
+
+@st.cache_resource
+def preparar_banco():
+    """Cria ou atualiza esquema e índices uma vez por processo do servidor
+    
+    init_database é idempotente, então roda também em bancos já existentes,
+    que assim recebem as tabelas e índices adicionados depois.
+    """
+    return init_database()
+
+def get_db_connection(escrita=False):
+    """Obtém uma conexão do pool do processo: de leitura ou, com escrita=True, a de escrita
+    
+    ``close()`` devolve a conexão ao pool para ser reaproveitada.
+    """
+    try:
+        pool = obter_pool(DB_PATH)
+        return pool.escrita() if escrita else pool.leitura()
+    except Exception as e:
+        st.error(f"Erro ao conectar com banco de dados: {e}")
+        return None
+
+def obter_versao_regras():
+    """Versão atual das regras de categorização no banco"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        linha = conn.execute("SELECT versao FROM controle_regras WHERE id = 1").fetchone()
+        return linha[0] if linha else None
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+@st.cache_data
+def carregar_regras_categoria(versao):
+    """Lê regras e overrides do banco; o cache é renovado quando a versão muda"""
+    conn = get_db_connection()
+    try:
+        return ler_regras_categoria(conn, versao)
+    finally:
+        conn.close()
+
+def obter_regras_categoria():
+    """Regras em vigor, já aplicadas a este processo (None se o banco estiver indisponível)"""
+    versao = obter_versao_regras()
+    if versao is None:
+        return None
+    regras_categoria = carregar_regras_categoria(versao)
+    configurar_regras(regras_categoria)
+    return regras_categoria
+
+def salvar_regras_categoria(df_regras, df_overrides):
+    """Substitui regras e overrides pelas tabelas editadas na interface"""
+    def texto(valor):
+        # Células vazias do editor chegam como None ou NaN
+        return '' if pd.isna(valor) else str(valor).strip()
+    
+    regras = []
+    for linha in df_regras.to_dict('records'):
+        tipo = texto(linha.get('tipo'))
+        palavra = texto(linha.get('palavra_chave')).upper()
+        categoria = texto(linha.get('categoria'))
+        if tipo not in CATEGORIA_PADRAO or not palavra or not categoria:
+            continue
+        prioridade = linha.get('prioridade')
+        prioridade = 100 if pd.isna(prioridade) else int(prioridade)
+        regras.append((tipo, palavra, categoria, prioridade))
+    
+    overrides = {}
+    for linha in df_overrides.to_dict('records'):
+        estabelecimento = normalizar_estabelecimento(texto(linha.get('estabelecimento')))
+        categoria = texto(linha.get('categoria'))
+        if estabelecimento and categoria:
+            overrides[estabelecimento] = categoria
+    
+    conn = get_db_connection(escrita=True)
+    if not conn:
+        return False
+    try:
+        with conn:
+            conn.execute("DELETE FROM regras_categoria")
+            conn.executemany(
+                "INSERT INTO regras_categoria (tipo, palavra_chave, categoria, prioridade) VALUES (?, ?, ?, ?)",
+                regras
+            )
+            conn.execute("DELETE FROM overrides_categoria")
+            conn.executemany(
+                "INSERT INTO overrides_categoria (estabelecimento, categoria) VALUES (?, ?)",
+                overrides.items()
+            )
+        return True
+    except Exception as e:
+        st.error(f"Erro ao salvar regras de categorização: {e}")
+        return False
+    finally:
+        conn.close()
+
+def recategorizar_lancamentos(tamanho_lote=5000):
+    """Reaplica as regras de categorização atuais aos lançamentos já gravados
+    
+    Os valores distintos de estabelecimento/descrição são lidos do banco em
+    lotes e categorizados uma vez cada; só os pares cuja categoria muda vão
+    para uma tabela temporária, aplicada com UPDATE ... FROM. Tudo ocorre em
+    uma única transação. Os descontos de contracheque gravados em transacoes
+    mantêm a categoria fixa 'Descontos Folha'. Retorna quantas transações e
+    receitas mudaram de categoria.
+    """
+    obter_regras_categoria()
+    
+    conn = get_db_connection(escrita=True)
+    if not conn:
+        return 0, 0
+    
+    conn.isolation_level = None
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
         cursor = conn.cursor()
-        
-        # Configurações SQLite para melhor performance
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA cache_size=1000")
-        cursor.execute("PRAGMA temp_store=memory")
-        
-        # Tabela de transações (despesas)
+        cursor.execute("BEGIN IMMEDIATE")
+        # A conexão de escrita é reaproveitada: descartar tabelas de uma execução anterior
+        cursor.execute("DROP TABLE IF EXISTS temp.novas_categorias_transacoes")
+        cursor.execute("DROP TABLE IF EXISTS temp.novas_categorias_receitas")
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data DATE NOT NULL,
+            CREATE TEMP TABLE novas_categorias_transacoes (
                 estabelecimento TEXT NOT NULL,
-                categoria TEXT NOT NULL,
-                valor REAL NOT NULL,
-                cartao TEXT NOT NULL,
-                arquivo_origem TEXT NOT NULL,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                categoria_atual TEXT NOT NULL,
+                categoria_nova TEXT NOT NULL,
+                PRIMARY KEY (estabelecimento, categoria_atual)
             )
         ''')
-        
-        # Tabela de receitas (agora com código para controle)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS receitas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data DATE NOT NULL,
+            CREATE TEMP TABLE novas_categorias_receitas (
+                tipo_lancamento TEXT NOT NULL,
                 descricao TEXT NOT NULL,
-                categoria TEXT NOT NULL,
-                valor REAL NOT NULL,
-                fonte TEXT NOT NULL,
-                codigo TEXT,
-                tipo_lancamento TEXT DEFAULT 'credito',
-                arquivo_origem TEXT NOT NULL,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                categoria_atual TEXT NOT NULL,
+                categoria_nova TEXT NOT NULL,
+                PRIMARY KEY (tipo_lancamento, descricao, categoria_atual)
             )
         ''')
         
-        # Tabela de arquivos processados
+        distintos = conn.execute('''
+            SELECT DISTINCT estabelecimento, categoria FROM transacoes
+            WHERE cartao != 'Contracheque'
+        ''')
+        while True:
+            lote = distintos.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            novas = []
+            for estabelecimento, categoria in lote:
+                categoria_nova = categorizar_estabelecimento(estabelecimento)
+                if categoria_nova != categoria:
+                    novas.append((estabelecimento, categoria, categoria_nova))
+            cursor.executemany("INSERT INTO novas_categorias_transacoes VALUES (?, ?, ?)", novas)
+        
+        distintos = conn.execute('''
+            SELECT DISTINCT COALESCE(tipo_lancamento, 'credito'), descricao, categoria FROM receitas
+        ''')
+        while True:
+            lote = distintos.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            novas = []
+            for tipo_lancamento, descricao, categoria in lote:
+                if tipo_lancamento not in ('credito', 'debito'):
+                    continue
+                categoria_nova = categorizar_descricao_receita(descricao, tipo_lancamento)
+                if categoria_nova != categoria:
+                    novas.append((tipo_lancamento, descricao, categoria, categoria_nova))
+            cursor.executemany("INSERT INTO novas_categorias_receitas VALUES (?, ?, ?, ?)", novas)
+        
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS arquivos_processados (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome_arquivo TEXT UNIQUE NOT NULL,
-                hash_arquivo TEXT NOT NULL,
-                tipo_arquivo TEXT NOT NULL,
-                data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                total_transacoes INTEGER DEFAULT 0
-            )
+            UPDATE transacoes SET categoria = n.categoria_nova
+            FROM novas_categorias_transacoes AS n
+            WHERE transacoes.estabelecimento = n.estabelecimento
+              AND transacoes.categoria = n.categoria_atual
+              AND transacoes.cartao != 'Contracheque'
         ''')
+        transacoes_alteradas = cursor.rowcount
         
-        # Adicionar colunas se não existirem (para compatibilidade)
-        try:
-            cursor.execute("ALTER TABLE receitas ADD COLUMN codigo TEXT")
-        except:
-            pass
-        try:
-            cursor.execute("ALTER TABLE receitas ADD COLUMN tipo_lancamento TEXT DEFAULT 'credito'")
-        except:
-            pass
+        cursor.execute('''
+            UPDATE receitas SET categoria = n.categoria_nova
+            FROM novas_categorias_receitas AS n
+            WHERE COALESCE(receitas.tipo_lancamento, 'credito') = n.tipo_lancamento
+              AND receitas.descricao = n.descricao
+              AND receitas.categoria = n.categoria_atual
+        ''')
+        receitas_alteradas = cursor.rowcount
         
-        conn.commit()
-        return conn
+        cursor.execute("COMMIT")
+        return transacoes_alteradas, receitas_alteradas
     except Exception as e:
-        st.error(f"Erro ao inicializar banco de dados: {e}")
-        return None
-
-def get_db_connection():
-    """Obtém uma nova conexão com o banco de dados"""
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
-        return conn
-    except Exception as e:
-        st.error(f"Erro ao conectar com banco de dados: {e}")
-        return None
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        st.error(f"Erro ao recategorizar lançamentos: {e}")
+        return 0, 0
+    finally:
+        conn.close()
 
 # Funções auxiliares
-def calcular_hash_arquivo(file_bytes):
-    """Calcula hash MD5 do arquivo"""
-    return hashlib.md5(file_bytes).hexdigest()
-
-def extrair_texto_pdf(file_bytes):
-    """Extrai texto do PDF com melhor tratamento de erros"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        texto = ""
-        for page_num, page in enumerate(pdf_reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    texto += page_text + "\n"
-            except Exception as e:
-                st.warning(f"Erro ao extrair texto da página {page_num + 1}: {e}")
-                continue
-        return texto
-    except Exception as e:
-        st.error(f"Erro ao ler PDF: {e}")
-        return ""
-
-def debug_texto_extraido(texto, max_chars=500):
+def debug_texto_extraido(preview_texto, total_caracteres, key=None):
     """Mostra preview do texto extraído para debug"""
-    if texto:
-        preview = texto[:max_chars] + "..." if len(texto) > max_chars else texto
-        st.text_area("🔍 Texto extraído do PDF (preview):", preview, height=150)
-        st.info(f"📄 Total de caracteres extraídos: {len(texto)}")
+    if total_caracteres:
+        preview = preview_texto + "..." if total_caracteres > len(preview_texto) else preview_texto
+        st.text_area("🔍 Texto extraído do PDF (preview):", preview, height=150, key=key)
+        st.info(f"📄 Total de caracteres extraídos: {total_caracteres}")
         return True
     else:
         st.error("❌ Nenhum texto foi extraído do PDF")
         return False
 
-def categorizar_estabelecimento(estabelecimento):
-    """Categoriza automaticamente baseado no nome do estabelecimento"""
-    estabelecimento = estabelecimento.upper()
-    
-    categorias = {
-        'Alimentação': [
-            'SUPERMERCADO', 'PADARIA', 'MERCADO', 'HORTIFRUTI', 'ACOUGUE', 'FEIRA', 
-            'EMPORIO', 'ATACADAO', 'EXTRA', 'CARREFOUR', 'WALMART', 'BIG', 'ASSAI'
-        ],
-        'Restaurante': [
-            'RESTAURANTE', 'MCDONALDS', 'SUBWAY', 'IFOOD', 'UBER EATS', 'BURGUER', 
-            'PIZZA', 'LANCHONETE', 'BAR', 'CAFE', 'CAFETERIA', 'DELIVERY', 'FOOD',
-            'OUTBACK', 'SPOLETO', 'HABIB', 'GIRAFFAS', 'BOBS'
-        ],
-        'Transporte': [
-            'UBER', '99', 'POSTO', 'PETROBRAS', 'SHELL', 'ESTACIONAMENTO', 'PEDAGIO', 
-            'METRO', 'ONIBUS', 'TAXI', 'COMBUSTIVEL', 'GASOLINA', 'ALCOOL', 'DIESEL'
-        ],
-        'Lazer': [
-            'CINEMA', 'NETFLIX', 'SPOTIFY', 'AMAZON PRIME', 'SHOPPING', 'LIVRARIA', 
-            'TEATRO', 'PARQUE', 'CLUBE', 'YOUTUBE', 'DISNEY', 'GLOBOPLAY'
-        ],
-        'Saúde': [
-            'FARMACIA', 'DROGA', 'DROGASIL', 'CLINICA', 'LABORATORIO', 'DENTISTA', 
-            'HOSPITAL', 'MEDICO', 'ULTRAFARMA', 'PACHECO', 'RAIA'
-        ],
-        'Vestuário': [
-            'ZARA', 'C&A', 'RENNER', 'NIKE', 'ADIDAS', 'ROUPA', 'CALCADO', 'SAPATO', 
-            'TENIS', 'RIACHUELO', 'MARISA', 'LOJAS AMERICANAS'
-        ],
-        'Casa': [
-            'LEROY MERLIN', 'CASAS BAHIA', 'AMERICANAS', 'MOVEIS', 'DECORACAO', 
-            'CONSTRUCAO', 'MAGAZINE LUIZA', 'PONTO FRIO', 'FAST SHOP'
-        ],
-        'Educação': [
-            'LIVRARIA', 'CURSO', 'UNIVERSIDADE', 'MATERIAL ESCOLAR', 'ESCOLA', 
-            'FACULDADE', 'LIVRO', 'SARAIVA', 'CULTURA'
-        ],
-        'Serviços': [
-            'CLARO', 'VIVO', 'TIM', 'CONTA', 'SEGURO', 'INTERNET', 'BANCO', 
-            'CARTORIO', 'CORREIOS', 'OI', 'SKY', 'NET'
-        ]
-    }
-    
-    for categoria, palavras_chave in categorias.items():
-        for palavra in palavras_chave:
-            if palavra in estabelecimento:
-                return categoria
-    
-    return 'Outros'
-
-def detectar_cartao(nome_arquivo, texto):
-    """Detecta o cartão baseado no nome do arquivo e conteúdo"""
-    nome_lower = nome_arquivo.lower()
-    texto_lower = texto.lower()
-    
-    if 'azul' in nome_lower or 'azul' in texto_lower:
-        return 'Azul'
-    elif 'santander' in nome_lower or 'santander' in texto_lower:
-        return 'Santander'
-    elif 'samsung' in nome_lower or 'samsung' in texto_lower:
-        return 'Samsung'
-    elif 'caixa' in nome_lower or 'caixa' in texto_lower:
-        if 'elo' in nome_lower or 'elo' in texto_lower:
-            return 'Caixa Elo'
-        elif 'visa' in nome_lower or 'visa' in texto_lower:
-            return 'Caixa Visa'
-        else:
-            return 'Caixa'
-    elif 'visa' in nome_lower or 'visa' in texto_lower:
-        return 'Visa'
-    elif 'mastercard' in nome_lower or 'mastercard' in texto_lower:
-        return 'Mastercard'
-    else:
-        return 'Cartão'
-
-def converter_data(data_str):
-    """Converte string de data para objeto date com correção de ano"""
-    try:
-        # Limpar a string
-        data_str = data_str.strip()
-        
-        # Tentar diferentes formatos
-        formatos = [
-            '%d/%m/%Y',
-            '%d/%m/%y',
-            '%d/%m',
-            '%d-%m-%Y',
-            '%d-%m-%y',
-            '%d-%m'
-        ]
-        
-        for formato in formatos:
-            try:
-                if formato.endswith('/%m') or formato.endswith('-%m'):
-                    # Adicionar ano atual se não especificado
-                    ano_atual = datetime.now().year
-                    data_str_completa = f"{data_str}/{ano_atual}"
-                    data_obj = datetime.strptime(data_str_completa, formato + f'/{ano_atual}').date()
-                elif formato.endswith('/%y') or formato.endswith('-%y'):
-                    # Corrigir interpretação de anos de 2 dígitos
-                    data_obj = datetime.strptime(data_str, formato).date()
-                    
-                    # Se o ano for menor que 1950, assumir que é 20XX
-                    if data_obj.year < 1950:
-                        data_obj = data_obj.replace(year=data_obj.year + 100)
-                    # Se o ano for maior que ano atual + 10, assumir que é 19XX
-                    elif data_obj.year > datetime.now().year + 10:
-                        data_obj = data_obj.replace(year=data_obj.year - 100)
-                else:
-                    data_obj = datetime.strptime(data_str, formato).date()
-                
-                # Verificar se a data é razoável (não muito antiga ou futura)
-                ano_atual = datetime.now().year
-                if data_obj.year < 2020 or data_obj.year > ano_atual + 2:
-                    continue
-                
-                return data_obj
-            except ValueError:
-                continue
-        
-        return None
-    except Exception:
-        return None
-
-def converter_valor(valor_str):
-    """Converte string de valor para float"""
-    try:
-        # Limpar a string
-        valor_str = valor_str.strip()
-        valor_str = valor_str.replace('R$', '').replace('$', '')
-        valor_str = valor_str.replace(' ', '')
-        
-        # Converter vírgula para ponto (formato brasileiro)
-        if ',' in valor_str and '.' in valor_str:
-            # Formato: 1.234,56
-            valor_str = valor_str.replace('.', '').replace(',', '.')
-        elif ',' in valor_str:
-            # Formato: 1234,56
-            valor_str = valor_str.replace(',', '.')
-        
-        valor = float(valor_str)
-        
-        # Verificar se o valor é razoável
-        if valor < 0.01 or valor > 100000:
-            return 0
-        
-        return valor
-    except Exception:
-        return 0
+def exibir_mensagens(mensagens):
+    """Exibe as mensagens geradas durante o processamento de um arquivo"""
+    for nivel, texto in mensagens:
+        getattr(st, nivel)(texto)
 
-def classificar_lancamento_por_codigo(codigo):
-    """Classifica lançamento como crédito ou débito baseado nas regras específicas"""
-    codigo_str = str(codigo).strip()
-    
-    # Regra específica: apenas códigos específicos são créditos
-    if codigo_str in CODIGOS_CREDITO:
-        return 'credito'
-    else:
-        return 'debito'
+@st.cache_resource
+def obter_pool_processos():
+    """Pool de processos compartilhado para extração e interpretação de PDFs"""
+    # 'spawn' evita herdar as threads do servidor do Streamlit via fork
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context('spawn')
+    )
 
-def categorizar_receita_por_codigo(codigo, descricao):
-    """Categoriza receitas e descontos baseado no código e descrição"""
-    codigo_str = str(codigo).strip()
-    descricao = descricao.upper()
-    
-    # Classificar como crédito ou débito
-    tipo_lancamento = classificar_lancamento_por_codigo(codigo_str)
-    
-    if tipo_lancamento == 'credito':
-        # Categorização de créditos
-        if 'SALARIO' in descricao or 'REMUNERACAO' in descricao:
-            return 'Salário', tipo_lancamento
-        elif 'FERIAS' in descricao:
-            return 'Férias', tipo_lancamento
-        elif 'ADICIONAL' in descricao or 'TEMPO' in descricao:
-            return 'Adicional Tempo Serviço', tipo_lancamento
-        elif 'INCORPORACAO' in descricao:
-            return 'Incorporação', tipo_lancamento
-        elif 'JUDICIAL' in descricao:
-            return 'Decisão Judicial', tipo_lancamento
-        else:
-            return 'Outros Proventos', tipo_lancamento
-    
-    else:  # débito
-        # Categorização de débitos
-        if 'INSS' in descricao:
-            return 'INSS', tipo_lancamento
-        elif 'IMPOSTO' in descricao or 'RENDA' in descricao:
-            return 'Imposto de Renda', tipo_lancamento
-        elif 'FUNCEF' in descricao or 'PREVIDENCIA' in descricao:
-            return 'Previdência Privada', tipo_lancamento
-        elif 'SINDICATO' in descricao:
-            return 'Sindicato', tipo_lancamento
-        elif 'SAUDE' in descricao or 'MEDICO' in descricao:
-            return 'Plano de Saúde', tipo_lancamento
-        elif 'CONSIGNACOES' in descricao or 'EMPRESTIMO' in descricao:
-            return 'Empréstimo Consignado', tipo_lancamento
-        elif 'GYMPASS' in descricao or 'CONVENIO' in descricao:
-            return 'Convênios', tipo_lancamento
-        elif 'ASSOCIACAO' in descricao:
-            return 'Associação', tipo_lancamento
-        elif 'CREDITO' in descricao or 'DEVOLVER' in descricao:
-            return 'Ajustes/Devoluções', tipo_lancamento
-        elif 'REP' in descricao or 'REPOSICAO' in descricao:
-            return 'Reposições', tipo_lancamento
+def processar_lote_pdfs(uploaded_files, tipo_arquivo):
+    """Processa vários PDFs em paralelo no pool de processos
+    
+    Um lote com um único arquivo é interpretado no próprio script, com as
+    transações aparecendo conforme as páginas são lidas. Arquivos já
+    processados (ou repetidos no mesmo lote) são ignorados pelo hash.
+    Retorna os resultados na ordem do upload, depois que todos os arquivos
+    terminaram, para que possam ser salvos em conjunto.
+    """
+    pendentes = []
+    hashes_lote = set()
+    
+    for uploaded_file in uploaded_files:
+        file_bytes = uploaded_file.getvalue()
+        file_hash = calcular_hash_arquivo(file_bytes)
+        
+        # Verificar se arquivo já foi processado
+        arquivo_existente = verificar_arquivo_processado(file_hash)
+        
+        if arquivo_existente:
+            st.error(f"❌ {uploaded_file.name}: arquivo já foi processado anteriormente: {arquivo_existente}")
+        elif file_hash in hashes_lote:
+            st.warning(f"⚠️ {uploaded_file.name}: arquivo repetido neste lote, ignorado")
         else:
-            return 'Outros Descontos', tipo_lancamento
-
-def processar_pdf_fatura(file_bytes, nome_arquivo):
-    """Processa PDF de fatura com múltiplos padrões robustos"""
-    texto = extrair_texto_pdf(file_bytes)
+            hashes_lote.add(file_hash)
+            pendentes.append((uploaded_file.name, file_bytes))
     
-    if not texto.strip():
-        st.error("❌ Não foi possível extrair texto do PDF")
+    if not pendentes:
         return []
     
-    # Debug: mostrar texto extraído
-    with st.expander("🔍 Debug - Texto Extraído"):
-        debug_texto_extraido(texto)
-    
-    transacoes = []
-    
-    # Detectar cartão baseado no nome do arquivo e conteúdo
-    cartao = detectar_cartao(nome_arquivo, texto)
-    
-    # Múltiplos padrões para diferentes formatos de fatura
-    padroes_fatura = [
-        # Padrão 1: DD/MM/YYYY ESTABELECIMENTO VALOR
-        r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 2: DD/MM ESTABELECIMENTO VALOR
-        r'(\d{1,2}/\d{1,2})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 3: Com separadores |
-        r'(\d{1,2}/\d{1,2}/\d{4})\s*\|\s*([A-Za-z0-9\s\-\.\*\&\+]+?)\s*\|\s*R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 4: DD-MM-YYYY
-        r'(\d{1,2}-\d{1,2}-\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 5: Com R$ explícito
-        r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 6: Formato mais flexível
-        r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s*[|\s]\s*([A-Za-z0-9\s\-\.\*\&\+]{3,50}?)\s*[|\s]\s*R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão 7: Azul específico
-        r'(\d{2}/\d{2})\s+([A-Z\s\-\.\*]+)\s+(\d+,\d{2})\s+(\d+,\d{2})',
-        
-        # Padrão 8: Santander específico
-        r'(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s+([A-Z\s\-\.\*]+)\s+(\d+,\d{2})',
-        
-        # Padrão 9: Samsung específico
-        r'(\d{2}/\d{2})\s+([A-Z0-9\s\-\.\*]+)\s+(\d+,\d{2})',
-        
-        # Padrão 10: Genérico com tabs
-        r'(\d{1,2}/\d{1,2}/\d{2,4})\t+([A-Za-z0-9\s\-\.\*\&\+]+?)\t+(\d{1,3}(?:\.\d{3})*,\d{2})'
-    ]
+    regras_categoria = obter_regras_categoria()
     
-    matches_encontrados = 0
+    # Um único arquivo é interpretado aqui mesmo, mostrando as transações
+    # conforme as páginas são lidas
+    if len(pendentes) == 1:
+        nome_arquivo, file_bytes = pendentes[0]
+        atualizar_preview = PreviewProgressivo()
+        try:
+            resultado = processar_arquivo(nome_arquivo, file_bytes, tipo_arquivo, atualizar_preview, regras_categoria)
+        except Exception as e:
+            st.error(f"❌ {nome_arquivo}: erro ao processar arquivo: {e}")
+            return []
+        finally:
+            atualizar_preview.limpar()
+        return [resultado]
+    
+    resultados = [None] * len(pendentes)
+    barra_progresso = st.progress(0.0, text=f"🔄 Processando {len(pendentes)} arquivo(s)...")
+    
+    pool = obter_pool_processos()
+    futuros = {
+        pool.submit(processar_arquivo, nome_arquivo, file_bytes, tipo_arquivo, regras_categoria=regras_categoria): indice
+        for indice, (nome_arquivo, file_bytes) in enumerate(pendentes)
+    }
     
-    for i, padrao in enumerate(padroes_fatura):
-        matches = re.findall(padrao, texto, re.MULTILINE | re.IGNORECASE)
+    for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+        indice = futuros[futuro]
+        nome_arquivo = pendentes[indice][0]
+        try:
+            resultados[indice] = futuro.result()
+        except BrokenProcessPool as e:
+            # Um processo morreu: descartar o pool para que o próximo lote crie outro
+            obter_pool_processos.clear()
+            st.error(f"❌ {nome_arquivo}: falha no processo de extração: {e}")
+        except Exception as e:
+            st.error(f"❌ {nome_arquivo}: erro ao processar arquivo: {e}")
         
-        if matches:
-            st.info(f"✅ Padrão {i+1} encontrou {len(matches)} transações")
-            
-            for match in matches:
-                try:
-                    if len(match) >= 3:
-                        data_str = match[0]
-                        estabelecimento = match[1].strip()
-                        valor_str = match[-1]  # Último elemento é sempre o valor
-                        
-                        # Limpar estabelecimento
-                        estabelecimento = re.sub(r'\s+', ' ', estabelecimento)
-                        estabelecimento = estabelecimento[:50]  # Limitar tamanho
-                        
-                        # Converter data
-                        data_obj = converter_data(data_str)
-                        if not data_obj:
-                            continue
-                        
-                        # Converter valor
-                        valor = converter_valor(valor_str)
-                        if valor <= 0:
-                            continue
-                        
-                        # Filtrar estabelecimentos muito curtos
-                        if len(estabelecimento.strip()) < 3:
-                            continue
-                        
-                        categoria = categorizar_estabelecimento(estabelecimento)
-                        
-                        transacoes.append({
-                            'data': data_obj,
-                            'estabelecimento': estabelecimento,
-                            'categoria': categoria,
-                            'valor': valor,
-                            'cartao': cartao,
-                            'arquivo_origem': nome_arquivo
-                        })
-                        matches_encontrados += 1
-                        
-                except Exception as e:
-                    continue
-    
-    # Se não encontrou nada, tentar extração alternativa
-    if not transacoes:
-        st.warning("⚠️ Padrões principais não funcionaram. Tentando extração alternativa...")
-        transacoes = extrair_transacoes_alternativo(texto, cartao, nome_arquivo)
-    
-    # Remover duplicatas
-    transacoes = remover_duplicatas_transacoes(transacoes)
-    
-    st.success(f"✅ Total de {len(transacoes)} transações extraídas")
-    
-    return transacoes
-
-def extrair_transacoes_alternativo(texto, cartao, nome_arquivo):
-    """Método alternativo de extração quando padrões principais falham"""
-    transacoes = []
-    
-    # Procurar por valores monetários no texto
-    valores = re.findall(r'R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})', texto)
-    datas = re.findall(r'(\d{1,2}[/\-]\d{1,2}[/\-]?\d{0,4})', texto)
-    
-    if valores and datas:
-        st.info(f"🔍 Método alternativo encontrou {len(valores)} valores e {len(datas)} datas")
-        
-        # Tentar combinar datas e valores próximos
-        linhas = texto.split('\n')
-        for linha in linhas:
-            if re.search(r'\d{1,2}[/\-]\d{1,2}', linha) and re.search(r'\d+,\d{2}', linha):
-                # Esta linha tem data e valor
-                try:
-                    data_match = re.search(r'(\d{1,2}[/\-]\d{1,2}[/\-]?\d{0,4})', linha)
-                    valor_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', linha)
-                    
-                    if data_match and valor_match:
-                        data_obj = converter_data(data_match.group(1))
-                        valor = converter_valor(valor_match.group(1))
-                        
-                        if data_obj and valor > 0:
-                            # Extrair estabelecimento (texto entre data e valor)
-                            estabelecimento = linha.replace(data_match.group(1), '').replace(valor_match.group(1), '')
-                            estabelecimento = re.sub(r'[R\$\|\t]+', ' ', estabelecimento).strip()
-                            
-                            if len(estabelecimento) >= 3:
-                                categoria = categorizar_estabelecimento(estabelecimento)
-                                
-                                transacoes.append({
-                                    'data': data_obj,
-                                    'estabelecimento': estabelecimento[:50],
-                                    'categoria': categoria,
-                                    'valor': valor,
-                                    'cartao': cartao,
-                                    'arquivo_origem': nome_arquivo
-                                })
-                except Exception:
-                    continue
-    
-    return transacoes
-
-def remover_duplicatas_transacoes(transacoes):
-    """Remove transações duplicadas"""
-    if not transacoes:
-        return []
-    
-    # Criar chave única para cada transação
-    transacoes_unicas = {}
-    
-    for transacao in transacoes:
-        chave = f"{transacao['data']}_{transacao['estabelecimento']}_{transacao['valor']}"
-        if chave not in transacoes_unicas:
-            transacoes_unicas[chave] = transacao
+        barra_progresso.progress(
+            concluidos / len(futuros),
+            text=f"🔄 {concluidos}/{len(futuros)} arquivo(s) processado(s) - {nome_arquivo}"
+        )
     
-    return list(transacoes_unicas.values())
+    return [resultado for resultado in resultados if resultado is not None]
 
-def processar_pdf_contracheque(file_bytes, nome_arquivo):
-    """Processa PDF de contracheque com regras específicas de classificação e correção de ano"""
-    texto = extrair_texto_pdf(file_bytes)
-    
-    if not texto.strip():
-        st.error("❌ Não foi possível extrair texto do PDF")
-        return [], []
-    
-    # Debug: mostrar texto extraído
-    with st.expander("🔍 Debug - Texto Extraído do Contracheque"):
-        debug_texto_extraido(texto)
-    
-    receitas = []
-    descontos = []
-    
-    # Detectar empresa/fonte
-    fonte = detectar_fonte_contracheque(nome_arquivo, texto)
-    
-    # Padrões específicos para o formato do contracheque
-    padroes_contracheque = [
-        # Padrão principal: CODIGO DESCRICAO MM/YYYY [OUTROS] R$ VALOR
-        r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+(\d{2}/\d{4})\s+(?:\d{3}\s+)?R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão alternativo: CODIGO DESCRICAO MM/YYYY VALOR (sem R$)
-        r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+(\d{2}/\d{4})\s+(?:\d{3}\s+)?(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão sem data: CODIGO DESCRICAO R$ VALOR
-        r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
-        
-        # Padrão flexível: qualquer linha com código e valor
-        r'^(\d{2,5})\s+(.+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})$'
-    ]
-    
-    matches_encontrados = 0
-    data_referencia = extrair_data_contracheque(texto)
-    
-    st.info(f"📅 Data de referência detectada: {data_referencia}")
-    
-    for i, padrao in enumerate(padroes_contracheque):
-        matches = re.findall(padrao, texto, re.MULTILINE)
+class PreviewProgressivo:
+    """Mostra as transações parciais enquanto uma fatura é lida"""
+    
+    def __init__(self, intervalo_segundos=0.5):
+        self.intervalo_segundos = intervalo_segundos
+        self.ultima_atualizacao = 0.0
+        self.area_status = st.empty()
+        self.area_tabela = st.empty()
+    
+    def __call__(self, resultado):
+        # Limitar a frequência para não reenviar a tabela a cada transação
+        agora = time.monotonic()
+        if agora - self.ultima_atualizacao < self.intervalo_segundos:
+            return
+        self.ultima_atualizacao = agora
         
-        if matches:
-            st.info(f"✅ Padrão contracheque {i+1} encontrou {len(matches)} itens")
-            
-            for match in matches:
-                try:
-                    if len(match) == 4:  # Padrão com data
-                        codigo = match[0]
-                        descricao = match[1].strip()
-                        data_str = match[2]
-                        valor_str = match[3]
-                        
-                        # Converter data específica com correção de ano
-                        try:
-                            mes, ano = data_str.split('/')
-                            ano_int = int(ano)
-                            
-                            # Corrigir ano se necessário
-                            if ano_int < 100:  # Ano de 2 dígitos
-                                if ano_int < 50:  # 00-49 = 2000-2049
-                                    ano_int += 2000
-                                else:  # 50-99 = 1950-1999
-                                    ano_int += 1900
-                            
-                            # Verificar se o ano é razoável
-                            ano_atual = datetime.now().year
-                            if ano_int < 2020 or ano_int > ano_atual + 2:
-                                data_item = data_referencia
-                            else:
-                                data_item = datetime(ano_int, int(mes), 1).date()
-                        except:
-                            data_item = data_referencia
-                    
-                    elif len(match) == 3:  # Padrão sem data
-                        codigo = match[0]
-                        descricao = match[1].strip()
-                        valor_str = match[2]
-                        data_item = data_referencia
-                    
-                    else:
-                        continue
-                    
-                    # Filtrar descrições muito curtas
-                    if len(descricao) < 3:
-                        continue
-                    
-                    # Converter valor
-                    valor = converter_valor(valor_str)
-                    if valor <= 0:
-                        continue
-                    
-                    # Categorizar baseado no código e descrição
-                    categoria, tipo_lancamento = categorizar_receita_por_codigo(codigo, descricao)
-                    
-                    if tipo_lancamento == 'credito':
-                        # Adicionar como receita
-                        receitas.append({
-                            'data': data_item,
-                            'descricao': descricao,
-                            'categoria': categoria,
-                            'valor': valor,
-                            'fonte': fonte,
-                            'codigo': codigo,
-                            'tipo_lancamento': tipo_lancamento,
-                            'arquivo_origem': nome_arquivo
-                        })
-                    else:
-                        # Adicionar como desconto (despesa)
-                        descontos.append({
-                            'data': data_item,
-                            'estabelecimento': f"Desconto: {descricao}",
-                            'categoria': 'Descontos Folha',
-                            'valor': valor,
-                            'cartao': 'Contracheque',
-                            'arquivo_origem': nome_arquivo
-                        })
-                        
-                        # Também adicionar na tabela de receitas como débito para controle
-                        receitas.append({
-                            'data': data_item,
-                            'descricao': descricao,
-                            'categoria': categoria,
-                            'valor': valor,
-                            'fonte': fonte,
-                            'codigo': codigo,
-                            'tipo_lancamento': tipo_lancamento,
-                            'arquivo_origem': nome_arquivo
-                        })
-                    
-                    matches_encontrados += 1
-                    
-                except Exception as e:
-                    st.warning(f"Erro ao processar item: {e}")
-                    continue
-    
-    # Se não encontrou nada, tentar extração alternativa
-    if not receitas and not descontos:
-        st.warning("⚠️ Padrões principais não funcionaram. Tentando extração alternativa...")
-        receitas_alt, descontos_alt = extrair_contracheque_alternativo(texto, fonte, nome_arquivo, data_referencia)
-        receitas.extend(receitas_alt)
-        descontos.extend(descontos_alt)
-    
-    # Remover duplicatas
-    receitas = remover_duplicatas_receitas(receitas)
-    descontos = remover_duplicatas_transacoes(descontos)
-    
-    # Calcular totais para validação
-    total_creditos = sum(r['valor'] for r in receitas if r.get('tipo_lancamento') == 'credito')
-    total_debitos = sum(r['valor'] for r in receitas if r.get('tipo_lancamento') == 'debito')
-    salario_liquido = total_creditos - total_debitos
-    
-    st.success(f"✅ Extraídas {len([r for r in receitas if r.get('tipo_lancamento') == 'credito'])} receitas e {len([r for r in receitas if r.get('tipo_lancamento') == 'debito'])} descontos")
-    st.info(f"💰 Total Créditos: R$ {total_creditos:,.2f} | Total Débitos: R$ {total_debitos:,.2f} | Líquido: R$ {salario_liquido:,.2f}")
-    
-    return receitas, descontos
-
-def detectar_fonte_contracheque(nome_arquivo, texto):
-    """Detecta a fonte/empresa do contracheque"""
-    nome_lower = nome_arquivo.lower()
-    texto_lower = texto.lower()
-    
-    # Procurar por nomes de empresas conhecidas
-    if 'caixa' in nome_lower or 'caixa' in texto_lower:
-        return 'Caixa Econômica Federal'
-    elif 'petrobras' in nome_lower or 'petrobras' in texto_lower:
-        return 'Petrobras'
-    elif 'vale' in nome_lower or 'vale' in texto_lower:
-        return 'Vale'
-    elif 'itau' in nome_lower or 'itau' in texto_lower:
-        return 'Itaú'
-    elif 'bradesco' in nome_lower or 'bradesco' in texto_lower:
-        return 'Bradesco'
-    elif 'banco do brasil' in nome_lower or 'banco do brasil' in texto_lower:
-        return 'Banco do Brasil'
-    
-    return 'Empresa'
-
-def extrair_data_contracheque(texto):
-    """Extrai data de referência do contracheque com correção de ano"""
-    # Procurar por padrões de data de referência
-    padroes_data = [
-        r'(\d{2}/\d{4})',  # MM/YYYY
-        r'(\d{2}-\d{4})',  # MM-YYYY
-        r'(JANEIRO|FEVEREIRO|MARÇO|ABRIL|MAIO|JUNHO|JULHO|AGOSTO|SETEMBRO|OUTUBRO|NOVEMBRO|DEZEMBRO)\s*/?\s*(\d{4})',
-        r'(\d{1,2})/(\d{4})'  # M/YYYY
-    ]
-    
-    meses = {
-        'JANEIRO': 1, 'FEVEREIRO': 2, 'MARÇO': 3, 'ABRIL': 4,
-        'MAIO': 5, 'JUNHO': 6, 'JULHO': 7, 'AGOSTO': 8,
-        'SETEMBRO': 9, 'OUTUBRO': 10, 'NOVEMBRO': 11, 'DEZEMBRO': 12
-    }
-    
-    for padrao in padroes_data:
-        matches = re.findall(padrao, texto, re.IGNORECASE)
-        if matches:
-            try:
-                # Pegar a data mais comum (moda)
-                if isinstance(matches[0], tuple):
-                    if len(matches[0]) == 2:  # Mês por extenso + ano
-                        mes_nome = matches[0][0].upper()
-                        ano = int(matches[0][1])
-                        if mes_nome in meses:
-                            return datetime(ano, meses[mes_nome], 1).date()
-                else:
-                    # Formato MM/YYYY - pegar o mais frequente
-                    datas_encontradas = {}
-                    for match in matches:
-                        if '/' in match or '-' in match:
-                            partes = re.split('[/-]', match)
-                            if len(partes) == 2:
-                                mes = int(partes[0])
-                                ano = int(partes[1])
-                                
-                                # Corrigir ano se necessário
-                                if ano < 100:  # Ano de 2 dígitos
-                                    if ano < 50:  # 00-49 = 2000-2049
-                                        ano += 2000
-                                    else:  # 50-99 = 1950-1999
-                                        ano += 1900
-                                
-                                # Verificar se o ano é razoável
-                                ano_atual = datetime.now().year
-                                if 2020 <= ano <= ano_atual + 2 and 1 <= mes <= 12:
-                                    data_key = f"{mes:02d}/{ano}"
-                                    datas_encontradas[data_key] = datas_encontradas.get(data_key, 0) + 1
-                    
-                    if datas_encontradas:
-                        # Pegar a data mais frequente
-                        data_mais_comum = max(datas_encontradas, key=datas_encontradas.get)
-                        mes, ano = data_mais_comum.split('/')
-                        return datetime(int(ano), int(mes), 1).date()
-            except:
-                continue
+        self.area_status.caption(
+            f"📄 {resultado['total_paginas']} página(s) lida(s) - "
+            f"{len(resultado['transacoes'])} transações encontradas até agora"
+        )
+        self.area_tabela.dataframe(pd.DataFrame(resultado['transacoes']), use_container_width=True)
     
-    # Se não encontrou, usar data atual
-    return datetime.now().date()
+    def limpar(self):
+        self.area_status.empty()
+        self.area_tabela.empty()
 
-def extrair_contracheque_alternativo(texto, fonte, nome_arquivo, data_referencia):
-    """Método alternativo para extrair dados de contracheque"""
-    receitas = []
-    descontos = []
-    
-    # Procurar por valores monetários e tentar associar com descrições
-    linhas = texto.split('\n')
-    
-    for linha in linhas:
-        # Procurar por linhas que tenham código numérico e valor
-        if re.search(r'^\d{2,5}\s+', linha) and re.search(r'\d+,\d{2}', linha):
-            try:
-                # Extrair código
-                codigo_match = re.search(r'^(\d{2,5})', linha)
-                if not codigo_match:
-                    continue
-                
-                codigo = codigo_match.group(1)
-                
-                # Extrair valor
-                valor_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', linha)
-                if not valor_match:
-                    continue
-                
-                valor = converter_valor(valor_match.group(1))
-                if valor <= 10:  # Filtrar valores muito baixos
-                    continue
-                
-                # Extrair descrição (texto entre código e valor)
-                descricao = linha.replace(codigo_match.group(1), '').replace(valor_match.group(1), '')
-                descricao = re.sub(r'[R\$\|\t\d/]+', ' ', descricao).strip()
-                
-                if len(descricao) >= 3:
-                    categoria, tipo_lancamento = categorizar_receita_por_codigo(codigo, descricao)
-                    
-                    if tipo_lancamento == 'credito':
-                        receitas.append({
-                            'data': data_referencia,
-                            'descricao': descricao,
-                            'categoria': categoria,
-                            'valor': valor,
-                            'fonte': fonte,
-                            'codigo': codigo,
-                            'tipo_lancamento': tipo_lancamento,
-                            'arquivo_origem': nome_arquivo
-                        })
-                    else:
-                        descontos.append({
-                            'data': data_referencia,
-                            'estabelecimento': f"Desconto: {descricao}",
-                            'categoria': 'Descontos Folha',
-                            'valor': valor,
-                            'cartao': 'Contracheque',
-                            'arquivo_origem': nome_arquivo
-                        })
-                        
-                        # Também adicionar na tabela de receitas como débito
-                        receitas.append({
-                            'data': data_referencia,
-                            'descricao': descricao,
-                            'categoria': categoria,
-                            'valor': valor,
-                            'fonte': fonte,
-                            'codigo': codigo,
-                            'tipo_lancamento': tipo_lancamento,
-                            'arquivo_origem': nome_arquivo
-                        })
-            except Exception:
-                continue
-    
-    return receitas, descontos
+def exibir_resultado_arquivo(resultado, indice):
+    """Mostra mensagens e debug de um arquivo processado no lote"""
+    with st.expander(f"📄 {resultado['nome_arquivo']}"):
+        exibir_mensagens(resultado['mensagens'])
+        debug_texto_extraido(resultado['preview_texto'], resultado['total_caracteres'], key=f"debug_texto_{indice}")
 
-def remover_duplicatas_receitas(receitas):
-    """Remove receitas duplicadas"""
-    if not receitas:
-        return []
-    
-    receitas_unicas = {}
-    
-    for receita in receitas:
-        chave = f"{receita['data']}_{receita['descricao']}_{receita['valor']}_{receita.get('codigo', '')}"
-        if chave not in receitas_unicas:
-            receitas_unicas[chave] = receita
-    
-    return list(receitas_unicas.values())
+@st.cache_resource
+def obter_cache_lancamentos():
+    """Cópia em memória das tabelas, compartilhada pelas sessões do processo"""
+    return CacheLancamentos()
 
-@st.cache_data
 def carregar_dados():
-    """Carrega dados do banco"""
-    # Inicializar banco se não existir
-    if not os.path.exists(DB_PATH):
-        init_database()
+    """Carrega as receitas e os arquivos processados do banco
+    
+    Só as linhas inseridas desde a última chamada são lidas; a tabela é relida
+    inteira quando houve UPDATE ou DELETE (versão em controle_alteracoes). As
+    transações não são carregadas: suas páginas consultam o banco (totais,
+    resumos mensais e páginas de resultados).
+    """
+    # Inicializar banco (ou atualizar o esquema) se ainda não foi feito neste processo
+    preparar_banco()
     
     conn = get_db_connection()
     if not conn:
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
     
     try:
-        # Carregar transações (despesas)
-        df_transacoes = pd.read_sql_query(
-            "SELECT * FROM transacoes ORDER BY data DESC", 
-            conn
-        )
-        
-        # Carregar receitas
-        df_receitas = pd.read_sql_query(
-            "SELECT * FROM receitas ORDER BY data DESC", 
-            conn
-        )
-        
-        # Carregar arquivos processados
-        df_arquivos = pd.read_sql_query(
-            "SELECT * FROM arquivos_processados ORDER BY data_processamento DESC", 
-            conn
-        )
-        
-        # Converter colunas de data
-        if not df_transacoes.empty:
-            df_transacoes['data'] = pd.to_datetime(df_transacoes['data']).dt.date
-        
-        if not df_receitas.empty:
-            df_receitas['data'] = pd.to_datetime(df_receitas['data']).dt.date
-        
-        return df_transacoes, df_receitas, df_arquivos
+        return obter_cache_lancamentos().atualizar(conn, ('receitas',))
         
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
     finally:
         conn.close()
 
-def salvar_transacoes(transacoes, nome_arquivo, hash_arquivo):
-    """Salva transações no banco de dados"""
-    if not transacoes:
-        return 0
-    
+@st.cache_data
+def consultar_agregacoes(marcas):
+    """Agregações calculadas no banco, refeitas só quando as marcas d'água mudam"""
     conn = get_db_connection()
     if not conn:
-        return 0
-    
+        return None
     try:
-        cursor = conn.cursor()
-        transacoes_salvas = 0
-        
-        for transacao in transacoes:
-            try:
-                cursor.execute('''
-                    INSERT INTO transacoes (data, estabelecimento, categoria, valor, cartao, arquivo_origem)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    transacao['data'],
-                    transacao['estabelecimento'],
-                    transacao['categoria'],
-                    transacao['valor'],
-                    transacao['cartao'],
-                    transacao['arquivo_origem']
-                ))
-                transacoes_salvas += 1
-            except Exception as e:
-                st.error(f"Erro ao salvar transação: {e}")
-                continue
-        
-        # Registrar arquivo processado
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO arquivos_processados 
-                (nome_arquivo, hash_arquivo, tipo_arquivo, total_transacoes)
-                VALUES (?, ?, ?, ?)
-            ''', (nome_arquivo, hash_arquivo, 'fatura', transacoes_salvas))
-        except Exception as e:
-            st.error(f"Erro ao registrar arquivo: {e}")
-        
-        conn.commit()
-        return transacoes_salvas
-        
-    except Exception as e:
-        st.error(f"Erro ao salvar transações: {e}")
-        return 0
+        return agregar_lancamentos(conn)
     finally:
         conn.close()
 
-def salvar_receitas(receitas, nome_arquivo, hash_arquivo):
-    """Salva receitas no banco de dados"""
-    if not receitas:
-        return 0
+def carregar_agregacoes():
+    """Totais e agrupamentos do Dashboard e do Resultado Financeiro (GROUP BY no SQLite)"""
+    preparar_banco()
     
     conn = get_db_connection()
     if not conn:
-        return 0
+        return None
     
     try:
-        cursor = conn.cursor()
-        receitas_salvas = 0
-        
-        for receita in receitas:
-            try:
-                cursor.execute('''
-                    INSERT INTO receitas (data, descricao, categoria, valor, fonte, codigo, tipo_lancamento, arquivo_origem)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    receita['data'],
-                    receita['descricao'],
-                    receita['categoria'],
-                    receita['valor'],
-                    receita['fonte'],
-                    receita.get('codigo', ''),
-                    receita.get('tipo_lancamento', 'credito'),
-                    receita['arquivo_origem']
-                ))
-                receitas_salvas += 1
-            except Exception as e:
-                st.error(f"Erro ao salvar receita: {e}")
-                continue
-        
-        # Registrar arquivo processado
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO arquivos_processados 
-                (nome_arquivo, hash_arquivo, tipo_arquivo, total_transacoes)
-                VALUES (?, ?, ?, ?)
-            ''', (nome_arquivo, hash_arquivo, 'contracheque', receitas_salvas))
-        except Exception as e:
-            st.error(f"Erro ao registrar arquivo: {e}")
-        
-        conn.commit()
-        return receitas_salvas
-        
+        marcas = ler_marcas(conn)
     except Exception as e:
-        st.error(f"Erro ao salvar receitas: {e}")
+        st.error(f"Erro ao carregar dados: {e}")
+        return None
+    finally:
+        conn.close()
+    return consultar_agregacoes(marcas)
+
+def salvar_arquivo(resultado):
+    """Salva os lançamentos de um arquivo processado em uma única transação
+    
+    Retorna o total de lançamentos gravados; os que já existiam no banco
+    (vindos de outro arquivo) são ignorados e contados, e os erros
+    encontrados aparecem juntos em um único aviso.
+    """
+    conn = get_db_connection(escrita=True)
+    if not conn:
         return 0
+    
+    try:
+        relatorio = salvar_lancamentos_arquivo(
+            conn,
+            resultado['nome_arquivo'],
+            resultado['hash_arquivo'],
+            resultado['tipo_arquivo'],
+            transacoes=resultado['transacoes'] + resultado['descontos'],
+            receitas=resultado['receitas']
+        )
     finally:
         conn.close()
+    sincronizar_marcas()
+    
+    if relatorio['duplicados']:
+        st.info(
+            f"♻️ {resultado['nome_arquivo']}: {relatorio['duplicados']} lançamento(s) já existiam "
+            f"no banco (outro arquivo) e foram ignorados"
+        )
+    
+    if relatorio['erros']:
+        with st.expander(f"⚠️ {resultado['nome_arquivo']}: {len(relatorio['erros'])} problema(s) ao salvar"):
+            st.warning("\n".join(f"- {erro}" for erro in relatorio['erros']))
+    
+    return relatorio['transacoes'] + relatorio['receitas']
 
 def limpar_cache():
-    """Limpa o cache do Streamlit"""
+    """Limpa o cache do Streamlit e força a releitura completa das tabelas"""
     st.cache_data.clear()
+    obter_cache_lancamentos().invalidar()
 
 def verificar_arquivo_processado(file_hash):
     """Verifica se arquivo já foi processado"""
@@ -1014,45 +510,81 @@ def verificar_arquivo_processado(file_hash):
     finally:
         conn.close()
 
-def obter_meses_disponiveis(df_receitas):
-    """Obtém lista de meses disponíveis nos dados"""
-    if df_receitas.empty:
-        return []
-    
-    df_receitas['mes_ano'] = pd.to_datetime(df_receitas['data']).dt.strftime('%Y-%m')
-    meses = sorted(df_receitas['mes_ano'].unique(), reverse=True)
-    return meses
+def consultar_banco(consulta, *args, **kwargs):
+    """Executa uma consulta do banco_dados (resumos, lançamentos do mês) em uma conexão de leitura"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        return consulta(conn, *args, **kwargs)
+    except Exception as e:
+        st.error(f"Erro ao consultar banco de dados: {e}")
+        return None
+    finally:
+        conn.close()
 
-def filtrar_dados_por_mes(df_receitas, mes_selecionado):
-    """Filtra dados por mês específico"""
-    if df_receitas.empty or not mes_selecionado:
-        return df_receitas
-    
-    df_receitas['mes_ano'] = pd.to_datetime(df_receitas['data']).dt.strftime('%Y-%m')
-    return df_receitas[df_receitas['mes_ano'] == mes_selecionado]
+def obter_meses_disponiveis():
+    """Obtém lista de meses disponíveis nos dados (do resumo mensal de receitas)"""
+    meses = consultar_banco(listar_meses_receitas) or []
+    return [formatar_ano_mes(ano_mes) for ano_mes in meses]
 
-def calcular_acumulado_anual(df_receitas):
-    """Calcula totais acumulados por rubrica/código no ano"""
-    if df_receitas.empty:
-        return pd.DataFrame()
-    
-    # Filtrar apenas dados do ano atual
+def filtrar_dados_por_mes(mes_selecionado):
+    """Receitas e descontos de um mês ('AAAA-MM'), buscados pelo índice de ano_mes"""
+    ano_mes = int(mes_selecionado.replace('-', ''))
+    df_mes = consultar_banco(consultar_lancamentos_mes, 'receitas', ano_mes, ano_mes)
+    return df_mes if df_mes is not None else pd.DataFrame()
+
+def calcular_acumulado_anual():
+    """Calcula totais acumulados por rubrica/código no ano (a partir do resumo mensal)"""
+    # Apenas os meses do ano atual, já ordenados por valor decrescente
     ano_atual = datetime.now().year
-    df_ano = df_receitas[pd.to_datetime(df_receitas['data']).dt.year == ano_atual]
+    acumulado = consultar_banco(totais_receitas_por_rubrica, ano_atual * 100 + 1, ano_atual * 100 + 12)
     
-    if df_ano.empty:
+    if acumulado is None or acumulado.empty:
         return pd.DataFrame()
     
-    # Agrupar por código e categoria
-    acumulado = df_ano.groupby(['codigo', 'categoria', 'tipo_lancamento']).agg({
-        'valor': 'sum',
-        'descricao': 'first'
-    }).reset_index()
-    
-    # Ordenar por valor decrescente
-    acumulado = acumulado.sort_values('valor', ascending=False)
-    
-    return acumulado
+    # Lançamentos sem código não entram no acumulado por rubrica
+    return acumulado[acumulado['codigo'] != ''].reset_index(drop=True)
+
+def ler_marcas_banco():
+    """Marcas d'água atuais do banco (None se não for possível lê-las)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        return ler_marcas(conn)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+def sincronizar_marcas():
+    """Registra as marcas atuais como já vistas pela sessão
+    
+    Chamada depois das gravações feitas pela própria página (upload,
+    recategorização), para que acompanhar_novos_dados não recarregue a
+    página por causa delas e apague os resultados exibidos.
+    """
+    marcas = ler_marcas_banco()
+    if marcas is not None:
+        st.session_state['marcas_banco'] = marcas
+
+@st.fragment(run_every=INTERVALO_ATUALIZACAO_SEGUNDOS)
+def acompanhar_novos_dados():
+    """Recarrega a página quando as marcas d'água do banco mudam
+    
+    Lançamentos gravados por outro processo (o vigia da pasta ou o
+    importador em lote) aparecem sem clique; como os caches são indexados
+    pelas marcas, só o que depende das tabelas alteradas é refeito.
+    """
+    marcas = ler_marcas_banco()
+    if marcas is None:
+        return
+    
+    marcas_anteriores = st.session_state.get('marcas_banco')
+    st.session_state['marcas_banco'] = marcas
+    if marcas_anteriores is not None and marcas != marcas_anteriores:
+        st.rerun()
 
 def verificar_colunas_existem(df, colunas_necessarias):
     """Verifica se as colunas necessárias existem no DataFrame"""
@@ -1072,12 +604,11 @@ def main():
     st.markdown("Sistema inteligente de análise financeira com upload automático de faturas")
     
     # Inicializar banco de dados
-    if not os.path.exists(DB_PATH):
-        with st.spinner("🔄 Inicializando banco de dados..."):
-            init_database()
+    with st.spinner("🔄 Inicializando banco de dados..."):
+        preparar_banco()
     
     # Carregar dados
-    df_transacoes, df_receitas, df_arquivos = carregar_dados()
+    df_receitas, df_arquivos = carregar_dados()
     
     # Sidebar para navegação
     st.sidebar.title("📊 Navegação")
@@ -1096,6 +627,8 @@ def main():
             "⚙️ Configurações"
         ]
     )
+    if st.sidebar.toggle("🔄 Atualização automática", value=True, help="Mostra os lançamentos gravados fora da página (pasta vigiada, importação em lote) em poucos segundos"):
+        acompanhar_novos_dados()
     
     if opcao == "📤 Upload de Faturas":
         st.header("📤 Upload de Faturas")
@@ -1106,44 +639,46 @@ def main():
             st.markdown("### 📄 Faça upload de suas faturas em PDF")
             st.markdown("Suporte para cartões: Azul, Santander, Caixa Elo, Caixa Visa, Samsung")
             
-            uploaded_file = st.file_uploader(
-                "Escolha um arquivo PDF",
+            uploaded_files = st.file_uploader(
+                "Escolha um ou mais arquivos PDF",
                 type="pdf",
-                help="Selecione a fatura do seu cartão de crédito em formato PDF"
+                accept_multiple_files=True,
+                help="Selecione as faturas dos seus cartões de crédito em formato PDF"
             )
             
-            if uploaded_file is not None:
-                file_bytes = uploaded_file.read()
-                file_hash = calcular_hash_arquivo(file_bytes)
+            if uploaded_files and st.button(f"🚀 Processar {len(uploaded_files)} fatura(s)"):
+                resultados = processar_lote_pdfs(uploaded_files, 'fatura')
                 
-                # Verificar se arquivo já foi processado
-                arquivo_existente = verificar_arquivo_processado(file_hash)
+                # Juntar os resultados de todos os arquivos antes de salvar
+                transacoes_lote = []
+                total_salvas = 0
                 
-                if arquivo_existente:
-                    st.error(f"❌ Arquivo já foi processado anteriormente: {arquivo_existente}")
-                else:
-                    # Processar arquivo
-                    with st.spinner("🔄 Processando fatura..."):
-                        transacoes = processar_pdf_fatura(file_bytes, uploaded_file.name)
+                for indice, resultado in enumerate(resultados):
+                    exibir_resultado_arquivo(resultado, indice)
                     
-                    if transacoes:
-                        transacoes_salvas = salvar_transacoes(transacoes, uploaded_file.name, file_hash)
-                        limpar_cache()  # Limpar cache para atualizar dados
-                        
-                        st.success(f"✅ Fatura processada com sucesso! {transacoes_salvas} transações adicionadas.")
-                        
-                        # Mostrar preview das transações
-                        st.subheader("💳 Preview das Transações")
-                        df_preview = pd.DataFrame(transacoes)
-                        df_preview['valor'] = df_preview['valor'].apply(lambda x: f"R$ {x:,.2f}")
-                        st.dataframe(df_preview, use_container_width=True)
+                    if resultado['transacoes']:
+                        transacoes_lote.extend(resultado['transacoes'])
                     else:
-                        st.error("❌ Não foi possível extrair transações do arquivo. Verifique se é uma fatura válida.")
+                        st.error(f"❌ {resultado['nome_arquivo']}: não foi possível extrair transações do arquivo. Verifique se é uma fatura válida.")
+                
+                for resultado in resultados:
+                    if resultado['transacoes']:
+                        total_salvas += salvar_arquivo(resultado)
+                
+                if transacoes_lote:
+                    # Sem limpar cache: carregar_dados traz só as linhas novas na próxima execução
+                    st.success(f"✅ {len([r for r in resultados if r['transacoes']])} fatura(s) processada(s) com sucesso! {total_salvas} transações adicionadas.")
+                    
+                    # Mostrar preview das transações
+                    st.subheader("💳 Preview das Transações")
+                    df_preview = pd.DataFrame(transacoes_lote)
+                    df_preview['valor'] = df_preview['valor'].apply(lambda x: f"R$ {x:,.2f}")
+                    st.dataframe(df_preview, use_container_width=True)
         
         with col2:
             st.markdown("### 💡 Como funciona:")
             st.markdown("""
-            1. **📤 Upload**: Envie sua fatura em PDF
+            1. **📤 Upload**: Envie uma ou mais faturas em PDF
             2. **🔍 Extração**: Sistema extrai transações automaticamente
             3. **🏷️ Categorização**: Gastos são categorizados inteligentemente
             4. **🔄 Detecção**: Evita duplicatas automaticamente
@@ -1151,10 +686,11 @@ def main():
             """)
             
             st.markdown("### 📊 Estatísticas")
-            if not df_transacoes.empty:
-                st.metric("Total de Transações", len(df_transacoes))
+            agregacoes = carregar_agregacoes()
+            if agregacoes and agregacoes['quantidade_transacoes']:
+                st.metric("Total de Transações", agregacoes['quantidade_transacoes'])
                 st.metric("Faturas Processadas", len(df_arquivos[df_arquivos['tipo_arquivo'] == 'fatura']) if 'tipo_arquivo' in df_arquivos.columns else 0)
-                st.metric("Total Gasto", f"R$ {df_transacoes['valor'].sum():,.2f}")
+                st.metric("Total Gasto", f"R$ {agregacoes['total_gastos']:,.2f}")
             else:
                 st.info("📤 Faça upload de faturas para ver estatísticas")
     
@@ -1177,60 +713,54 @@ def main():
                 Todos os demais códigos (21201, 31143, 4313, 4325, etc.)
                 """)
             
-            uploaded_file = st.file_uploader(
-                "Escolha um contracheque PDF",
+            uploaded_files = st.file_uploader(
+                "Escolha um ou mais contracheques PDF",
                 type="pdf",
-                help="Selecione seu contracheque em formato PDF"
+                accept_multiple_files=True,
+                help="Selecione seus contracheques em formato PDF"
             )
             
-            if uploaded_file is not None:
-                file_bytes = uploaded_file.read()
-                file_hash = calcular_hash_arquivo(file_bytes)
+            if uploaded_files and st.button(f"🚀 Processar {len(uploaded_files)} contracheque(s)"):
+                resultados = processar_lote_pdfs(uploaded_files, 'contracheque')
                 
-                # Verificar se arquivo já foi processado
-                arquivo_existente = verificar_arquivo_processado(file_hash)
+                # Juntar os resultados de todos os arquivos antes de salvar
+                receitas_lote = []
                 
-                if arquivo_existente:
-                    st.error(f"❌ Arquivo já foi processado anteriormente: {arquivo_existente}")
-                else:
-                    # Processar arquivo
-                    with st.spinner("🔄 Processando contracheque..."):
-                        receitas, descontos = processar_pdf_contracheque(file_bytes, uploaded_file.name)
-                    
-                    total_processados = 0
-                    
-                    if receitas:
-                        receitas_salvas = salvar_receitas(receitas, uploaded_file.name, file_hash)
-                        total_processados += receitas_salvas
+                for indice, resultado in enumerate(resultados):
+                    exibir_resultado_arquivo(resultado, indice)
                     
-                    if descontos:
-                        descontos_salvos = salvar_transacoes(descontos, uploaded_file.name, file_hash)
-                        total_processados += descontos_salvos
+                    if resultado['receitas'] or resultado['descontos']:
+                        receitas_lote.extend(resultado['receitas'])
+                    else:
+                        st.error(f"❌ {resultado['nome_arquivo']}: não foi possível extrair dados do arquivo. Verifique se é um contracheque válido.")
+                
+                total_processados = 0
+                
+                for resultado in resultados:
+                    if resultado['receitas'] or resultado['descontos']:
+                        total_processados += salvar_arquivo(resultado)
+                
+                if total_processados > 0:
+                    # Sem limpar cache: carregar_dados traz só as linhas novas na próxima execução
+                    st.success(f"✅ {len([r for r in resultados if r['receitas'] or r['descontos']])} contracheque(s) processado(s) com sucesso! {total_processados} lançamentos adicionados.")
                     
-                    if total_processados > 0:
-                        limpar_cache()  # Limpar cache para atualizar dados
-                        
-                        st.success(f"✅ Contracheque processado com sucesso! {total_processados} lançamentos adicionados.")
+                    # Mostrar preview das receitas
+                    if receitas_lote:
+                        st.subheader("💵 Preview dos Lançamentos")
+                        df_preview_receitas = pd.DataFrame(receitas_lote)
+                        df_preview_receitas['valor'] = df_preview_receitas['valor'].apply(lambda x: f"R$ {x:,.2f}")
                         
-                        # Mostrar preview das receitas
-                        if receitas:
-                            st.subheader("💵 Preview dos Lançamentos")
-                            df_preview_receitas = pd.DataFrame(receitas)
-                            df_preview_receitas['valor'] = df_preview_receitas['valor'].apply(lambda x: f"R$ {x:,.2f}")
-                            
-                            # Verificar colunas existentes
-                            colunas_preview = verificar_colunas_existem(df_preview_receitas, ['codigo', 'descricao', 'categoria', 'tipo_lancamento', 'valor'])
-                            if colunas_preview:
-                                st.dataframe(df_preview_receitas[colunas_preview], use_container_width=True)
-                            else:
-                                st.dataframe(df_preview_receitas, use_container_width=True)
-                    else:
-                        st.error("❌ Não foi possível extrair dados do arquivo. Verifique se é um contracheque válido.")
+                        # Verificar colunas existentes
+                        colunas_preview = verificar_colunas_existem(df_preview_receitas, ['codigo', 'descricao', 'categoria', 'tipo_lancamento', 'valor'])
+                        if colunas_preview:
+                            st.dataframe(df_preview_receitas[colunas_preview], use_container_width=True)
+                        else:
+                            st.dataframe(df_preview_receitas, use_container_width=True)
         
         with col2:
             st.markdown("### 💡 Como funciona:")
             st.markdown("""
-            1. **📤 Upload**: Envie seu contracheque em PDF
+            1. **📤 Upload**: Envie um ou mais contracheques em PDF
             2. **🔍 Extração**: Sistema extrai receitas automaticamente
             3. **🏷️ Categorização**: Receitas são categorizadas por código
             4. **🔄 Classificação**: Créditos vs Débitos conforme regras
@@ -1256,7 +786,7 @@ def main():
             return
         
         # Filtro por mês
-        meses_disponiveis = obter_meses_disponiveis(df_receitas)
+        meses_disponiveis = obter_meses_disponiveis()
         
         if not meses_disponiveis:
             st.info("📅 Nenhum mês disponível para análise.")
@@ -1271,13 +801,20 @@ def main():
                 index=1 if len(meses_disponiveis) > 0 else 0
             )
         
-        # Filtrar dados
+        # Filtrar dados (totais vêm do resumo mensal; as linhas, só para as tabelas)
         if mes_selecionado != 'Todos os meses':
-            df_mes = filtrar_dados_por_mes(df_receitas, mes_selecionado)
+            df_mes = filtrar_dados_por_mes(mes_selecionado)
+            ano_mes = int(mes_selecionado.replace('-', ''))
+            resumo_mes = consultar_banco(totais_receitas_por_rubrica, ano_mes, ano_mes)
             st.subheader(f"📊 Análise de {mes_selecionado}")
         else:
-            df_mes = df_receitas
+            df_mes = consultar_banco(consultar_lancamentos_mes, 'receitas', 0, 999912)
+            if df_mes is None:
+                df_mes = pd.DataFrame()
+            resumo_mes = consultar_banco(totais_receitas_por_rubrica, 0, 999912)
             st.subheader("📊 Análise Geral")
+        if resumo_mes is None:
+            resumo_mes = pd.DataFrame(columns=['codigo', 'categoria', 'tipo_lancamento', 'valor'])
         
         if df_mes.empty:
             st.info("📅 Nenhum dado encontrado para o período selecionado.")
@@ -1287,15 +824,18 @@ def main():
         df_creditos = df_mes[df_mes.get('tipo_lancamento', 'credito') == 'credito'] if 'tipo_lancamento' in df_mes.columns else df_mes
         df_debitos = df_mes[df_mes.get('tipo_lancamento', 'credito') == 'debito'] if 'tipo_lancamento' in df_mes.columns else pd.DataFrame()
         
+        resumo_creditos = resumo_mes[resumo_mes['tipo_lancamento'] == 'credito']
+        resumo_debitos = resumo_mes[resumo_mes['tipo_lancamento'] == 'debito']
+        
         # Métricas do mês
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_creditos = df_creditos['valor'].sum()
+            total_creditos = resumo_creditos['valor'].sum()
             st.metric("💰 Total Créditos", f"R$ {total_creditos:,.2f}")
         
         with col2:
-            total_debitos = df_debitos['valor'].sum() if not df_debitos.empty else 0
+            total_debitos = resumo_debitos['valor'].sum()
             st.metric("💸 Total Débitos", f"R$ {total_debitos:,.2f}")
         
         with col3:
@@ -1347,9 +887,9 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            if not df_creditos.empty:
+            if not resumo_creditos.empty:
                 st.subheader("🥧 Créditos por Categoria")
-                creditos_categoria = df_creditos.groupby('categoria')['valor'].sum().reset_index()
+                creditos_categoria = resumo_creditos.groupby('categoria')['valor'].sum().reset_index()
                 fig_creditos = px.pie(
                     creditos_categoria,
                     values='valor',
@@ -1359,9 +899,9 @@ def main():
                 st.plotly_chart(fig_creditos, use_container_width=True)
         
         with col2:
-            if not df_debitos.empty:
+            if not resumo_debitos.empty:
                 st.subheader("🥧 Débitos por Categoria")
-                debitos_categoria = df_debitos.groupby('categoria')['valor'].sum().reset_index()
+                debitos_categoria = resumo_debitos.groupby('categoria')['valor'].sum().reset_index()
                 fig_debitos = px.pie(
                     debitos_categoria,
                     values='valor',
@@ -1378,7 +918,7 @@ def main():
             return
         
         # Calcular acumulado anual
-        df_acumulado = calcular_acumulado_anual(df_receitas)
+        df_acumulado = calcular_acumulado_anual()
         
         if df_acumulado.empty:
             st.info("📅 Nenhum dado encontrado para o ano atual.")
@@ -1484,27 +1024,30 @@ def main():
     elif opcao == "📈 Dashboard":
         st.header("📈 Dashboard Financeiro")
         
-        if df_transacoes.empty:
+        agregacoes = carregar_agregacoes()
+        if not agregacoes or agregacoes['quantidade_transacoes'] == 0:
             st.info("📤 Nenhuma transação encontrada. Faça upload de suas faturas para ver o dashboard.")
             return
         
+        gastos_categoria = agregacoes['gastos_categoria']
+        
         # Métricas principais
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_gastos = df_transacoes['valor'].sum()
+            total_gastos = agregacoes['total_gastos']
             st.metric("💰 Total de Gastos", f"R$ {total_gastos:,.2f}")
         
         with col2:
-            total_transacoes = len(df_transacoes)
+            total_transacoes = agregacoes['quantidade_transacoes']
             st.metric("📊 Total de Transações", total_transacoes)
         
         with col3:
-            valor_medio = df_transacoes['valor'].mean()
+            valor_medio = agregacoes['valor_medio']
             st.metric("📈 Valor Médio", f"R$ {valor_medio:,.2f}")
         
         with col4:
-            categoria_principal = df_transacoes.groupby('categoria')['valor'].sum().idxmax()
+            categoria_principal = gastos_categoria.loc[gastos_categoria['valor'].idxmax(), 'categoria']
             st.metric("🏆 Categoria Principal", categoria_principal)
         
         # Gráficos
@@ -1513,7 +1056,6 @@ def main():
         with col1:
             # Gráfico de pizza por categoria
             st.subheader("🥧 Gastos por Categoria")
-            gastos_categoria = df_transacoes.groupby('categoria')['valor'].sum().reset_index()
             fig_pizza = px.pie(
                 gastos_categoria,
                 values='valor',
@@ -1525,7 +1067,7 @@ def main():
         with col2:
             # Gráfico de barras por cartão
             st.subheader("💳 Gastos por Cartão")
-            gastos_cartao = df_transacoes.groupby('cartao')['valor'].sum().reset_index()
+            gastos_cartao = agregacoes['gastos_cartao']
             fig_barras = px.bar(
                 gastos_cartao,
                 x='cartao',
@@ -1537,12 +1079,11 @@ def main():
         # Análise temporal
         st.subheader("📅 Análise Temporal")
         
-        # Adicionar coluna de mês/ano
-        df_transacoes['mes_ano'] = pd.to_datetime(df_transacoes['data']).dt.to_period('M')
-        df_transacoes['mes'] = pd.to_datetime(df_transacoes['data']).dt.strftime('%Y-%m')
+        # Totais por mês e categoria já vêm agrupados do banco
+        gastos_mes_categoria = agregacoes['gastos_mes_categoria']
         
         # Evolução mensal
-        evolucao_mensal = df_transacoes.groupby('mes')['valor'].sum().reset_index()
+        evolucao_mensal = gastos_mes_categoria.groupby('mes')['valor'].sum().reset_index()
         fig_evolucao = px.line(
             evolucao_mensal,
             x='mes',
@@ -1555,7 +1096,7 @@ def main():
         
         # Heatmap categoria x mês
         st.subheader("🔥 Heatmap: Gastos por Categoria e Mês")
-        heatmap_data = df_transacoes.pivot_table(
+        heatmap_data = gastos_mes_categoria.pivot_table(
             values='valor',
             index='categoria',
             columns='mes',
@@ -1574,10 +1115,13 @@ def main():
     elif opcao == "📊 Resultado Financeiro":
         st.header("📊 Resultado Financeiro")
         
-        # Calcular totais
-        total_receitas = df_receitas[df_receitas.get('tipo_lancamento', 'credito') == 'credito']['valor'].sum() if not df_receitas.empty and 'tipo_lancamento' in df_receitas.columns else (df_receitas['valor'].sum() if not df_receitas.empty else 0)
-        total_despesas = df_transacoes['valor'].sum() if not df_transacoes.empty else 0
-        total_descontos = df_receitas[df_receitas.get('tipo_lancamento', 'credito') == 'debito']['valor'].sum() if not df_receitas.empty and 'tipo_lancamento' in df_receitas.columns else 0
+        # Calcular totais (somas feitas no banco)
+        agregacoes = carregar_agregacoes()
+        if not agregacoes:
+            return
+        total_receitas = agregacoes['total_creditos']
+        total_despesas = agregacoes['total_gastos']
+        total_descontos = agregacoes['total_debitos']
         
         resultado_liquido = total_receitas - total_despesas - total_descontos
         
@@ -1661,59 +1205,87 @@ def main():
     elif opcao == "📋 Transações":
         st.header("📋 Histórico de Transações")
         
-        if df_transacoes.empty:
+        # Filtros, totais e a página exibida são consultados no banco
+        opcoes = consultar_banco(opcoes_filtro_transacoes)
+        totais_gerais = consultar_banco(totais_transacoes)
+        if not opcoes or not totais_gerais or totais_gerais[0] == 0:
             st.info("📤 Nenhuma transação encontrada. Faça upload de suas faturas.")
             return
+        categorias_existentes, cartoes_existentes = opcoes
         
         # Filtros
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            categorias = ['Todas'] + list(df_transacoes['categoria'].unique())
+            categorias = ['Todas'] + categorias_existentes
             categoria_filtro = st.selectbox("Filtrar por Categoria", categorias)
         
         with col2:
-            cartoes = ['Todos'] + list(df_transacoes['cartao'].unique())
+            cartoes = ['Todos'] + cartoes_existentes
             cartao_filtro = st.selectbox("Filtrar por Cartão", cartoes)
         
         with col3:
             valor_min = st.number_input("Valor Mínimo (R$)", min_value=0.0, value=0.0)
         
-        # Aplicar filtros
-        df_filtrado = df_transacoes.copy()
+        texto_busca = st.text_input(
+            "🔎 Buscar estabelecimento",
+            placeholder="Ex.: posto shell, farm, uber",
+            help="Busca por início de palavra, sem diferenciar acentos; resultados mais relevantes primeiro"
+        )
         
-        if categoria_filtro != 'Todas':
-            df_filtrado = df_filtrado[df_filtrado['categoria'] == categoria_filtro]
+        filtros = {
+            'categoria': categoria_filtro if categoria_filtro != 'Todas' else None,
+            'cartao': cartao_filtro if cartao_filtro != 'Todos' else None,
+            'valor_minimo': valor_min,
+            'texto_busca': texto_busca
+        }
+        total_filtrado, soma_filtrada = consultar_banco(totais_transacoes, **filtros) or (0, 0)
         
-        if cartao_filtro != 'Todos':
-            df_filtrado = df_filtrado[df_filtrado['cartao'] == cartao_filtro]
+        # Paginação
+        col1, col2 = st.columns([1, 3])
         
-        if valor_min > 0:
-            df_filtrado = df_filtrado[df_filtrado['valor'] >= valor_min]
+        with col1:
+            tamanho_pagina = st.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1)
         
-        # Mostrar resultados
-        st.write(f"📊 Mostrando {len(df_filtrado)} de {len(df_transacoes)} transações")
+        total_paginas = max(1, -(-total_filtrado // tamanho_pagina))
         
-        # Formatação da tabela
-        df_display = df_filtrado.copy()
-        df_display['valor'] = df_display['valor'].apply(lambda x: f"R$ {x:,.2f}")
-        df_display['data'] = pd.to_datetime(df_display['data']).dt.strftime('%d/%m/%Y')
+        with col2:
+            pagina = st.number_input(
+                f"Página (de {total_paginas})", min_value=1, value=1, step=1, key="transacoes_pagina"
+            )
+            pagina = min(int(pagina), total_paginas)
+        
+        df_pagina = consultar_banco(pagina_transacoes, pagina, tamanho_pagina, **filtros)
+        if df_pagina is None:
+            df_pagina = pd.DataFrame(columns=['data', 'estabelecimento', 'categoria', 'valor', 'cartao'])
+        
+        # Mostrar resultados
+        inicio = (pagina - 1) * tamanho_pagina
+        st.write(
+            f"📊 Mostrando {inicio + 1 if len(df_pagina) else 0}–{inicio + len(df_pagina)} de "
+            f"{total_filtrado} transações filtradas ({totais_gerais[0]} no total)"
+        )
         
+        # Formatação feita pelo navegador, sem converter valores em texto
         st.dataframe(
-            df_display[['data', 'estabelecimento', 'categoria', 'valor', 'cartao']],
+            df_pagina,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                'data': st.column_config.DateColumn("data", format="DD/MM/YYYY"),
+                'valor': st.column_config.NumberColumn("valor", format="R$ %.2f")
+            }
         )
         
         # Estatísticas do filtro
-        if not df_filtrado.empty:
+        if total_filtrado:
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Filtrado", f"R$ {df_filtrado['valor'].sum():,.2f}")
+                st.metric("Total Filtrado", f"R$ {soma_filtrada:,.2f}")
             with col2:
-                st.metric("Transações", len(df_filtrado))
+                st.metric("Transações", total_filtrado)
             with col3:
-                st.metric("Valor Médio", f"R$ {df_filtrado['valor'].mean():,.2f}")
+                st.metric("Valor Médio", f"R$ {soma_filtrada / total_filtrado:,.2f}")
     
     elif opcao == "💵 Receitas":
         st.header("💵 Histórico de Receitas")
@@ -1736,9 +1308,25 @@ def main():
         with col3:
             valor_min = st.number_input("Valor Mínimo (R$)", min_value=0.0, value=0.0, key="receitas_valor_min")
         
+        texto_busca = st.text_input(
+            "🔎 Buscar descrição",
+            placeholder="Ex.: salario, imposto renda",
+            help="Busca por início de palavra, sem diferenciar acentos; resultados mais relevantes primeiro",
+            key="receitas_busca"
+        )
+        
         # Aplicar filtros
         df_receitas_filtrado = df_receitas.copy()
         
+        if texto_busca.strip():
+            # ids em ordem de relevância, vindos do índice de texto
+            ids_encontrados = consultar_banco(buscar_lancamentos, 'receitas', texto_busca) or []
+            posicao = {id_receita: ordem for ordem, id_receita in enumerate(ids_encontrados)}
+            df_receitas_filtrado = df_receitas_filtrado[df_receitas_filtrado['id'].isin(posicao)]
+            df_receitas_filtrado = df_receitas_filtrado.sort_values(
+                'id', key=lambda ids: ids.map(posicao), kind='stable'
+            )
+        
         if categoria_filtro != 'Todas':
             df_receitas_filtrado = df_receitas_filtrado[df_receitas_filtrado['categoria'] == categoria_filtro]
         
@@ -1832,7 +1420,7 @@ def main():
             st.warning("⚠️ Esta ação é irreversível!")
             
             if st.button("Limpar Todos os Dados", type="secondary"):
-                conn = get_db_connection()
+                conn = get_db_connection(escrita=True)
                 if conn:
                     try:
                         cursor = conn.cursor()
@@ -1848,12 +1436,195 @@ def main():
                     finally:
                         conn.close()
         
+        st.subheader("🏷️ Regras de Categorização")
+        regras_categoria = obter_regras_categoria()
+        if regras_categoria is None:
+            st.error("❌ Não foi possível ler as regras de categorização")
+        else:
+            st.caption(
+                "Cada palavra-chave contida na descrição define a categoria; havendo mais de uma, "
+                "vence a de menor prioridade. Os overrides valem para o nome exato do estabelecimento "
+                "e têm precedência sobre as palavras-chave. As alterações valem para os próximos arquivos processados."
+            )
+            
+            df_regras = pd.DataFrame(
+                regras_categoria['regras'],
+                columns=['tipo', 'palavra_chave', 'categoria', 'prioridade']
+            )
+            regras_editadas = st.data_editor(
+                df_regras,
+                num_rows="dynamic",
+                use_container_width=True,
+                key=f"editor_regras_{regras_categoria['versao']}",
+                column_config={
+                    'tipo': st.column_config.SelectboxColumn("Tipo", options=list(CATEGORIA_PADRAO), required=True),
+                    'palavra_chave': st.column_config.TextColumn("Palavra-chave", required=True),
+                    'categoria': st.column_config.TextColumn("Categoria", required=True),
+                    'prioridade': st.column_config.NumberColumn("Prioridade", min_value=0, step=1, default=100)
+                }
+            )
+            
+            df_overrides = pd.DataFrame(
+                list(regras_categoria['overrides'].items()),
+                columns=['estabelecimento', 'categoria']
+            )
+            overrides_editados = st.data_editor(
+                df_overrides,
+                num_rows="dynamic",
+                use_container_width=True,
+                key=f"editor_overrides_{regras_categoria['versao']}",
+                column_config={
+                    'estabelecimento': st.column_config.TextColumn("Estabelecimento (nome exato)", required=True),
+                    'categoria': st.column_config.TextColumn("Categoria", required=True)
+                }
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("💾 Salvar Regras"):
+                    if salvar_regras_categoria(regras_editadas, overrides_editados):
+                        st.success("✅ Regras de categorização salvas!")
+                        st.rerun()
+            with col2:
+                if st.button("↩️ Restaurar Regras Padrão"):
+                    df_padrao = pd.DataFrame(
+                        regras_padrao_categoria(),
+                        columns=['tipo', 'palavra_chave', 'categoria', 'prioridade']
+                    )
+                    if salvar_regras_categoria(df_padrao, df_overrides):
+                        st.success("✅ Regras padrão restauradas!")
+                        st.rerun()
+            
+            st.caption("Para aplicar as regras atuais aos lançamentos já importados, use a recategorização abaixo.")
+            if st.button("🔁 Recategorizar Lançamentos Existentes"):
+                with st.spinner("Recategorizando lançamentos..."):
+                    transacoes_alteradas, receitas_alteradas = recategorizar_lancamentos()
+                limpar_cache()
+                sincronizar_marcas()
+                st.success(
+                    f"✅ Recategorização concluída: {transacoes_alteradas} transação(ões) e "
+                    f"{receitas_alteradas} receita(s)/desconto(s) mudaram de categoria."
+                )
+        
+        st.subheader("🧭 Índices e Planos de Consulta")
+        st.caption("Índices gerenciados: " + ", ".join(f"{nome} em {definicao}" for nome, definicao in INDICES.items()))
+        if st.button("Analisar Consultas"):
+            conn = get_db_connection(escrita=True)
+            if conn:
+                try:
+                    with st.spinner("Atualizando estatísticas (ANALYZE)..."):
+                        planos = analisar_consultas(conn)
+                    for plano in planos:
+                        icone = "⚠️" if plano['varredura_completa'] else "✅"
+                        st.markdown(f"{icone} **{plano['consulta']}**")
+                        st.code(plano['sql'] + "\n\n" + "\n".join(plano['plano']), language="sql")
+                except Exception as e:
+                    st.error(f"Erro ao analisar consultas: {e}")
+                finally:
+                    conn.close()
+        
+        st.subheader("🧮 Resumos Mensais")
+        st.caption(
+            "Totais por mês mantidos automaticamente a cada lançamento, usados pelo Dashboard, "
+            "Resultado Financeiro, Análise Mensal e Visão Anual: " + ", ".join(RESUMOS_MENSAIS)
+        )
+        if st.button("Reconstruir Resumos"):
+            conn = get_db_connection(escrita=True)
+            if conn:
+                try:
+                    with st.spinner("Recalculando resumos mensais..."):
+                        linhas = reconstruir_resumos_mensais(conn)
+                    limpar_cache()
+                    st.success("✅ Resumos reconstruídos: " + ", ".join(f"{resumo} ({total} linhas)" for resumo, total in linhas.items()))
+                except Exception as e:
+                    st.error(f"Erro ao reconstruir resumos: {e}")
+                finally:
+                    conn.close()
+        
+        st.subheader("🧬 Possíveis Duplicatas")
+        st.caption(
+            f"Compras de mesmo valor, com até {JANELA_DIAS} dia de diferença e nomes parecidos "
+            f"(similaridade ≥ {LIMIAR_SIMILARIDADE:.0%}), vindas de arquivos diferentes."
+        )
+        if st.button("Procurar Duplicatas"):
+            conn = get_db_connection(escrita=True)
+            if conn:
+                try:
+                    with st.spinner("Comparando transações..."):
+                        pares = detectar_quase_duplicatas(conn)
+                        novos = registrar_pares(conn, pares)
+                    st.success(f"✅ {len(pares)} par(es) encontrado(s), {novos} novo(s) na fila de revisão.")
+                except Exception as e:
+                    st.error(f"Erro ao procurar duplicatas: {e}")
+                finally:
+                    conn.close()
+        
+        df_revisao = consultar_banco(fila_revisao)
+        if df_revisao is not None and not df_revisao.empty:
+            df_revisao.insert(0, 'decisao', 'Pendente')
+            df_revisao['data_a'] = pd.to_datetime(df_revisao['data_a'])
+            df_revisao['data_b'] = pd.to_datetime(df_revisao['data_b'])
+            df_decisoes = st.data_editor(
+                df_revisao,
+                hide_index=True,
+                use_container_width=True,
+                disabled=[coluna for coluna in df_revisao.columns if coluna != 'decisao'],
+                column_config={
+                    'decisao': st.column_config.SelectboxColumn(
+                        "Decisão", options=['Pendente', 'Remover a segunda', 'Manter as duas'], required=True
+                    ),
+                    'id_transacao_a': None,
+                    'id_transacao_b': None,
+                    'similaridade': st.column_config.ProgressColumn("Similaridade", min_value=0, max_value=1, format="%.2f"),
+                    'data_a': st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+                    'data_b': st.column_config.DateColumn("Data (segunda)", format="DD/MM/YYYY"),
+                    'estabelecimento_a': "Estabelecimento",
+                    'estabelecimento_b': "Estabelecimento (segunda)",
+                    'arquivo_a': "Arquivo",
+                    'arquivo_b': "Arquivo (segunda)",
+                    'valor': st.column_config.NumberColumn("Valor", format="R$ %.2f"),
+                    'cartao_a': "Cartão",
+                    'cartao_b': "Cartão (segunda)",
+                },
+                key="revisao_duplicatas"
+            )
+            if st.button("Aplicar Decisões"):
+                def pares_decisao(decisao):
+                    return [
+                        (int(linha.id_transacao_a), int(linha.id_transacao_b))
+                        for linha in df_decisoes[df_decisoes['decisao'] == decisao].itertuples()
+                    ]
+                remover = pares_decisao('Remover a segunda')
+                manter = pares_decisao('Manter as duas')
+                conn = get_db_connection(escrita=True)
+                if conn:
+                    try:
+                        apagadas = aplicar_decisoes(conn, remover, manter)
+                        limpar_cache()
+                        st.success(f"✅ {apagadas} transação(ões) duplicada(s) removida(s), {len(manter)} par(es) mantido(s).")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erro ao aplicar decisões: {e}")
+                    finally:
+                        conn.close()
+        else:
+            st.caption("Nenhum par pendente de revisão.")
+        
+        st.subheader("🗂️ Cache de Texto dos PDFs")
+        total_textos, bytes_textos = estatisticas_cache_texto()
+        st.write(f"**{total_textos}** arquivo(s) em cache ocupando **{bytes_textos / 1024:,.1f} KB** ({CACHE_TEXTO_PATH})")
+        st.caption("Reprocessar um PDF já conhecido reaproveita o texto extraído, sem decodificar o PDF de novo.")
+        if st.button("Limpar Cache de Texto"):
+            limpar_cache_texto()
+            st.success("✅ Cache de texto dos PDFs removido!")
+        
         st.subheader("📊 Informações do Sistema")
+        agregacoes = carregar_agregacoes()
         st.info(f"""
         **Versão**: 7.0 (Correção de Ano + Verificação de Colunas)
         **Banco de Dados**: SQLite ({DB_PATH})
-        **Tabelas**: transacoes, receitas, arquivos_processados
-        **Total de Transações**: {len(df_transacoes)}
+        **Tabelas**: transacoes, receitas, arquivos_processados, regras_categoria, overrides_categoria, {', '.join(RESUMOS_MENSAIS)}, revisao_duplicatas
+        **Total de Transações**: {agregacoes['quantidade_transacoes'] if agregacoes else 0}
         **Total de Receitas**: {len(df_receitas)}
         **Arquivos Processados**: {len(df_arquivos)}
         **Códigos de Crédito**: {', '.join(CODIGOS_CREDITO)}
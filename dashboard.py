@@ -5,6 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
+import threading
 
 st.set_page_config(
     page_title="Dashboard PrimePickz",
@@ -33,7 +34,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+REFRESH_INTERVAL_SECONDS = 15 * 60
+
 def generate_traffic_data():
     end_date = datetime.now()
     start_date = end_date - timedelta(days=180)
@@ -64,7 +66,6 @@ def generate_traffic_data():
     
     return pd.DataFrame(traffic_data)
 
-@st.cache_data
 def generate_affiliate_data():
     products = [
         {'name': 'iPhone 15 Pro', 'category': 'Eletronicos', 'commission_rate': 0.02},
@@ -105,7 +106,6 @@ def generate_affiliate_data():
     
     return pd.DataFrame(affiliate_data)
 
-@st.cache_data
 def generate_content_performance():
     posts = [
         {'title': '12 Livros que Mudam a Vida', 'category': 'Livros', 'publish_date': '2024-08-26'},
@@ -142,7 +142,6 @@ def generate_content_performance():
     
     return pd.DataFrame(content_data)
 
-@st.cache_data
 def generate_seo_data():
     keywords = [
         {'keyword': 'melhores livros 2024', 'position': 3, 'clicks': 1200, 'impressions': 15000},
@@ -171,7 +170,6 @@ def generate_seo_data():
     
     return pd.DataFrame(seo_data)
 
-@st.cache_data
 def generate_traffic_sources():
     sources = [
         {'source': 'Google Organico', 'sessions': 8500, 'percentage': 68.2},
@@ -184,15 +182,62 @@ def generate_traffic_sources():
     
     return pd.DataFrame(sources)
 
+def build_datasets():
+    return {
+        'traffic_data': generate_traffic_data(),
+        'affiliate_data': generate_affiliate_data(),
+        'content_data': generate_content_performance(),
+        'seo_data': generate_seo_data(),
+        'sources_data': generate_traffic_sources()
+    }
+
+class DatasetRefresher:
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._snapshot = (build_datasets(), datetime.now())
+        self._thread = threading.Thread(target=self._run, name='dataset-refresher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                datasets = build_datasets()
+            except Exception:
+                continue
+            with self._lock:
+                self._snapshot = (datasets, datetime.now())
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def stop(self):
+        self._stop_event.set()
+
+@st.cache_resource
+def get_dataset_refresher():
+    return DatasetRefresher(REFRESH_INTERVAL_SECONDS)
+
+def format_data_age(updated_at):
+    seconds = int((datetime.now() - updated_at).total_seconds())
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60} min"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60} min"
+
 def main():
     st.markdown('<h1 class="main-header">📊 Dashboard PrimePickz</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #7f8c8d;">Analise de Performance do Blog de Afiliados Amazon</p>', unsafe_allow_html=True)
     
-    traffic_data = generate_traffic_data()
-    affiliate_data = generate_affiliate_data()
-    content_data = generate_content_performance()
-    seo_data = generate_seo_data()
-    sources_data = generate_traffic_sources()
+    datasets, updated_at = get_dataset_refresher().snapshot()
+    traffic_data = datasets['traffic_data']
+    affiliate_data = datasets['affiliate_data']
+    content_data = datasets['content_data']
+    seo_data = datasets['seo_data']
+    sources_data = datasets['sources_data']
     
     st.sidebar.header("🔧 Filtros e Configuracoes")
     
@@ -224,6 +269,13 @@ def main():
     st.sidebar.markdown("**Tag Afiliado:** welldigital07-20")
     st.sidebar.markdown("**Categorias:** Beleza, Kindle, Livros, Saude e Bem Estar")
     
+    st.sidebar.markdown("---")
+    st.sidebar.caption(
+        f"🕒 Dados atualizados ha {format_data_age(updated_at)} "
+        f"({updated_at.strftime('%d/%m/%Y %H:%M')}) - "
+        f"atualizacao automatica a cada {REFRESH_INTERVAL_SECONDS // 60} min"
+    )
+    
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     traffic_filtered = traffic_data[traffic_data['date'] >= start_date]
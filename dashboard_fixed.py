@@ -5,6 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
+import threading
 
 # Configuração da página
 st.set_page_config(
@@ -35,8 +36,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Intervalo de atualização em segundo plano dos datasets
+REFRESH_INTERVAL_SECONDS = 15 * 60
+
 # Funções de geração de dados (integradas)
-@st.cache_data
 def generate_traffic_data():
     """Gera dados simulados de tráfego para os últimos 6 meses"""
     end_date = datetime.now()
@@ -68,7 +71,6 @@ def generate_traffic_data():
     
     return pd.DataFrame(traffic_data)
 
-@st.cache_data
 def generate_affiliate_data():
     """Gera dados simulados de afiliados Amazon"""
     products = [
@@ -110,7 +112,6 @@ def generate_affiliate_data():
     
     return pd.DataFrame(affiliate_data)
 
-@st.cache_data
 def generate_content_performance():
     """Gera dados de performance de conteúdo por categoria"""
     posts = [
@@ -148,7 +149,6 @@ def generate_content_performance():
     
     return pd.DataFrame(content_data)
 
-@st.cache_data
 def generate_seo_data():
     """Gera dados simulados de SEO"""
     keywords = [
@@ -178,7 +178,6 @@ def generate_seo_data():
     
     return pd.DataFrame(seo_data)
 
-@st.cache_data
 def generate_traffic_sources():
     """Gera dados de fontes de tráfego"""
     sources = [
@@ -192,17 +191,72 @@ def generate_traffic_sources():
     
     return pd.DataFrame(sources)
 
+def build_datasets():
+    """Gera todos os datasets do dashboard de uma vez"""
+    return {
+        'traffic_data': generate_traffic_data(),
+        'affiliate_data': generate_affiliate_data(),
+        'content_data': generate_content_performance(),
+        'seo_data': generate_seo_data(),
+        'sources_data': generate_traffic_sources()
+    }
+
+class DatasetRefresher:
+    """Atualiza os datasets em uma thread de fundo, fora do caminho da requisição"""
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._snapshot = (build_datasets(), datetime.now())
+        self._thread = threading.Thread(target=self._run, name='dataset-refresher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                datasets = build_datasets()
+            except Exception:
+                # Mantém a versão anterior até a próxima rodada
+                continue
+            # Troca atômica: leitores veem a versão antiga ou a nova, nunca uma mistura
+            with self._lock:
+                self._snapshot = (datasets, datetime.now())
+
+    def snapshot(self):
+        """Retorna (datasets, momento da geração) da versão atual"""
+        with self._lock:
+            return self._snapshot
+
+    def stop(self):
+        self._stop_event.set()
+
+@st.cache_resource
+def get_dataset_refresher():
+    """Um único atualizador por processo, compartilhado entre as sessões"""
+    return DatasetRefresher(REFRESH_INTERVAL_SECONDS)
+
+def format_data_age(updated_at):
+    """Formata a idade dos dados para exibição"""
+    seconds = int((datetime.now() - updated_at).total_seconds())
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60} min"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60} min"
+
 def main():
     # Header principal
     st.markdown('<h1 class="main-header">📊 Dashboard PrimePickz</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #7f8c8d;">Análise de Performance do Blog de Afiliados Amazon</p>', unsafe_allow_html=True)
     
     # Carregar dados
-    traffic_data = generate_traffic_data()
-    affiliate_data = generate_affiliate_data()
-    content_data = generate_content_performance()
-    seo_data = generate_seo_data()
-    sources_data = generate_traffic_sources()
+    datasets, updated_at = get_dataset_refresher().snapshot()
+    traffic_data = datasets['traffic_data']
+    affiliate_data = datasets['affiliate_data']
+    content_data = datasets['content_data']
+    seo_data = datasets['seo_data']
+    sources_data = datasets['sources_data']
     
     # Sidebar com filtros
     st.sidebar.header("🔧 Filtros e Configurações")
@@ -238,6 +292,14 @@ def main():
     st.sidebar.markdown("**Tag Afiliado:** welldigital25-20")
     st.sidebar.markdown("**Categorias:** Beleza, Kindle, Livros, Saúde & Bem Estar")
     
+    # Idade dos dados servidos
+    st.sidebar.markdown("---")
+    st.sidebar.caption(
+        f"🕒 Dados atualizados há {format_data_age(updated_at)} "
+        f"({updated_at.strftime('%d/%m/%Y %H:%M')}) - "
+        f"atualização automática a cada {REFRESH_INTERVAL_SECONDS // 60} min"
+    )
+    
     # Filtrar dados por período
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
@@ -0,0 +1,156 @@
+"""Detecção de transações quase duplicadas e fila de revisão.
+
+Faturas de layouts diferentes trazem a mesma compra com o nome do
+estabelecimento truncado ou com outro espaçamento, o que escapa ao hash de
+conteúdo do banco_dados. Aqui as transações são lidas em blocos pelo valor em
+centavos e, dentro de cada bloco, comparadas só com as de data até um dia de
+diferença; os nomes normalizados passam por uma medida de similaridade. Assim
+o custo fica perto de linear no histórico, sem comparar todos os pares.
+
+Os pares encontrados vão para a tabela revisao_duplicatas, onde aguardam a
+decisão do usuário (remover a segunda transação ou manter as duas). Módulo sem
+dependência do Streamlit, como o banco_dados.
+"""
+import re
+import unicodedata
+from collections import deque
+from datetime import date
+from difflib import SequenceMatcher
+from itertools import groupby
+
+import pandas as pd
+
+# Similaridade mínima (0 a 1) entre nomes para o par ir à revisão
+LIMIAR_SIMILARIDADE = 0.85
+
+# Diferença máxima de datas, em dias, entre as duas transações de um par
+JANELA_DIAS = 1
+
+# Tamanho mínimo do nome mais curto para que um prefixo conte como truncamento
+TAMANHO_MINIMO_PREFIXO = 8
+
+def criar_fila_revisao(conn):
+    """Cria a tabela da fila de revisão (pares de ids, menor primeiro)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS revisao_duplicatas (
+            id_transacao_a INTEGER NOT NULL,
+            id_transacao_b INTEGER NOT NULL,
+            similaridade REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            data_deteccao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id_transacao_a, id_transacao_b)
+        )
+    ''')
+
+def nome_comparavel(estabelecimento):
+    """Só letras e dígitos, sem acentos e em maiúsculas: 'Uber *Trip  São' -> 'UBERTRIPSAO'"""
+    sem_acentos = unicodedata.normalize('NFKD', str(estabelecimento)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^0-9A-Z]', '', sem_acentos.upper())
+
+def similaridade(nome_a, nome_b, limiar=LIMIAR_SIMILARIDADE):
+    """Similaridade (0 a 1) entre dois nomes já passados por nome_comparavel
+    
+    Um nome que é início do outro (truncado pelo layout da fatura) conta como
+    igual. Nos demais casos usa o SequenceMatcher, tentando antes as
+    estimativas baratas, que já descartam a maioria dos pares diferentes.
+    """
+    if not nome_a or not nome_b:
+        return 0.0
+    if nome_a == nome_b:
+        return 1.0
+    curto, longo = sorted((nome_a, nome_b), key=len)
+    if len(curto) >= TAMANHO_MINIMO_PREFIXO and longo.startswith(curto):
+        return 1.0
+    
+    comparador = SequenceMatcher(None, nome_a, nome_b, autojunk=False)
+    if comparador.real_quick_ratio() < limiar or comparador.quick_ratio() < limiar:
+        return 0.0
+    return comparador.ratio()
+
+def detectar_quase_duplicatas(conn, limiar=LIMIAR_SIMILARIDADE):
+    """Pares (id_a, id_b, similaridade) de transações provavelmente repetidas
+    
+    As linhas chegam do SQLite ordenadas por (centavos, data): cada bloco de
+    mesmo valor é percorrido com uma janela deslizante de JANELA_DIAS, então só
+    o bloco atual fica em memória. Pares do mesmo arquivo são ignorados, pois a
+    extração já remove as repetições dentro de um arquivo.
+    """
+    cursor = conn.execute('''
+        SELECT CAST(ROUND(valor * 100) AS INTEGER) AS centavos, data, id, estabelecimento, arquivo_origem
+        FROM transacoes
+        ORDER BY centavos, data
+    ''')
+    pares = []
+    for _, linhas in groupby(cursor, key=lambda linha: linha[0]):
+        janela = deque()
+        for _, data, id_transacao, estabelecimento, arquivo_origem in linhas:
+            try:
+                dia = date.fromisoformat(str(data)[:10]).toordinal()
+            except ValueError:
+                continue
+            nome = nome_comparavel(estabelecimento)
+            
+            while janela and dia - janela[0][0] > JANELA_DIAS:
+                janela.popleft()
+            for _, id_outra, nome_outra, arquivo_outra in janela:
+                if arquivo_outra == arquivo_origem:
+                    continue
+                valor_similaridade = similaridade(nome, nome_outra, limiar)
+                if valor_similaridade >= limiar:
+                    pares.append((min(id_outra, id_transacao), max(id_outra, id_transacao), valor_similaridade))
+            janela.append((dia, id_transacao, nome, arquivo_origem))
+    return pares
+
+def registrar_pares(conn, pares):
+    """Coloca os pares novos na fila (decisões anteriores são mantidas); retorna quantos entraram
+    
+    Pares pendentes cujas transações já foram apagadas saem da fila.
+    """
+    with conn:
+        conn.execute('''
+            DELETE FROM revisao_duplicatas
+            WHERE status = 'pendente'
+              AND (id_transacao_a NOT IN (SELECT id FROM transacoes)
+                   OR id_transacao_b NOT IN (SELECT id FROM transacoes))
+        ''')
+        return conn.executemany('''
+            INSERT OR IGNORE INTO revisao_duplicatas (id_transacao_a, id_transacao_b, similaridade)
+            VALUES (?, ?, ?)
+        ''', pares).rowcount if pares else 0
+
+def fila_revisao(conn, limite=200):
+    """Pares pendentes com os dados das duas transações, mais parecidos primeiro"""
+    return pd.read_sql_query('''
+        SELECT r.id_transacao_a, r.id_transacao_b, r.similaridade,
+               a.data AS data_a, a.estabelecimento AS estabelecimento_a, a.arquivo_origem AS arquivo_a,
+               b.data AS data_b, b.estabelecimento AS estabelecimento_b, b.arquivo_origem AS arquivo_b,
+               a.valor, a.cartao AS cartao_a, b.cartao AS cartao_b
+        FROM revisao_duplicatas r
+        JOIN transacoes a ON a.id = r.id_transacao_a
+        JOIN transacoes b ON b.id = r.id_transacao_b
+        WHERE r.status = 'pendente'
+        ORDER BY r.similaridade DESC, a.data DESC
+        LIMIT ?
+    ''', conn, params=(limite,))
+
+def aplicar_decisoes(conn, remover, manter):
+    """Resolve pares da fila em uma transação; retorna quantas transações foram apagadas
+    
+    ``remover`` e ``manter`` são listas de (id_a, id_b). Em ``remover``, a
+    segunda transação (id_b, a gravada depois) é apagada e o par marcado como
+    duplicata; em ``manter``, o par é marcado como transações distintas e não
+    volta à fila.
+    """
+    with conn:
+        apagadas = conn.executemany(
+            "DELETE FROM transacoes WHERE id = ?", [(id_b,) for _, id_b in remover]
+        ).rowcount if remover else 0
+        conn.executemany(
+            "UPDATE revisao_duplicatas SET status = 'duplicata' WHERE id_transacao_a = ? AND id_transacao_b = ?",
+            remover
+        )
+        conn.executemany(
+            "UPDATE revisao_duplicatas SET status = 'distintas' WHERE id_transacao_a = ? AND id_transacao_b = ?",
+            manter
+        )
+    return apagadas
@@ -0,0 +1,276 @@
+"""Importação em lote, sem navegador, de uma pasta de PDFs.
+
+Uso:
+    python importar_lote.py PASTA --tipo fatura
+    python importar_lote.py PASTA --tipo contracheque --banco financeiro.db --processos 4
+
+Os PDFs da pasta (e subpastas, com --recursivo) passam pelo mesmo caminho do
+upload na interface: arquivos cujo hash já está em arquivos_processados são
+ignorados, os demais são interpretados em paralelo em um pool de processos e
+gravados com salvar_lancamentos_arquivo, um arquivo por transação.
+
+O andamento fica na tabela progresso_importacao, uma linha por caminho com
+tamanho e data de modificação. Ao rodar de novo (depois de uma interrupção,
+por exemplo), os arquivos já resolvidos e não modificados são pulados sem nem
+serem lidos; falhas de gravação são tentadas outra vez, e arquivos sem
+lançamentos ou com erro de leitura só com --tentar-novamente.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from banco_dados import criar_esquema, ler_regras_categoria, obter_pool, salvar_lancamentos_arquivo
+from processamento_pdf import calcular_hash_arquivo, processar_arquivo
+
+CAMINHO_BANCO_PADRAO = 'financeiro.db'
+
+# Arquivos enviados ao pool por processo, para não carregar a pasta inteira na memória
+ARQUIVOS_POR_PROCESSO = 2
+
+# Situações em progresso_importacao que dispensam o arquivo na próxima execução
+SITUACOES_RESOLVIDAS = ('importado', 'ja_processado')
+
+# Situações que só voltam a ser tentadas com --tentar-novamente
+SITUACOES_FALHA = ('sem_lancamentos', 'erro_leitura')
+
+def criar_tabela_progresso(conn):
+    """Cria a tabela de andamento das importações em lote"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS progresso_importacao (
+            caminho TEXT PRIMARY KEY,
+            tamanho INTEGER NOT NULL,
+            modificado_ns INTEGER NOT NULL,
+            hash_arquivo TEXT,
+            situacao TEXT NOT NULL,
+            detalhe TEXT,
+            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def registrar_progresso(conn, registros):
+    """Grava (caminho, tamanho, modificado_ns, hash_arquivo, situacao, detalhe) em uma transação"""
+    with conn:
+        conn.executemany('''
+            INSERT INTO progresso_importacao (caminho, tamanho, modificado_ns, hash_arquivo, situacao, detalhe)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (caminho) DO UPDATE SET
+                tamanho = excluded.tamanho,
+                modificado_ns = excluded.modificado_ns,
+                hash_arquivo = excluded.hash_arquivo,
+                situacao = excluded.situacao,
+                detalhe = excluded.detalhe,
+                data_atualizacao = CURRENT_TIMESTAMP
+        ''', registros)
+
+def listar_pdfs(pasta, recursivo=False):
+    """Caminhos dos PDFs da pasta, em ordem alfabética"""
+    candidatos = pasta.rglob('*') if recursivo else pasta.iterdir()
+    return sorted(caminho for caminho in candidatos if caminho.is_file() and caminho.suffix.lower() == '.pdf')
+
+def planejar_importacao(conn, pasta, caminhos, tentar_novamente=False):
+    """Separa os arquivos a interpretar dos que podem ser pulados
+    
+    Retorna (pendentes, pulados), com pendentes como tuplas (nome_arquivo,
+    caminho, tamanho, modificado_ns, hash_arquivo) e pulados como um
+    contador por motivo. Só são lidos (para calcular o hash) os arquivos que
+    o progresso não resolve pelo tamanho e data de modificação.
+    """
+    progresso = {
+        caminho: (tamanho, modificado_ns, situacao)
+        for caminho, tamanho, modificado_ns, situacao in conn.execute(
+            "SELECT caminho, tamanho, modificado_ns, situacao FROM progresso_importacao"
+        )
+    }
+    ignorar = SITUACOES_RESOLVIDAS if tentar_novamente else SITUACOES_RESOLVIDAS + SITUACOES_FALHA
+    hashes_processados = {linha[0] for linha in conn.execute("SELECT hash_arquivo FROM arquivos_processados")}
+    
+    pendentes = []
+    ja_processados = []
+    pulados = {'sem alterações desde a última execução': 0, 'já processados': 0, 'repetidos na pasta': 0}
+    hashes_lote = set()
+    
+    for caminho in caminhos:
+        try:
+            estado = caminho.stat()
+            chave = str(caminho.resolve())
+            registro = progresso.get(chave)
+            if registro and registro[:2] == (estado.st_size, estado.st_mtime_ns) and registro[2] in ignorar:
+                pulados['sem alterações desde a última execução'] += 1
+                continue
+            
+            file_hash = calcular_hash_arquivo(caminho.read_bytes())
+        except FileNotFoundError:
+            # Removido depois de listado (comum na pasta vigiada)
+            continue
+        if file_hash in hashes_processados:
+            pulados['já processados'] += 1
+            ja_processados.append((chave, estado.st_size, estado.st_mtime_ns, file_hash, 'ja_processado', None))
+        elif file_hash in hashes_lote:
+            pulados['repetidos na pasta'] += 1
+        else:
+            hashes_lote.add(file_hash)
+            # Nome com a pasta de origem, para que arquivos homônimos de pastas diferentes não colidam
+            nome_arquivo = caminho.relative_to(pasta.parent).as_posix()
+            pendentes.append((nome_arquivo, caminho, estado.st_size, estado.st_mtime_ns, file_hash))
+    
+    if ja_processados:
+        registrar_progresso(conn, ja_processados)
+    return pendentes, pulados
+
+def processar_caminho(caminho, nome_arquivo, tipo_arquivo, regras_categoria):
+    """Lê e interpreta um PDF no processo do pool (só o caminho atravessa o pool)
+    
+    O parser recebe só o nome do arquivo, porque detecta cartão e fonte por
+    trechos do nome ('caixa', 'visa', 'vale'...) e o nome da pasta não pode
+    interferir; ``nome_arquivo``, com a pasta, fica no registro e na origem
+    dos lançamentos.
+    """
+    caminho = Path(caminho)
+    resultado = processar_arquivo(caminho.name, caminho.read_bytes(), tipo_arquivo, regras_categoria=regras_categoria)
+    resultado['nome_arquivo'] = nome_arquivo
+    for lancamento in resultado['transacoes'] + resultado['descontos'] + resultado['receitas']:
+        lancamento['arquivo_origem'] = nome_arquivo
+    return resultado
+
+def gravar_resultado(conn, resultado):
+    """Salva um arquivo interpretado; retorna (situacao, detalhe) para o progresso"""
+    relatorio = salvar_lancamentos_arquivo(
+        conn,
+        resultado['nome_arquivo'],
+        resultado['hash_arquivo'],
+        resultado['tipo_arquivo'],
+        transacoes=resultado['transacoes'] + resultado['descontos'],
+        receitas=resultado['receitas']
+    )
+    gravados = relatorio['transacoes'] + relatorio['receitas']
+    detalhe = "; ".join(relatorio['erros']) or None
+    
+    if relatorio['registrado']:
+        return 'importado', f"{gravados} gravado(s), {relatorio['duplicados']} já existente(s)" + (f"; {detalhe}" if detalhe else "")
+    if any(erro.startswith("Erro ao salvar") for erro in relatorio['erros']):
+        # Falha do banco (arquivo travado, por exemplo): tentada de novo na próxima execução
+        return 'erro_gravacao', detalhe
+    return 'sem_lancamentos', "; ".join(texto for _, texto in resultado['mensagens']) or detalhe
+
+def abrir_banco(caminho_banco):
+    """Conexão de escrita com o esquema e a tabela de progresso já criados"""
+    conn = obter_pool(caminho_banco).escrita()
+    try:
+        criar_esquema(conn)
+        criar_tabela_progresso(conn)
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def criar_pool_processos(processos):
+    """Pool de interpretação; 'spawn', como na interface, para que os processos não herdem a conexão aberta"""
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+
+def importar_caminhos(conn, executor, processos, pasta, caminhos, tipo_arquivo, tentar_novamente=False, saida=print):
+    """Interpreta no pool e grava os PDFs informados (da pasta); retorna a contagem por situação
+    
+    As regras de categorização são lidas do banco a cada chamada, então
+    edições feitas na interface valem já para o próximo lote.
+    """
+    contagem = dict.fromkeys(('importado', 'sem_lancamentos', 'erro_leitura', 'erro_gravacao'), 0)
+    regras_categoria = ler_regras_categoria(conn)
+    pendentes, pulados = planejar_importacao(conn, pasta, caminhos, tentar_novamente)
+    for motivo, quantidade in pulados.items():
+        if quantidade:
+            saida(f"⏭️ {quantidade} arquivo(s) pulado(s): {motivo}")
+    if not pendentes:
+        return contagem
+    saida(f"🔄 Processando {len(pendentes)} arquivo(s) em {processos} processo(s)...")
+    
+    fila = iter(pendentes)
+    em_andamento = {}
+    concluidos = 0
+    try:
+        while True:
+            # Manter no máximo ARQUIVOS_POR_PROCESSO arquivos por processo em andamento
+            for nome_arquivo, caminho, tamanho, modificado_ns, file_hash in fila:
+                futuro = executor.submit(processar_caminho, str(caminho), nome_arquivo, tipo_arquivo, regras_categoria)
+                em_andamento[futuro] = (nome_arquivo, caminho, tamanho, modificado_ns, file_hash)
+                if len(em_andamento) >= processos * ARQUIVOS_POR_PROCESSO:
+                    break
+            if not em_andamento:
+                break
+            
+            feitos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                nome_arquivo, caminho, tamanho, modificado_ns, file_hash = em_andamento.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                    situacao, detalhe = gravar_resultado(conn, resultado)
+                    file_hash = resultado['hash_arquivo']
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    situacao, detalhe = 'erro_leitura', str(e)
+                
+                registrar_progresso(conn, [(str(caminho.resolve()), tamanho, modificado_ns, file_hash, situacao, detalhe)])
+                contagem[situacao] += 1
+                concluidos += 1
+                icone = "✅" if situacao == 'importado' else "⚠️" if situacao == 'sem_lancamentos' else "❌"
+                saida(f"{icone} [{concluidos}/{len(pendentes)}] {nome_arquivo}: {situacao}" + (f" - {detalhe}" if detalhe else ""))
+    except (KeyboardInterrupt, BrokenProcessPool, sqlite3.Error):
+        for futuro in em_andamento:
+            futuro.cancel()
+        saida(f"⏹️ Importação interrompida após {concluidos} arquivo(s); os demais ficam para a próxima execução.")
+        raise
+    return contagem
+
+def importar_pasta(pasta, tipo_arquivo, caminho_banco=CAMINHO_BANCO_PADRAO, processos=None,
+                   recursivo=False, tentar_novamente=False, saida=print):
+    """Importa os PDFs de uma pasta; retorna a contagem de arquivos por situação"""
+    pasta = Path(pasta).resolve()
+    processos = processos or os.cpu_count() or 1
+    conn = abrir_banco(caminho_banco)
+    executor = criar_pool_processos(processos)
+    try:
+        contagem = importar_caminhos(
+            conn, executor, processos, pasta, listar_pdfs(pasta, recursivo), tipo_arquivo, tentar_novamente, saida
+        )
+        if not any(contagem.values()):
+            saida("✅ Nada a importar.")
+        return contagem
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        conn.close()
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa em lote os PDFs de uma pasta para o banco do dashboard financeiro.")
+    parser.add_argument('pasta', type=Path, help="pasta com os PDFs")
+    parser.add_argument('--tipo', required=True, choices=['fatura', 'contracheque'], help="tipo dos arquivos da pasta")
+    parser.add_argument('--banco', default=CAMINHO_BANCO_PADRAO, help=f"arquivo do banco SQLite (padrão: {CAMINHO_BANCO_PADRAO})")
+    parser.add_argument('--processos', type=int, default=None, help="processos de interpretação (padrão: número de CPUs)")
+    parser.add_argument('--recursivo', action='store_true', help="incluir as subpastas")
+    parser.add_argument('--tentar-novamente', action='store_true',
+                        help="interpretar de novo arquivos que antes falharam ou não tinham lançamentos")
+    args = parser.parse_args(argumentos)
+    
+    if not args.pasta.is_dir():
+        parser.error(f"pasta não encontrada: {args.pasta}")
+    
+    try:
+        contagem = importar_pasta(
+            args.pasta, args.tipo, args.banco, args.processos, args.recursivo, args.tentar_novamente
+        )
+    except KeyboardInterrupt:
+        return 130
+    except BrokenProcessPool as e:
+        print(f"❌ Falha em um processo de extração: {e}", file=sys.stderr)
+        return 1
+    
+    print("📊 " + ", ".join(f"{situacao}: {quantidade}" for situacao, quantidade in contagem.items()))
+    return 1 if contagem['erro_leitura'] or contagem['erro_gravacao'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
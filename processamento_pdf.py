@@ -0,0 +1,1474 @@
+"""Extração e interpretação de PDFs de faturas e contracheques.
+
+Módulo sem dependência do Streamlit para poder ser executado nos processos
+do pool de ingestão. As mensagens que antes iam direto para a tela são
+acumuladas em uma lista de tuplas (nível, texto), onde o nível é o nome da
+função do Streamlit que deve exibi-la ('info', 'warning', 'error', 'success').
+
+O texto dos PDFs flui página por página (``iterar_paginas_pdf``) até os
+interpretadores, de modo que o consumo de memória acompanha o tamanho de uma
+página e não o do extrato inteiro.
+"""
+import PyPDF2
+import pandas as pd
+import io
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import itertools
+import functools
+from collections import Counter, deque
+from datetime import datetime, date
+
+# Códigos específicos para créditos (conforme regra de negócio)
+CODIGOS_CREDITO = ['2002', '2007', '2043', '2045', '2049', '2116', '2186', '21100']
+
+# Cache persistente do texto extraído dos PDFs (chaveado pelo hash do arquivo)
+CACHE_TEXTO_PATH = 'cache_textos_pdf.db'
+CACHE_TEXTO_LIMITE_BYTES = 64 * 1024 * 1024
+CACHE_TEXTO_VERSAO = 2
+
+# Tamanho do trecho inicial do texto guardado para o debug na interface
+PREVIEW_TEXTO_CHARS = 500
+
+# Funções auxiliares
+def calcular_hash_arquivo(file_bytes):
+    """Calcula hash MD5 do arquivo"""
+    return hashlib.md5(file_bytes).hexdigest()
+
+def abrir_cache_texto():
+    """Abre (e cria, se preciso) o banco do cache de textos extraídos"""
+    conn = sqlite3.connect(CACHE_TEXTO_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    
+    # Formato antigo do cache: descartar e recriar (é só cache)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_TEXTO_VERSAO:
+        conn.execute("DROP TABLE IF EXISTS textos_pdf")
+        conn.execute("DROP TABLE IF EXISTS paginas_pdf")
+        conn.execute(f"PRAGMA user_version = {CACHE_TEXTO_VERSAO}")
+    
+    # Uma linha por arquivo e uma linha por página (lida em streaming);
+    # o arquivo só é servido do cache depois de marcado como completo
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS textos_pdf (
+            hash_arquivo TEXT PRIMARY KEY,
+            total_paginas INTEGER NOT NULL DEFAULT 0,
+            tamanho INTEGER NOT NULL DEFAULT 0,
+            completo INTEGER NOT NULL DEFAULT 0,
+            ultimo_acesso REAL NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS paginas_pdf (
+            hash_arquivo TEXT NOT NULL,
+            numero INTEGER NOT NULL,
+            texto BLOB NOT NULL,
+            PRIMARY KEY (hash_arquivo, numero)
+        )
+    ''')
+    conn.commit()
+    return conn
+
+def iterar_paginas_em_cache(file_hash):
+    """Gera as páginas de um arquivo guardado no cache, descomprimindo uma por vez"""
+    conn = abrir_cache_texto()
+    try:
+        conn.execute(
+            "UPDATE textos_pdf SET ultimo_acesso = ? WHERE hash_arquivo = ?",
+            (time.time(), file_hash)
+        )
+        conn.commit()
+        cursor = conn.execute(
+            "SELECT texto FROM paginas_pdf WHERE hash_arquivo = ? ORDER BY numero",
+            (file_hash,)
+        )
+        for (texto,) in cursor:
+            yield zlib.decompress(texto).decode('utf-8')
+    finally:
+        conn.close()
+
+def arquivo_em_cache(file_hash):
+    """Indica se o texto completo do arquivo está no cache"""
+    try:
+        conn = abrir_cache_texto()
+        try:
+            return conn.execute(
+                "SELECT 1 FROM textos_pdf WHERE hash_arquivo = ? AND completo = 1",
+                (file_hash,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # Cache é apenas otimização: em caso de problema, extrair de novo
+        return False
+
+def remover_excesso_cache_texto(conn):
+    """Mantém os arquivos acessados mais recentemente até o limite de tamanho"""
+    conn.execute('''
+        DELETE FROM textos_pdf WHERE hash_arquivo IN (
+            SELECT hash_arquivo FROM (
+                SELECT hash_arquivo,
+                       SUM(tamanho) OVER (ORDER BY ultimo_acesso DESC, hash_arquivo) AS acumulado
+                FROM textos_pdf
+                WHERE completo = 1
+            )
+            WHERE acumulado > ?
+        )
+    ''', (CACHE_TEXTO_LIMITE_BYTES,))
+    # Extrações interrompidas há mais de uma hora não vão mais terminar
+    conn.execute(
+        "DELETE FROM textos_pdf WHERE completo = 0 AND ultimo_acesso < ?",
+        (time.time() - 3600,)
+    )
+    conn.execute('''
+        DELETE FROM paginas_pdf
+        WHERE hash_arquivo NOT IN (SELECT hash_arquivo FROM textos_pdf)
+    ''')
+
+def estatisticas_cache_texto():
+    """Retorna (quantidade de arquivos, bytes ocupados) do cache de textos"""
+    try:
+        conn = abrir_cache_texto()
+        try:
+            total_arquivos, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM textos_pdf WHERE completo = 1"
+            ).fetchone()
+            return total_arquivos, total_bytes
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0, 0
+
+def limpar_cache_texto():
+    """Remove todos os textos guardados no cache"""
+    conn = abrir_cache_texto()
+    try:
+        conn.execute("DELETE FROM textos_pdf")
+        conn.execute("DELETE FROM paginas_pdf")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def iterar_paginas_decodificadas(file_bytes, mensagens, file_hash):
+    """Decodifica o PDF gerando o texto de cada página e gravando-as no cache
+    
+    Cada página é gravada em uma transação curta assim que sai, para não
+    segurar o banco do cache enquanto o restante do arquivo é interpretado
+    (outros processos do pool gravam no mesmo cache). O arquivo só passa a
+    ser servido do cache se todas as páginas foram lidas sem erro.
+    """
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+        paginas = pdf_reader.pages
+    except Exception as e:
+        mensagens.append(('error', f"Erro ao ler PDF: {e}"))
+        return
+    
+    conn = None
+    try:
+        conn = abrir_cache_texto()
+        with conn:
+            conn.execute("DELETE FROM paginas_pdf WHERE hash_arquivo = ?", (file_hash,))
+            conn.execute('''
+                INSERT OR REPLACE INTO textos_pdf (hash_arquivo, completo, ultimo_acesso)
+                VALUES (?, 0, ?)
+            ''', (file_hash, time.time()))
+    except sqlite3.Error:
+        # Sem cache para este arquivo: a extração segue só em memória
+        if conn is not None:
+            conn.close()
+        conn = None
+    
+    sucesso = True
+    total_paginas = 0
+    tamanho = 0
+    try:
+        for page_num, page in enumerate(paginas):
+            try:
+                page_text = page.extract_text()
+            except Exception as e:
+                mensagens.append(('warning', f"Erro ao extrair texto da página {page_num + 1}: {e}"))
+                sucesso = False
+                continue
+            
+            if not page_text:
+                continue
+            
+            if conn is not None and sucesso:
+                dados = zlib.compress(page_text.encode('utf-8'))
+                try:
+                    with conn:
+                        conn.execute(
+                            "INSERT INTO paginas_pdf (hash_arquivo, numero, texto) VALUES (?, ?, ?)",
+                            (file_hash, total_paginas, dados)
+                        )
+                    tamanho += len(dados)
+                except sqlite3.Error:
+                    sucesso = False
+            total_paginas += 1
+            
+            yield page_text
+        
+        if conn is not None and sucesso and total_paginas:
+            try:
+                with conn:
+                    conn.execute('''
+                        UPDATE textos_pdf
+                        SET total_paginas = ?, tamanho = ?, completo = 1, ultimo_acesso = ?
+                        WHERE hash_arquivo = ?
+                    ''', (total_paginas, tamanho, time.time(), file_hash))
+                    remover_excesso_cache_texto(conn)
+            except sqlite3.Error:
+                pass
+    finally:
+        if conn is not None:
+            conn.close()
+
+def iterar_paginas_pdf(file_bytes, mensagens=None, file_hash=None):
+    """Gera o texto de cada página do PDF, uma por vez
+    
+    Se o arquivo já estiver no cache persistente (pelo hash), as páginas vêm
+    de lá e o PDF não é decodificado de novo.
+    """
+    if mensagens is None:
+        mensagens = []
+    if file_hash is None:
+        file_hash = calcular_hash_arquivo(file_bytes)
+    
+    paginas_geradas = 0
+    if arquivo_em_cache(file_hash):
+        try:
+            for pagina in iterar_paginas_em_cache(file_hash):
+                paginas_geradas += 1
+                yield pagina
+            return
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError):
+            # Entrada corrompida: continuar pelo PDF a partir da página seguinte
+            pass
+    
+    yield from itertools.islice(iterar_paginas_decodificadas(file_bytes, mensagens, file_hash), paginas_geradas, None)
+
+def acompanhar_texto(paginas, resultado):
+    """Repassa as páginas registrando no resultado o preview e o tamanho do texto"""
+    for pagina in paginas:
+        faltam = PREVIEW_TEXTO_CHARS - len(resultado['preview_texto'])
+        if faltam > 0:
+            resultado['preview_texto'] += (pagina + "\n")[:faltam]
+        resultado['total_caracteres'] += len(pagina) + 1
+        resultado['total_paginas'] += 1
+        yield pagina
+
+# Palavras-chave por categoria, em ordem de prioridade: vence a primeira
+# categoria que tiver alguma palavra contida no nome do estabelecimento
+CATEGORIAS_ESTABELECIMENTO = {
+    'Alimentação': [
+        'SUPERMERCADO', 'PADARIA', 'MERCADO', 'HORTIFRUTI', 'ACOUGUE', 'FEIRA', 
+        'EMPORIO', 'ATACADAO', 'EXTRA', 'CARREFOUR', 'WALMART', 'BIG', 'ASSAI'
+    ],
+    'Restaurante': [
+        'RESTAURANTE', 'MCDONALDS', 'SUBWAY', 'IFOOD', 'UBER EATS', 'BURGUER', 
+        'PIZZA', 'LANCHONETE', 'BAR', 'CAFE', 'CAFETERIA', 'DELIVERY', 'FOOD',
+        'OUTBACK', 'SPOLETO', 'HABIB', 'GIRAFFAS', 'BOBS'
+    ],
+    'Transporte': [
+        'UBER', '99', 'POSTO', 'PETROBRAS', 'SHELL', 'ESTACIONAMENTO', 'PEDAGIO', 
+        'METRO', 'ONIBUS', 'TAXI', 'COMBUSTIVEL', 'GASOLINA', 'ALCOOL', 'DIESEL'
+    ],
+    'Lazer': [
+        'CINEMA', 'NETFLIX', 'SPOTIFY', 'AMAZON PRIME', 'SHOPPING', 'LIVRARIA', 
+        'TEATRO', 'PARQUE', 'CLUBE', 'YOUTUBE', 'DISNEY', 'GLOBOPLAY'
+    ],
+    'Saúde': [
+        'FARMACIA', 'DROGA', 'DROGASIL', 'CLINICA', 'LABORATORIO', 'DENTISTA', 
+        'HOSPITAL', 'MEDICO', 'ULTRAFARMA', 'PACHECO', 'RAIA'
+    ],
+    'Vestuário': [
+        'ZARA', 'C&A', 'RENNER', 'NIKE', 'ADIDAS', 'ROUPA', 'CALCADO', 'SAPATO', 
+        'TENIS', 'RIACHUELO', 'MARISA', 'LOJAS AMERICANAS'
+    ],
+    'Casa': [
+        'LEROY MERLIN', 'CASAS BAHIA', 'AMERICANAS', 'MOVEIS', 'DECORACAO', 
+        'CONSTRUCAO', 'MAGAZINE LUIZA', 'PONTO FRIO', 'FAST SHOP'
+    ],
+    'Educação': [
+        'LIVRARIA', 'CURSO', 'UNIVERSIDADE', 'MATERIAL ESCOLAR', 'ESCOLA', 
+        'FACULDADE', 'LIVRO', 'SARAIVA', 'CULTURA'
+    ],
+    'Serviços': [
+        'CLARO', 'VIVO', 'TIM', 'CONTA', 'SEGURO', 'INTERNET', 'BANCO', 
+        'CARTORIO', 'CORREIOS', 'OI', 'SKY', 'NET'
+    ]
+}
+
+# Quantidade de nomes de estabelecimento cuja categoria fica memorizada
+CACHE_CATEGORIAS_TAMANHO = 65536
+
+class AutomatoPalavrasChave:
+    """Autômato de Aho-Corasick que acha todas as palavras-chave em uma passada
+    
+    Cada palavra tem uma prioridade (menor vence) e um valor associado. A busca
+    percorre o texto uma única vez e devolve o valor da palavra de menor
+    prioridade contida nele, o mesmo resultado de testar as palavras uma a uma
+    na ordem de prioridade.
+    """
+    
+    def __init__(self, palavras):
+        """``palavras`` é uma sequência de tuplas (palavra, prioridade, valor)"""
+        self.transicoes = [{}]
+        self.falhas = [0]
+        self.melhor = [None]  # (prioridade, valor) da melhor palavra que termina no estado
+        
+        for palavra, prioridade, valor in palavras:
+            if not palavra:
+                continue
+            estado = 0
+            for caractere in palavra:
+                proximo = self.transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes[estado][caractere] = proximo
+                    self.transicoes.append({})
+                    self.falhas.append(0)
+                    self.melhor.append(None)
+                estado = proximo
+            if self.melhor[estado] is None or prioridade < self.melhor[estado][0]:
+                self.melhor[estado] = (prioridade, valor)
+        
+        # Links de falha em largura; cada estado herda a melhor palavra do seu sufixo
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self.transicoes[estado].items():
+                falha = self.falhas[estado]
+                while falha and caractere not in self.transicoes[falha]:
+                    falha = self.falhas[falha]
+                falha = self.transicoes[falha].get(caractere, 0)
+                self.falhas[proximo] = falha
+                herdado = self.melhor[falha]
+                if herdado is not None and (self.melhor[proximo] is None or herdado[0] < self.melhor[proximo][0]):
+                    self.melhor[proximo] = herdado
+                fila.append(proximo)
+        
+        prioridades = [melhor[0] for melhor in self.melhor if melhor is not None]
+        self.prioridade_minima = min(prioridades) if prioridades else None
+    
+    def buscar(self, texto):
+        """Retorna o valor da palavra de menor prioridade contida no texto (ou None)"""
+        transicoes, falhas, melhor = self.transicoes, self.falhas, self.melhor
+        estado = 0
+        encontrado = None
+        
+        for caractere in texto:
+            while estado and caractere not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            candidato = melhor[estado]
+            if candidato is not None and (encontrado is None or candidato[0] < encontrado[0]):
+                encontrado = candidato
+                if candidato[0] == self.prioridade_minima:
+                    break
+        
+        return encontrado[1] if encontrado is not None else None
+
+# Palavras-chave das receitas e descontos do contracheque, por tipo de lançamento
+CATEGORIAS_RECEITA = {
+    'credito': {
+        'Salário': ['SALARIO', 'REMUNERACAO'],
+        'Férias': ['FERIAS'],
+        'Adicional Tempo Serviço': ['ADICIONAL', 'TEMPO'],
+        'Incorporação': ['INCORPORACAO'],
+        'Decisão Judicial': ['JUDICIAL']
+    },
+    'debito': {
+        'INSS': ['INSS'],
+        'Imposto de Renda': ['IMPOSTO', 'RENDA'],
+        'Previdência Privada': ['FUNCEF', 'PREVIDENCIA'],
+        'Sindicato': ['SINDICATO'],
+        'Plano de Saúde': ['SAUDE', 'MEDICO'],
+        'Empréstimo Consignado': ['CONSIGNACOES', 'EMPRESTIMO'],
+        'Convênios': ['GYMPASS', 'CONVENIO'],
+        'Associação': ['ASSOCIACAO'],
+        'Ajustes/Devoluções': ['CREDITO', 'DEVOLVER'],
+        'Reposições': ['REP', 'REPOSICAO']
+    }
+}
+
+# Tipos de regra de categorização e a categoria usada quando nenhuma palavra casa
+CATEGORIA_PADRAO = {
+    'estabelecimento': 'Outros',
+    'credito': 'Outros Proventos',
+    'debito': 'Outros Descontos'
+}
+
+def regras_padrao_categoria():
+    """Regras embutidas como tuplas (tipo, palavra_chave, categoria, prioridade)
+    
+    A prioridade segue a ordem das categorias nos dicionários acima (menor vence).
+    """
+    grupos = [('estabelecimento', CATEGORIAS_ESTABELECIMENTO)] + list(CATEGORIAS_RECEITA.items())
+    return [
+        (tipo, palavra, categoria, (indice + 1) * 10)
+        for tipo, categorias in grupos
+        for indice, (categoria, palavras_chave) in enumerate(categorias.items())
+        for palavra in palavras_chave
+    ]
+
+def compilar_regras_categoria(regras):
+    """Monta um autômato por tipo de regra; em empate de prioridade vale a regra anterior"""
+    palavras_por_tipo = {tipo: [] for tipo in CATEGORIA_PADRAO}
+    for ordem, (tipo, palavra, categoria, prioridade) in enumerate(regras):
+        if tipo in palavras_por_tipo:
+            palavras_por_tipo[tipo].append((palavra.upper(), (prioridade, ordem), categoria))
+    return {tipo: AutomatoPalavrasChave(palavras) for tipo, palavras in palavras_por_tipo.items()}
+
+def normalizar_estabelecimento(estabelecimento):
+    """Nome do estabelecimento em maiúsculas e com espaços simples (chave dos overrides)"""
+    return ' '.join(str(estabelecimento).upper().split())
+
+# Regras em uso neste processo. Versão None indica as regras embutidas; as
+# regras editadas na interface chegam por configurar_regras
+AUTOMATOS_CATEGORIA = compilar_regras_categoria(regras_padrao_categoria())
+OVERRIDES_CATEGORIA = {}
+VERSAO_REGRAS = None
+
+def configurar_regras(regras_categoria):
+    """Passa a usar as regras recebidas, recompilando só se a versão mudou
+    
+    ``regras_categoria`` é o dicionário lido do banco pela interface, com as
+    chaves 'versao', 'regras' (tuplas como em ``regras_padrao_categoria``) e
+    'overrides' (nome normalizado -> categoria). Ele acompanha cada arquivo
+    enviado ao pool, então os processos se atualizam sozinhos.
+    """
+    global AUTOMATOS_CATEGORIA, OVERRIDES_CATEGORIA, VERSAO_REGRAS
+    if regras_categoria is None or regras_categoria['versao'] == VERSAO_REGRAS:
+        return
+    
+    AUTOMATOS_CATEGORIA = compilar_regras_categoria(regras_categoria['regras'])
+    OVERRIDES_CATEGORIA = dict(regras_categoria['overrides'])
+    VERSAO_REGRAS = regras_categoria['versao']
+    categorizar_nome_normalizado.cache_clear()
+
+def categorizar_estabelecimento(estabelecimento):
+    """Categoriza automaticamente baseado no nome do estabelecimento"""
+    return categorizar_nome_normalizado(normalizar_estabelecimento(estabelecimento))
+
+@functools.lru_cache(maxsize=CACHE_CATEGORIAS_TAMANHO)
+def categorizar_nome_normalizado(estabelecimento):
+    """Categoria de um nome já normalizado, memorizada por nome
+    
+    Os overrides (nome exato -> categoria) são consultados antes das palavras-chave.
+    """
+    categoria = OVERRIDES_CATEGORIA.get(estabelecimento)
+    if categoria is not None:
+        return categoria
+    return AUTOMATOS_CATEGORIA['estabelecimento'].buscar(estabelecimento) or CATEGORIA_PADRAO['estabelecimento']
+
+def detectar_cartao(nome_arquivo, texto):
+    """Detecta o cartão baseado no nome do arquivo e conteúdo"""
+    nome_lower = nome_arquivo.lower()
+    texto_lower = texto.lower()
+    
+    if 'azul' in nome_lower or 'azul' in texto_lower:
+        return 'Azul'
+    elif 'santander' in nome_lower or 'santander' in texto_lower:
+        return 'Santander'
+    elif 'samsung' in nome_lower or 'samsung' in texto_lower:
+        return 'Samsung'
+    elif 'caixa' in nome_lower or 'caixa' in texto_lower:
+        if 'elo' in nome_lower or 'elo' in texto_lower:
+            return 'Caixa Elo'
+        elif 'visa' in nome_lower or 'visa' in texto_lower:
+            return 'Caixa Visa'
+        else:
+            return 'Caixa'
+    elif 'visa' in nome_lower or 'visa' in texto_lower:
+        return 'Visa'
+    elif 'mastercard' in nome_lower or 'mastercard' in texto_lower:
+        return 'Mastercard'
+    else:
+        return 'Cartão'
+
+# Formatos de data aceitos: DD/MM/AAAA, DD/MM/AA e DD/MM, também com hífen
+PADRAO_DATA = re.compile(r'(\d{1,2})([/\-])(\d{1,2})(?:\2(\d{4}|\d{2}))?')
+
+# Datas distintas cuja conversão fica memorizada
+CACHE_DATAS_TAMANHO = 8192
+
+# Strings distintas a partir das quais converter_datas_lote usa o pandas; abaixo
+# disso o custo fixo do pd.to_datetime supera o da conversão uma a uma
+LOTE_MINIMO_DATAS = 4096
+
+# Strings mais frequentes de uma coluna usadas para detectar o formato dominante
+AMOSTRA_FORMATO_DATAS = 64
+
+def corrigir_ano(ano, ano_atual, dois_digitos):
+    """Aplica a correção de anos de 2 dígitos e a checagem de data razoável
+    
+    Anos de 2 dígitos seguem o strptime (00-68 -> 20XX, 69-99 -> 19XX), com
+    19XX para anos além do ano atual + 10. Retorna None para datas fora de
+    2020..ano atual + 2.
+    """
+    if dois_digitos:
+        ano += 2000 if ano <= 68 else 1900
+        # Se o ano for maior que ano atual + 10, assumir que é 19XX
+        if ano > ano_atual + 10:
+            ano -= 100
+    
+    # Verificar se a data é razoável (não muito antiga ou futura)
+    if ano < 2020 or ano > ano_atual + 2:
+        return None
+    return ano
+
+def formato_data(data_str):
+    """Formato strftime de uma string de data (ex.: '%d/%m/%Y'), ou None se não reconhecido"""
+    match = PADRAO_DATA.fullmatch(data_str.strip())
+    if not match:
+        return None
+    formato = f"%d{match.group(2)}%m"
+    if match.group(4):
+        formato += match.group(2) + ('%Y' if len(match.group(4)) == 4 else '%y')
+    return formato
+
+def completar_ano(dia, mes, ano_atual, data_limite):
+    """Data DD/MM no ano de ``data_limite`` ou no anterior, o que não passar dela
+    
+    Sem data limite não há como saber o ano, e a data é descartada (None).
+    Vale a mesma checagem de data razoável de corrigir_ano.
+    """
+    if data_limite is None:
+        return None
+    for ano in (data_limite.year, data_limite.year - 1):
+        if ano < 2020 or ano > ano_atual + 2:
+            continue
+        try:
+            data_obj = date(ano, mes, dia)
+        except ValueError:
+            continue
+        if data_obj <= data_limite:
+            return data_obj
+    return None
+
+def converter_data(data_str, data_limite=None):
+    """Converte string de data para objeto date com correção de ano
+    
+    Datas sem ano (DD/MM) só são aceitas com ``data_limite`` (o fechamento ou
+    vencimento do extrato): recebem o ano dela, ou o anterior se assim
+    cairiam depois dela, como uma compra de dezembro numa fatura de janeiro.
+    """
+    try:
+        return converter_data_no_ano(data_str.strip(), date.today().year, data_limite)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=CACHE_DATAS_TAMANHO)
+def converter_data_no_ano(data_str, ano_atual, data_limite=None):
+    """Conversão memorizada por string; o ano atual e a data limite entram na chave do cache"""
+    match = PADRAO_DATA.fullmatch(data_str)
+    if not match:
+        return None
+    
+    dia_str, _, mes_str, ano_str = match.groups()
+    if ano_str is None:
+        return completar_ano(int(dia_str), int(mes_str), ano_atual, data_limite)
+    
+    ano = corrigir_ano(int(ano_str), ano_atual, len(ano_str) == 2)
+    if ano is None:
+        return None
+    
+    try:
+        return date(ano, int(mes_str), int(dia_str))
+    except ValueError:
+        return None
+
+def converter_datas_lote(datas, data_limite=None):
+    """Converte uma coluna de strings de data de uma vez, com as mesmas regras de converter_data
+    
+    Cada string distinta é convertida uma única vez. Com poucas strings
+    distintas (menos de LOTE_MINIMO_DATAS) elas passam por converter_data;
+    senão o formato dominante da coluna é detectado uma vez e aplicado com
+    ``pd.to_datetime`` (converter_datas_distintas). Retorna uma lista de
+    ``date`` (None onde não converteu).
+    """
+    textos = [str(data).strip() for data in datas]
+    ocorrencias = Counter(textos)
+    if len(ocorrencias) < LOTE_MINIMO_DATAS:
+        convertidas = {texto: converter_data(texto, data_limite) for texto in ocorrencias}
+    else:
+        convertidas = converter_datas_distintas(ocorrencias, data_limite)
+    return [convertidas[texto] for texto in textos]
+
+def converter_datas_distintas(ocorrencias, data_limite=None):
+    """Converte as strings distintas de uma coluna ({texto: ocorrências}) pelo formato dominante
+    
+    O formato dominante é detectado uma vez, nas AMOSTRA_FORMATO_DATAS
+    strings mais frequentes, e, se tiver ano, aplicado a todas com
+    ``pd.to_datetime`` e formato explícito. As que não convertem nesse
+    formato (e as sem ano, que dependem de ``data_limite``) passam por
+    ``converter_data``. Retorna {texto: date ou None}.
+    """
+    amostra = Counter()
+    for texto, quantidade in ocorrencias.most_common(AMOSTRA_FORMATO_DATAS):
+        amostra[formato_data(texto)] += quantidade
+    amostra.pop(None, None)
+    formato = amostra.most_common(1)[0][0] if amostra else None
+    
+    unicas = pd.Series(list(ocorrencias), dtype=object)
+    if formato is None or formato.endswith('%m'):
+        return {texto: converter_data(texto, data_limite) for texto in unicas}
+    
+    ano_atual = date.today().year
+    convertidas = pd.to_datetime(unicas, format=formato, errors='coerce')
+    fora_do_formato = convertidas.isna().to_numpy()
+    if formato.endswith('%y'):
+        # pandas já leva 00-68 para 20XX; falta trazer para 19XX o que passar de ano atual + 10
+        convertidas = convertidas.where(
+            convertidas.dt.year <= ano_atual + 10, convertidas - pd.DateOffset(years=100)
+        )
+    # Verificar se a data é razoável (não muito antiga ou futura)
+    anos = convertidas.dt.year
+    convertidas = convertidas.where((anos >= 2020) & (anos <= ano_atual + 2))
+    
+    resultado = dict(zip(unicas, convertidas.dt.date.where(convertidas.notna(), None)))
+    for texto in unicas[fora_do_formato]:
+        resultado[texto] = converter_data(texto, data_limite)
+    return resultado
+
+def converter_valor(valor_str):
+    """Converte string de valor para float"""
+    try:
+        # Limpar a string
+        valor_str = valor_str.strip()
+        valor_str = valor_str.replace('R$', '').replace('$', '')
+        valor_str = valor_str.replace(' ', '')
+        
+        # Converter vírgula para ponto (formato brasileiro)
+        if ',' in valor_str and '.' in valor_str:
+            # Formato: 1.234,56
+            valor_str = valor_str.replace('.', '').replace(',', '.')
+        elif ',' in valor_str:
+            # Formato: 1234,56
+            valor_str = valor_str.replace(',', '.')
+        
+        valor = float(valor_str)
+        
+        # Verificar se o valor é razoável
+        if valor < 0.01 or valor > 100000:
+            return 0
+        
+        return valor
+    except Exception:
+        return 0
+
+# Valores no formato impresso nos documentos (1.234,56), dentro da faixa aceita por converter_valor
+PADRAO_VALORES_CANONICOS = re.compile(r'(?:\d{1,3}(?:\.\d{3})*,\d{2}\n)*\d{1,3}(?:\.\d{3})*,\d{2}')
+VALOR_MAXIMO_CENTAVOS = 10_000_000
+
+def converter_valores_lote(valores):
+    """Converte uma lista de valores de uma vez, com o mesmo resultado de converter_valor
+    
+    Quando todos estão no formato 1.234,56, uma única regex valida o texto
+    unido e os centavos saem de um split sem pontuação; centavos/100 é o
+    mesmo float que converter_valor produziria. Havendo algum valor fora do
+    formato, cada um passa por converter_valor. Valores inválidos ou fora da
+    faixa viram 0.
+    """
+    if not valores:
+        return []
+    
+    texto = '\n'.join(valores)
+    if PADRAO_VALORES_CANONICOS.fullmatch(texto):
+        centavos = texto.replace('.', '').replace(',', '').split('\n')
+        if len(centavos) == len(valores):
+            return [
+                c / 100 if 1 <= c <= VALOR_MAXIMO_CENTAVOS else 0
+                for c in map(int, centavos)
+            ]
+    
+    return [converter_valor(valor_str) for valor_str in valores]
+
+def classificar_lancamento_por_codigo(codigo):
+    """Classifica lançamento como crédito ou débito baseado nas regras específicas"""
+    codigo_str = str(codigo).strip()
+    
+    # Regra específica: apenas códigos específicos são créditos
+    if codigo_str in CODIGOS_CREDITO:
+        return 'credito'
+    else:
+        return 'debito'
+
+def categorizar_receita_por_codigo(codigo, descricao):
+    """Categoriza receitas e descontos baseado no código e descrição"""
+    codigo_str = str(codigo).strip()
+    
+    # Classificar como crédito ou débito
+    tipo_lancamento = classificar_lancamento_por_codigo(codigo_str)
+    
+    return categorizar_descricao_receita(descricao, tipo_lancamento), tipo_lancamento
+
+def categorizar_descricao_receita(descricao, tipo_lancamento):
+    """Categoria de um lançamento de contracheque já classificado como crédito ou débito"""
+    return AUTOMATOS_CATEGORIA[tipo_lancamento].buscar(descricao.upper()) or CATEGORIA_PADRAO[tipo_lancamento]
+
+# Múltiplos padrões para diferentes formatos de fatura
+PADROES_FATURA = [
+    # Padrão 1: DD/MM/YYYY ESTABELECIMENTO VALOR
+    r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 2: DD/MM ESTABELECIMENTO VALOR
+    r'(\d{1,2}/\d{1,2})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 3: Com separadores |
+    r'(\d{1,2}/\d{1,2}/\d{4})\s*\|\s*([A-Za-z0-9\s\-\.\*\&\+]+?)\s*\|\s*R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 4: DD-MM-YYYY
+    r'(\d{1,2}-\d{1,2}-\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 5: Com R$ explícito
+    r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z0-9\s\-\.\*\&\+]+?)\s+R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 6: Formato mais flexível
+    r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s*[|\s]\s*([A-Za-z0-9\s\-\.\*\&\+]{3,50}?)\s*[|\s]\s*R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão 7: Azul específico
+    r'(\d{2}/\d{2})\s+([A-Z\s\-\.\*]+)\s+(\d+,\d{2})\s+(\d+,\d{2})',
+    
+    # Padrão 8: Santander específico
+    r'(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s+([A-Z\s\-\.\*]+)\s+(\d+,\d{2})',
+    
+    # Padrão 9: Samsung específico
+    r'(\d{2}/\d{2})\s+([A-Z0-9\s\-\.\*]+)\s+(\d+,\d{2})',
+    
+    # Padrão 10: Genérico com tabs
+    r'(\d{1,2}/\d{1,2}/\d{2,4})\t+([A-Za-z0-9\s\-\.\*\&\+]+?)\t+(\d{1,3}(?:\.\d{3})*,\d{2})'
+]
+
+# Todos os padrões de fatura exigem um valor no formato 0,00
+PREFILTRO_FATURA = r'\d,\d{2}'
+
+# Trechos comuns aos padrões por layout
+NOME_FATURA = r'([A-Za-z0-9\s\-\.\*\&\+]+?)'
+VALOR_FATURA = r'(\d{1,3}(?:\.\d{3})*,\d{2})'
+
+# Padrões próprios de cada cartão detectado, em ordem. Cada padrão captura só
+# (data, estabelecimento, valor): as colunas a mais do layout (data de
+# lançamento, valor em dólar) ficam em grupos não capturados. Cartões fora
+# daqui usam PADROES_FATURA, que também servem de reserva quando os padrões
+# do layout não acham nada no arquivo
+PADROES_POR_CARTAO = {
+    'Azul': [
+        # DD/MM[/AAAA] ESTABELECIMENTO VALOR_R$ [VALOR_US$]
+        rf'(\d{{2}}/\d{{2}}(?:/\d{{4}})?)\s+{NOME_FATURA}\s+{VALOR_FATURA}(?:\s+\d{{1,3}}(?:\.\d{{3}})*,\d{{2}})?'
+    ],
+    'Santander': [
+        # DD/MM/AAAA (compra) DD/MM/AAAA (lançamento) ESTABELECIMENTO VALOR: vale a data da compra
+        rf'(\d{{2}}/\d{{2}}/\d{{4}})\s+\d{{2}}/\d{{2}}/\d{{4}}\s+{NOME_FATURA}\s+{VALOR_FATURA}',
+        # DD/MM/AAAA ESTABELECIMENTO VALOR
+        rf'(\d{{2}}/\d{{2}}/\d{{4}})\s+{NOME_FATURA}\s+{VALOR_FATURA}'
+    ],
+    'Samsung': [
+        # DD/MM[/AAAA] ESTABELECIMENTO VALOR
+        rf'(\d{{2}}/\d{{2}}(?:/\d{{4}})?)\s+{NOME_FATURA}\s+{VALOR_FATURA}'
+    ],
+    'Caixa Elo': [
+        # DD/MM/AAAA ESTABELECIMENTO [R$] VALOR
+        rf'(\d{{2}}/\d{{2}}/\d{{4}})\s+{NOME_FATURA}\s+(?:R\$\s*)?{VALOR_FATURA}'
+    ]
+}
+PADROES_POR_CARTAO['Caixa Visa'] = PADROES_POR_CARTAO['Caixa'] = PADROES_POR_CARTAO['Caixa Elo']
+
+class MotorPadroesLinha:
+    """Casa cada linha do texto uma única vez contra uma lista ordenada de padrões
+    
+    Os padrões são compilados uma vez só. Para cada linha vale o primeiro padrão
+    cujos matches o conversor aceitar (retornar algo diferente de None), e os
+    seguintes nem são testados, então um mesmo lançamento não aparece repetido
+    por padrões sobrepostos. Linhas que não passam no pré-filtro são descartadas
+    sem testar nenhum padrão. Os contadores por padrão ficam disponíveis para
+    diagnóstico.
+    """
+    
+    def __init__(self, padroes, flags=0, prefiltro=None, rotulo="Padrão"):
+        self.padroes = [re.compile(padrao, flags) for padrao in padroes]
+        self.prefiltro = re.compile(prefiltro) if prefiltro else None
+        self.rotulo = rotulo
+        self.reiniciar_contadores()
+    
+    def reiniciar_contadores(self):
+        self.contagem_padroes = [0] * len(self.padroes)
+        self.linhas_analisadas = 0
+        self.linhas_descartadas = 0
+    
+    def casar_linha(self, linha, converter):
+        """Retorna o índice do padrão vencedor e os resultados convertidos da linha"""
+        self.linhas_analisadas += 1
+        if self.prefiltro is not None and not self.prefiltro.search(linha):
+            self.linhas_descartadas += 1
+            return None, []
+        
+        for i, padrao in enumerate(self.padroes):
+            resultados = [
+                resultado for resultado in map(converter, padrao.findall(linha))
+                if resultado is not None
+            ]
+            if resultados:
+                self.contagem_padroes[i] += len(resultados)
+                return i, resultados
+        
+        return None, []
+    
+    def casar_texto(self, texto, converter):
+        """Gera os resultados convertidos de cada linha do texto, na ordem"""
+        for linha in texto.split('\n'):
+            _, resultados = self.casar_linha(linha, converter)
+            yield from resultados
+
+def criar_motor_fatura(cartao=None):
+    """Motor de padrões de fatura com contadores zerados (um por arquivo)
+    
+    Com um ``cartao`` que tenha layout em PADROES_POR_CARTAO, o motor usa só
+    os padrões desse layout; sem ele, os padrões genéricos.
+    """
+    if cartao in PADROES_POR_CARTAO:
+        return MotorPadroesLinha(PADROES_POR_CARTAO[cartao], re.IGNORECASE, PREFILTRO_FATURA, f"Padrão {cartao}")
+    return MotorPadroesLinha(PADROES_FATURA, re.IGNORECASE, PREFILTRO_FATURA)
+
+def processar_pdf_fatura(file_bytes, nome_arquivo, mensagens=None):
+    """Processa PDF de fatura com múltiplos padrões robustos"""
+    if mensagens is None:
+        mensagens = []
+    paginas = iterar_paginas_pdf(file_bytes, mensagens)
+    return list(iterar_transacoes_fatura(paginas, nome_arquivo, mensagens))
+
+def extrair_transacoes_pagina(texto, cartao, nome_arquivo, motor, data_limite=None):
+    """Aplica os padrões de fatura ao texto de uma página, linha a linha"""
+    def converter(match):
+        return montar_transacao(match, cartao, nome_arquivo, data_limite)
+    
+    return list(motor.casar_texto(texto, converter))
+
+def montar_transacao(match, cartao, nome_arquivo, data_limite=None):
+    """Converte o match de um padrão de fatura em transação (None se inválido)
+    
+    ``data_limite`` (fechamento ou vencimento da fatura) completa o ano das
+    datas DD/MM; sem ela, essas datas são descartadas.
+    """
+    try:
+        if len(match) < 3:
+            return None
+        
+        data_str = match[0]
+        estabelecimento = match[1].strip()
+        valor_str = match[-1]  # Último elemento é sempre o valor
+        
+        # Limpar estabelecimento
+        estabelecimento = re.sub(r'\s+', ' ', estabelecimento)
+        estabelecimento = estabelecimento[:50]  # Limitar tamanho
+        
+        # Converter data
+        data_obj = converter_data(data_str, data_limite)
+        if not data_obj:
+            return None
+        
+        # Converter valor
+        valor = converter_valor(valor_str)
+        if valor <= 0:
+            return None
+        
+        # Filtrar estabelecimentos muito curtos
+        if len(estabelecimento.strip()) < 3:
+            return None
+        
+        categoria = categorizar_estabelecimento(estabelecimento)
+        
+        return {
+            'data': data_obj,
+            'estabelecimento': estabelecimento,
+            'categoria': categoria,
+            'valor': valor,
+            'cartao': cartao,
+            'arquivo_origem': nome_arquivo
+        }
+        
+    except Exception as e:
+        return None
+
+# Data de fechamento ou de vencimento impressa na fatura
+PADRAO_DATA_LIMITE_FATURA = re.compile(r'(fechamento|vencimento)\D{0,40}?(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+
+def detectar_data_limite_fatura(texto):
+    """Fechamento da fatura (ou, na falta dele, o vencimento), usado para completar as datas DD/MM"""
+    datas = {}
+    for rotulo, data_str in PADRAO_DATA_LIMITE_FATURA.findall(texto):
+        datas.setdefault(rotulo.lower(), converter_data(data_str))
+    return datas.get('fechamento') or datas.get('vencimento')
+
+def iterar_transacoes_fatura(paginas, nome_arquivo, mensagens):
+    """Interpreta a fatura página por página, gerando as transações à medida que aparecem
+    
+    O cartão é detectado pelo nome do arquivo e pela primeira página (cabeçalho
+    da fatura) e escolhe os padrões do layout (PADROES_POR_CARTAO). Enquanto
+    eles não acharem nada, os padrões genéricos e a extração alternativa são
+    acumulados, nessa ordem de preferência, e só são usados se isso valer até
+    o fim. O fechamento (ou vencimento) lido na primeira página completa o ano
+    das datas DD/MM.
+    """
+    paginas = iter(paginas)
+    primeira_pagina = next(paginas, None)
+    if primeira_pagina is None:
+        mensagens.append(('error', "❌ Não foi possível extrair texto do PDF"))
+        return
+    
+    # Detectar cartão baseado no nome do arquivo e conteúdo
+    cartao = detectar_cartao(nome_arquivo, primeira_pagina)
+    data_limite = detectar_data_limite_fatura(primeira_pagina)
+    
+    motor = criar_motor_fatura(cartao)
+    # Reserva para um layout detectado que não tenha o formato esperado
+    motor_generico = criar_motor_fatura() if cartao in PADROES_POR_CARTAO else None
+    contagem_alternativo = {'valores': 0, 'datas': 0}
+    transacoes_genericas = []
+    transacoes_alternativas = []
+    encontrou_layout = False
+    tem_texto = False
+    chaves_vistas = set()
+    total_transacoes = 0
+    
+    for pagina in itertools.chain([primeira_pagina], paginas):
+        if pagina.strip():
+            tem_texto = True
+        
+        transacoes_pagina = extrair_transacoes_pagina(pagina, cartao, nome_arquivo, motor, data_limite)
+        
+        if transacoes_pagina:
+            encontrou_layout = True
+            transacoes_genericas = []
+            transacoes_alternativas = []
+        elif not encontrou_layout:
+            genericas_pagina = (
+                extrair_transacoes_pagina(pagina, cartao, nome_arquivo, motor_generico, data_limite) if motor_generico else []
+            )
+            if genericas_pagina:
+                transacoes_genericas.extend(genericas_pagina)
+                transacoes_alternativas = []
+            elif not transacoes_genericas:
+                transacoes_alternativas.extend(
+                    extrair_transacoes_alternativo(pagina, cartao, nome_arquivo, contagem_alternativo, data_limite)
+                )
+        
+        # Remover duplicatas à medida que as transações aparecem
+        for transacao in transacoes_pagina:
+            chave = chave_transacao(transacao)
+            if chave not in chaves_vistas:
+                chaves_vistas.add(chave)
+                total_transacoes += 1
+                yield transacao
+    
+    if not tem_texto:
+        mensagens.append(('error', "❌ Não foi possível extrair texto do PDF"))
+        return
+    
+    for motor_usado in (motor, motor_generico):
+        if motor_usado is None:
+            continue
+        for i, total_matches in enumerate(motor_usado.contagem_padroes):
+            if total_matches:
+                mensagens.append(('info', f"✅ {motor_usado.rotulo} {i+1} encontrou {total_matches} transações"))
+    mensagens.append(('info', f"🔎 {motor.linhas_analisadas} linhas analisadas, {motor.linhas_descartadas} descartadas sem valor monetário"))
+    if data_limite:
+        mensagens.append(('info', f"📅 Datas sem ano completadas até {data_limite:%d/%m/%Y} (fechamento/vencimento da fatura)"))
+    
+    if not encontrou_layout and transacoes_genericas:
+        mensagens.append(('warning', f"⚠️ Padrões do layout {cartao} não funcionaram. Usando os padrões genéricos..."))
+        restantes = transacoes_genericas
+    elif not encontrou_layout:
+        # Se não encontrou nada, usar a extração alternativa
+        mensagens.append(('warning', "⚠️ Padrões principais não funcionaram. Tentando extração alternativa..."))
+        if contagem_alternativo['valores'] and contagem_alternativo['datas']:
+            mensagens.append(('info', f"🔍 Método alternativo encontrou {contagem_alternativo['valores']} valores e {contagem_alternativo['datas']} datas"))
+        restantes = transacoes_alternativas
+    else:
+        restantes = []
+    
+    for transacao in restantes:
+        chave = chave_transacao(transacao)
+        if chave not in chaves_vistas:
+            chaves_vistas.add(chave)
+            total_transacoes += 1
+            yield transacao
+    
+    mensagens.append(('success', f"✅ Total de {total_transacoes} transações extraídas"))
+
+def extrair_transacoes_alternativo(texto, cartao, nome_arquivo, contagem, data_limite=None):
+    """Método alternativo de extração quando padrões principais falham
+    
+    Soma em ``contagem`` os valores e datas encontrados no texto.
+    """
+    transacoes = []
+    
+    # Procurar por valores monetários no texto
+    valores = re.findall(r'R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})', texto)
+    datas = re.findall(r'(\d{1,2}[/\-]\d{1,2}[/\-]?\d{0,4})', texto)
+    contagem['valores'] += len(valores)
+    contagem['datas'] += len(datas)
+    
+    if valores and datas:
+        
+        # Tentar combinar datas e valores próximos
+        linhas = texto.split('\n')
+        for linha in linhas:
+            if re.search(r'\d{1,2}[/\-]\d{1,2}', linha) and re.search(r'\d+,\d{2}', linha):
+                # Esta linha tem data e valor
+                try:
+                    data_match = re.search(r'(\d{1,2}[/\-]\d{1,2}[/\-]?\d{0,4})', linha)
+                    valor_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', linha)
+                    
+                    if data_match and valor_match:
+                        data_obj = converter_data(data_match.group(1), data_limite)
+                        valor = converter_valor(valor_match.group(1))
+                        
+                        if data_obj and valor > 0:
+                            # Extrair estabelecimento (texto entre data e valor)
+                            estabelecimento = linha.replace(data_match.group(1), '').replace(valor_match.group(1), '')
+                            estabelecimento = re.sub(r'[R\$\|\t]+', ' ', estabelecimento).strip()
+                            
+                            if len(estabelecimento) >= 3:
+                                categoria = categorizar_estabelecimento(estabelecimento)
+                                
+                                transacoes.append({
+                                    'data': data_obj,
+                                    'estabelecimento': estabelecimento[:50],
+                                    'categoria': categoria,
+                                    'valor': valor,
+                                    'cartao': cartao,
+                                    'arquivo_origem': nome_arquivo
+                                })
+                except Exception:
+                    continue
+    
+    return transacoes
+
+def chave_transacao(transacao):
+    """Chave usada para identificar transações duplicadas"""
+    return f"{transacao['data']}_{transacao['estabelecimento']}_{transacao['valor']}"
+
+def remover_duplicatas_transacoes(transacoes):
+    """Remove transações duplicadas"""
+    if not transacoes:
+        return []
+    
+    # Criar chave única para cada transação
+    transacoes_unicas = {}
+    
+    for transacao in transacoes:
+        chave = chave_transacao(transacao)
+        if chave not in transacoes_unicas:
+            transacoes_unicas[chave] = transacao
+    
+    return list(transacoes_unicas.values())
+
+# Padrões específicos para o formato do contracheque
+PADROES_CONTRACHEQUE = [
+    # Padrão principal: CODIGO DESCRICAO MM/YYYY [OUTROS] R$ VALOR
+    r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+(\d{2}/\d{4})\s+(?:\d{3}\s+)?R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão alternativo: CODIGO DESCRICAO MM/YYYY VALOR (sem R$)
+    r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+(\d{2}/\d{4})\s+(?:\d{3}\s+)?(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão sem data: CODIGO DESCRICAO R$ VALOR
+    r'(\d{2,5})\s+([A-Z\s\-\.\(\)/]+?)\s+R\$\s*(\d{1,3}(?:\.\d{3})*,\d{2})',
+    
+    # Padrão flexível: qualquer linha com código e valor
+    r'^(\d{2,5})\s+(.+?)\s+(\d{1,3}(?:\.\d{3})*,\d{2})$'
+]
+
+def processar_pdf_contracheque(file_bytes, nome_arquivo, mensagens=None):
+    """Processa PDF de contracheque com regras específicas de classificação e correção de ano"""
+    if mensagens is None:
+        mensagens = []
+    paginas = iterar_paginas_pdf(file_bytes, mensagens)
+    return interpretar_paginas_contracheque(paginas, nome_arquivo, mensagens)
+
+def criar_motor_contracheque():
+    """Motor de padrões de contracheque com contadores zerados (um por arquivo)
+    
+    Linha a linha, como nas faturas: o padrão flexível (o último) casa as
+    mesmas linhas dos anteriores com a competência dentro da descrição, e só
+    é usado quando nenhum outro aceitou a linha.
+    """
+    return MotorPadroesLinha(PADROES_CONTRACHEQUE, re.MULTILINE, PREFILTRO_FATURA, "Padrão contracheque")
+
+def montar_item_contracheque(match):
+    """Match de um padrão de contracheque como (codigo, descricao, competencia, valor), ou None"""
+    if len(match) == 4:  # Padrão com data
+        codigo, descricao, competencia, valor_str = match
+    elif len(match) == 3:  # Padrão sem data
+        codigo, descricao, valor_str = match
+        competencia = None
+    else:
+        return None
+    descricao = descricao.strip()
+    
+    # Filtrar descrições muito curtas
+    if len(descricao) < 3:
+        return None
+    
+    return codigo, descricao, competencia, valor_str
+
+def extrair_itens_contracheque_pagina(texto, motor):
+    """Aplica os padrões de contracheque ao texto de uma página
+    
+    Retorna os itens ainda em texto, como (codigo, descricao, competencia,
+    valor): a competência (MM/AAAA, ou None nos padrões sem data) e o valor
+    são convertidos de uma vez para o arquivo inteiro, em
+    montar_lancamentos_contracheque.
+    """
+    return list(motor.casar_texto(texto, montar_item_contracheque))
+
+def montar_lancamentos_contracheque(itens, fonte, nome_arquivo, mensagens):
+    """Converte os itens de um contracheque em receitas e descontos
+    
+    As competências do arquivo inteiro vão em uma única chamada a
+    converter_datas_lote (como o dia 1 do mês, com a checagem de ano
+    razoável) e os valores em uma a converter_valores_lote. Itens sem data
+    própria ficam com data None, preenchida depois com a data de referência
+    do documento.
+    """
+    receitas = []
+    descontos = []
+    datas = converter_datas_lote([f"01/{competencia}" if competencia else '' for _, _, competencia, _ in itens])
+    valores = converter_valores_lote([valor_str for _, _, _, valor_str in itens])
+    
+    for (codigo, descricao, _, _), data_item, valor in zip(itens, datas, valores):
+        try:
+            if valor <= 0:
+                continue
+            
+            # Categorizar baseado no código e descrição
+            categoria, tipo_lancamento = categorizar_receita_por_codigo(codigo, descricao)
+            
+            if tipo_lancamento == 'credito':
+                # Adicionar como receita
+                receitas.append({
+                    'data': data_item,
+                    'descricao': descricao,
+                    'categoria': categoria,
+                    'valor': valor,
+                    'fonte': fonte,
+                    'codigo': codigo,
+                    'tipo_lancamento': tipo_lancamento,
+                    'arquivo_origem': nome_arquivo
+                })
+            else:
+                # Adicionar como desconto (despesa)
+                descontos.append({
+                    'data': data_item,
+                    'estabelecimento': f"Desconto: {descricao}",
+                    'categoria': 'Descontos Folha',
+                    'valor': valor,
+                    'cartao': 'Contracheque',
+                    'arquivo_origem': nome_arquivo
+                })
+                
+                # Também adicionar na tabela de receitas como débito para controle
+                receitas.append({
+                    'data': data_item,
+                    'descricao': descricao,
+                    'categoria': categoria,
+                    'valor': valor,
+                    'fonte': fonte,
+                    'codigo': codigo,
+                    'tipo_lancamento': tipo_lancamento,
+                    'arquivo_origem': nome_arquivo
+                })
+            
+        except Exception as e:
+            mensagens.append(('warning', f"Erro ao processar item: {e}"))
+            continue
+    
+    return receitas, descontos
+
+def interpretar_paginas_contracheque(paginas, nome_arquivo, mensagens):
+    """Extrai receitas e descontos de um contracheque, página por página
+    
+    A data de referência (a mais frequente no documento) só é conhecida depois
+    da última página, então os itens sem data própria são completados no fim.
+    """
+    paginas = iter(paginas)
+    primeira_pagina = next(paginas, None)
+    if primeira_pagina is None:
+        mensagens.append(('error', "❌ Não foi possível extrair texto do PDF"))
+        return [], []
+    
+    itens = []
+    receitas_alternativas = []
+    descontos_alternativos = []
+    tem_texto = False
+    
+    # Detectar empresa/fonte
+    fonte = detectar_fonte_contracheque(nome_arquivo, primeira_pagina)
+    
+    referencia = DataReferenciaContracheque()
+    motor = criar_motor_contracheque()
+    
+    for pagina in itertools.chain([primeira_pagina], paginas):
+        if pagina.strip():
+            tem_texto = True
+        referencia.alimentar(pagina)
+        
+        itens.extend(extrair_itens_contracheque_pagina(pagina, motor))
+        
+        # Extração alternativa só enquanto os padrões principais não acharem nada
+        if itens:
+            receitas_alternativas = []
+            descontos_alternativos = []
+        else:
+            receitas_alt, descontos_alt = extrair_contracheque_alternativo(pagina, fonte, nome_arquivo, None)
+            receitas_alternativas.extend(receitas_alt)
+            descontos_alternativos.extend(descontos_alt)
+    
+    if not tem_texto:
+        mensagens.append(('error', "❌ Não foi possível extrair texto do PDF"))
+        return [], []
+    
+    receitas, descontos = montar_lancamentos_contracheque(itens, fonte, nome_arquivo, mensagens)
+    
+    data_referencia = referencia.resolver()
+    mensagens.append(('info', f"📅 Data de referência detectada: {data_referencia}"))
+    
+    for i, total_matches in enumerate(motor.contagem_padroes):
+        if total_matches:
+            mensagens.append(('info', f"✅ {motor.rotulo} {i+1} encontrou {total_matches} itens"))
+    
+    # Se não encontrou nada, usar a extração alternativa
+    if not receitas and not descontos:
+        mensagens.append(('warning', "⚠️ Padrões principais não funcionaram. Tentando extração alternativa..."))
+        receitas.extend(receitas_alternativas)
+        descontos.extend(descontos_alternativos)
+    
+    for item in itertools.chain(receitas, descontos):
+        if item['data'] is None:
+            item['data'] = data_referencia
+    
+    # Remover duplicatas
+    receitas = remover_duplicatas_receitas(receitas)
+    descontos = remover_duplicatas_transacoes(descontos)
+    
+    # Calcular totais para validação
+    total_creditos = sum(r['valor'] for r in receitas if r.get('tipo_lancamento') == 'credito')
+    total_debitos = sum(r['valor'] for r in receitas if r.get('tipo_lancamento') == 'debito')
+    salario_liquido = total_creditos - total_debitos
+    
+    mensagens.append(('success', f"✅ Extraídas {len([r for r in receitas if r.get('tipo_lancamento') == 'credito'])} receitas e {len([r for r in receitas if r.get('tipo_lancamento') == 'debito'])} descontos"))
+    mensagens.append(('info', f"💰 Total Créditos: R$ {total_creditos:,.2f} | Total Débitos: R$ {total_debitos:,.2f} | Líquido: R$ {salario_liquido:,.2f}"))
+    
+    return receitas, descontos
+
+def detectar_fonte_contracheque(nome_arquivo, texto):
+    """Detecta a fonte/empresa do contracheque"""
+    nome_lower = nome_arquivo.lower()
+    texto_lower = texto.lower()
+    
+    # Procurar por nomes de empresas conhecidas
+    if 'caixa' in nome_lower or 'caixa' in texto_lower:
+        return 'Caixa Econômica Federal'
+    elif 'petrobras' in nome_lower or 'petrobras' in texto_lower:
+        return 'Petrobras'
+    elif 'vale' in nome_lower or 'vale' in texto_lower:
+        return 'Vale'
+    elif 'itau' in nome_lower or 'itau' in texto_lower:
+        return 'Itaú'
+    elif 'bradesco' in nome_lower or 'bradesco' in texto_lower:
+        return 'Bradesco'
+    elif 'banco do brasil' in nome_lower or 'banco do brasil' in texto_lower:
+        return 'Banco do Brasil'
+    
+    return 'Empresa'
+
+MESES_POR_EXTENSO = {
+    'JANEIRO': 1, 'FEVEREIRO': 2, 'MARÇO': 3, 'ABRIL': 4,
+    'MAIO': 5, 'JUNHO': 6, 'JULHO': 7, 'AGOSTO': 8,
+    'SETEMBRO': 9, 'OUTUBRO': 10, 'NOVEMBRO': 11, 'DEZEMBRO': 12
+}
+
+class DataReferenciaContracheque:
+    """Acumula, página por página, as datas que definem a referência do contracheque
+    
+    Segue a mesma prioridade de antes: a data MM/YYYY mais frequente, depois
+    MM-YYYY, depois o primeiro mês por extenso e, por fim, a data atual.
+    """
+    
+    def __init__(self):
+        # Contagens em ordem de aparição (em empate vence a que apareceu antes)
+        self.contagens = {'/': {}, '-': {}}
+        self.mes_extenso = None
+    
+    def alimentar(self, texto):
+        """Registra as datas encontradas em mais um trecho do texto"""
+        ano_atual = datetime.now().year
+        
+        for separador, padrao in (('/', r'(\d{2}/\d{4})'), ('-', r'(\d{2}-\d{4})')):
+            contagem = self.contagens[separador]
+            for match in re.findall(padrao, texto):
+                mes, ano = (int(parte) for parte in match.split(separador))
+                
+                # Verificar se o ano é razoável
+                if 2020 <= ano <= ano_atual + 2 and 1 <= mes <= 12:
+                    data_key = f"{mes:02d}/{ano}"
+                    contagem[data_key] = contagem.get(data_key, 0) + 1
+        
+        if self.mes_extenso is None:
+            match = re.search(
+                r'(JANEIRO|FEVEREIRO|MARÇO|ABRIL|MAIO|JUNHO|JULHO|AGOSTO|SETEMBRO|OUTUBRO|NOVEMBRO|DEZEMBRO)\s*/?\s*(\d{4})',
+                texto,
+                re.IGNORECASE
+            )
+            if match:
+                self.mes_extenso = (match.group(1).upper(), int(match.group(2)))
+    
+    def resolver(self):
+        """Retorna a data de referência a partir de tudo que foi acumulado"""
+        for separador in ('/', '-'):
+            contagem = self.contagens[separador]
+            if contagem:
+                # Pegar a data mais frequente
+                data_mais_comum = max(contagem, key=contagem.get)
+                mes, ano = data_mais_comum.split('/')
+                return datetime(int(ano), int(mes), 1).date()
+        
+        if self.mes_extenso:
+            mes_nome, ano = self.mes_extenso
+            try:
+                return datetime(ano, MESES_POR_EXTENSO[mes_nome], 1).date()
+            except (KeyError, ValueError):
+                pass
+        
+        # Se não encontrou, usar data atual
+        return datetime.now().date()
+
+def extrair_contracheque_alternativo(texto, fonte, nome_arquivo, data_referencia):
+    """Método alternativo para extrair dados de contracheque"""
+    receitas = []
+    descontos = []
+    
+    # Procurar por valores monetários e tentar associar com descrições
+    linhas = texto.split('\n')
+    
+    for linha in linhas:
+        # Procurar por linhas que tenham código numérico e valor
+        if re.search(r'^\d{2,5}\s+', linha) and re.search(r'\d+,\d{2}', linha):
+            try:
+                # Extrair código
+                codigo_match = re.search(r'^(\d{2,5})', linha)
+                if not codigo_match:
+                    continue
+                
+                codigo = codigo_match.group(1)
+                
+                # Extrair valor
+                valor_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', linha)
+                if not valor_match:
+                    continue
+                
+                valor = converter_valor(valor_match.group(1))
+                if valor <= 10:  # Filtrar valores muito baixos
+                    continue
+                
+                # Extrair descrição (texto entre código e valor)
+                descricao = linha.replace(codigo_match.group(1), '').replace(valor_match.group(1), '')
+                descricao = re.sub(r'[R\$\|\t\d/]+', ' ', descricao).strip()
+                
+                if len(descricao) >= 3:
+                    categoria, tipo_lancamento = categorizar_receita_por_codigo(codigo, descricao)
+                    
+                    if tipo_lancamento == 'credito':
+                        receitas.append({
+                            'data': data_referencia,
+                            'descricao': descricao,
+                            'categoria': categoria,
+                            'valor': valor,
+                            'fonte': fonte,
+                            'codigo': codigo,
+                            'tipo_lancamento': tipo_lancamento,
+                            'arquivo_origem': nome_arquivo
+                        })
+                    else:
+                        descontos.append({
+                            'data': data_referencia,
+                            'estabelecimento': f"Desconto: {descricao}",
+                            'categoria': 'Descontos Folha',
+                            'valor': valor,
+                            'cartao': 'Contracheque',
+                            'arquivo_origem': nome_arquivo
+                        })
+                        
+                        # Também adicionar na tabela de receitas como débito
+                        receitas.append({
+                            'data': data_referencia,
+                            'descricao': descricao,
+                            'categoria': categoria,
+                            'valor': valor,
+                            'fonte': fonte,
+                            'codigo': codigo,
+                            'tipo_lancamento': tipo_lancamento,
+                            'arquivo_origem': nome_arquivo
+                        })
+            except Exception:
+                continue
+    
+    return receitas, descontos
+
+def remover_duplicatas_receitas(receitas):
+    """Remove receitas duplicadas"""
+    if not receitas:
+        return []
+    
+    receitas_unicas = {}
+    
+    for receita in receitas:
+        chave = f"{receita['data']}_{receita['descricao']}_{receita['valor']}_{receita.get('codigo', '')}"
+        if chave not in receitas_unicas:
+            receitas_unicas[chave] = receita
+    
+    return list(receitas_unicas.values())
+
+def processar_arquivo(nome_arquivo, file_bytes, tipo_arquivo, ao_encontrar_transacao=None, regras_categoria=None):
+    """Extrai e interpreta um PDF; ponto de entrada dos processos do pool
+    
+    As páginas passam uma a uma da extração para o interpretador. Retorna um
+    dicionário serializável com os lançamentos encontrados, um trecho do texto
+    (para o debug na interface) e as mensagens geradas no caminho. Se
+    ``ao_encontrar_transacao`` for informado (só no processo da interface),
+    ele é chamado com o resultado parcial a cada transação de fatura.
+    ``regras_categoria`` são as regras de categorização editadas na interface
+    (veja ``configurar_regras``).
+    """
+    configurar_regras(regras_categoria)
+    mensagens = []
+    file_hash = calcular_hash_arquivo(file_bytes)
+    resultado = {
+        'nome_arquivo': nome_arquivo,
+        'hash_arquivo': file_hash,
+        'tipo_arquivo': tipo_arquivo,
+        'preview_texto': '',
+        'total_caracteres': 0,
+        'total_paginas': 0,
+        'transacoes': [],
+        'receitas': [],
+        'descontos': [],
+        'mensagens': mensagens
+    }
+    paginas = acompanhar_texto(iterar_paginas_pdf(file_bytes, mensagens, file_hash), resultado)
+    
+    if tipo_arquivo == 'fatura':
+        for transacao in iterar_transacoes_fatura(paginas, nome_arquivo, mensagens):
+            resultado['transacoes'].append(transacao)
+            if ao_encontrar_transacao:
+                ao_encontrar_transacao(resultado)
+    else:
+        resultado['receitas'], resultado['descontos'] = interpretar_paginas_contracheque(paginas, nome_arquivo, mensagens)
+    
+    return resultado
@@ -0,0 +1,140 @@
+"""Vigia uma pasta e importa os PDFs novos ou alterados assim que terminam de ser gravados.
+
+Uso:
+    python vigiar_pasta.py PASTA --tipo fatura
+    python vigiar_pasta.py PASTA --tipo contracheque --intervalo 1 --estabilizacao 3
+
+A pasta é listada a cada --intervalo segundos (polling, sem dependências
+além da biblioteca padrão). Um PDF novo ou alterado (tamanho ou data de
+modificação diferentes) só segue para a importação depois de passar
+--estabilizacao segundos sem mudar, para não ler uma cópia pela metade.
+
+A importação é a mesma do importar_lote: hash em arquivos_processados,
+interpretação em um pool de processos mantido aberto e gravação com
+salvar_lancamentos_arquivo, com o andamento em progresso_importacao. Por isso
+reiniciar o vigia não reimporta nada. O dashboard percebe os lançamentos
+novos pelas marcas d'água do banco e recarrega sozinho, refazendo apenas os
+caches ligados a essas marcas.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from importar_lote import (
+    CAMINHO_BANCO_PADRAO, abrir_banco, criar_pool_processos, importar_caminhos, listar_pdfs
+)
+
+# Segundos entre duas listagens da pasta
+INTERVALO_PADRAO = 1.0
+
+# Segundos sem mudança de tamanho e data de modificação para um arquivo ser importado
+ESTABILIZACAO_PADRAO = 2.0
+
+class VigiaPasta:
+    """Acompanha os PDFs de uma pasta e aponta os que ficaram estáveis depois de mudar"""
+    
+    def __init__(self, pasta, recursivo=False, estabilizacao=ESTABILIZACAO_PADRAO):
+        self.pasta = pasta
+        self.recursivo = recursivo
+        self.estabilizacao = estabilizacao
+        # caminho -> (tamanho, modificado_ns, instante da última mudança vista)
+        self.em_observacao = {}
+        # caminho -> (tamanho, modificado_ns) já entregues para importação
+        self.entregues = {}
+    
+    def arquivos_prontos(self, agora=None):
+        """Caminhos novos ou alterados que não mudam há pelo menos ``estabilizacao`` segundos"""
+        agora = time.monotonic() if agora is None else agora
+        prontos = []
+        vistos = set()
+        for caminho in listar_pdfs(self.pasta, self.recursivo):
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                continue
+            assinatura = (estado.st_size, estado.st_mtime_ns)
+            vistos.add(caminho)
+            if self.entregues.get(caminho) == assinatura:
+                continue
+            
+            observado = self.em_observacao.get(caminho)
+            if observado is None or observado[:2] != assinatura:
+                # Novo ou ainda mudando: recomeçar a contagem
+                self.em_observacao[caminho] = assinatura + (agora,)
+            elif estado.st_size > 0 and agora - observado[2] >= self.estabilizacao:
+                prontos.append(caminho)
+        
+        # Esquecer arquivos removidos da pasta
+        for caminho in set(self.em_observacao) - vistos:
+            del self.em_observacao[caminho]
+        for caminho in set(self.entregues) - vistos:
+            del self.entregues[caminho]
+        return prontos
+    
+    def marcar_entregues(self, caminhos):
+        """Registra que os caminhos foram importados com a assinatura observada"""
+        for caminho in caminhos:
+            self.entregues[caminho] = self.em_observacao.pop(caminho)[:2]
+
+def vigiar(pasta, tipo_arquivo, caminho_banco=CAMINHO_BANCO_PADRAO, processos=None, recursivo=False,
+           intervalo=INTERVALO_PADRAO, estabilizacao=ESTABILIZACAO_PADRAO, saida=print):
+    """Laço do vigia; roda até ser interrompido (Ctrl+C)"""
+    pasta = Path(pasta).resolve()
+    processos = processos or os.cpu_count() or 1
+    vigia = VigiaPasta(pasta, recursivo, estabilizacao)
+    conn = abrir_banco(caminho_banco)
+    executor = criar_pool_processos(processos)
+    saida(f"👀 Vigiando {pasta} ({tipo_arquivo}) a cada {intervalo:g}s; Ctrl+C para encerrar.")
+    try:
+        while True:
+            prontos = vigia.arquivos_prontos()
+            if prontos:
+                try:
+                    importar_caminhos(conn, executor, processos, pasta, prontos, tipo_arquivo, saida=saida)
+                except BrokenProcessPool as e:
+                    # Um processo morreu: trocar o pool; os arquivos do lote voltam a ser observados
+                    saida(f"❌ Falha em um processo de extração: {e}")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = criar_pool_processos(processos)
+                except sqlite3.Error as e:
+                    # Banco travado pelo dashboard, por exemplo: o lote fica em observação e é
+                    # tentado de novo na próxima volta (o progresso pula o que já foi gravado)
+                    saida(f"❌ Erro no banco de dados, nova tentativa em seguida: {e}")
+                else:
+                    vigia.marcar_entregues(prontos)
+            time.sleep(intervalo)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        conn.close()
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Vigia uma pasta e importa os PDFs que chegarem ao banco do dashboard financeiro.")
+    parser.add_argument('pasta', type=Path, help="pasta vigiada")
+    parser.add_argument('--tipo', required=True, choices=['fatura', 'contracheque'], help="tipo dos arquivos da pasta")
+    parser.add_argument('--banco', default=CAMINHO_BANCO_PADRAO, help=f"arquivo do banco SQLite (padrão: {CAMINHO_BANCO_PADRAO})")
+    parser.add_argument('--processos', type=int, default=None, help="processos de interpretação (padrão: número de CPUs)")
+    parser.add_argument('--recursivo', action='store_true', help="incluir as subpastas")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_PADRAO,
+                        help=f"segundos entre duas verificações da pasta (padrão: {INTERVALO_PADRAO:g})")
+    parser.add_argument('--estabilizacao', type=float, default=ESTABILIZACAO_PADRAO,
+                        help=f"segundos sem mudança antes de importar um arquivo (padrão: {ESTABILIZACAO_PADRAO:g})")
+    args = parser.parse_args(argumentos)
+    
+    if not args.pasta.is_dir():
+        parser.error(f"pasta não encontrada: {args.pasta}")
+    
+    try:
+        vigiar(
+            args.pasta, args.tipo, args.banco, args.processos, args.recursivo,
+            args.intervalo, args.estabilizacao
+        )
+    except KeyboardInterrupt:
+        print("⏹️ Vigia encerrado.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())